@@ -13,6 +13,12 @@ class Block:
     __TREE_LEAVES__ = None
     __TREE_TRUNK__ = None
 
+    # Block ids used by the chunked world storage. Id 0 is reserved for air (no block), so the position of a name in
+    # this tuple is its id.
+    __BLOCK_NAMES__ = (None, "GRASS", "SAND", "BRICK", "STONE", "LIGHT_CLOUD", "DARK_CLOUD", "TREE_TRUNK",
+                       "TREE_LEAVES")
+    __BLOCKS_BY_ID__ = {}
+
     @classmethod
     @property
     def GRASS(cls):
@@ -111,8 +117,20 @@ class Block:
             cls.__TREE_LEAVES__ = Block("TREE_LEAVES", ((0, 2), (0, 2), (0, 2)), is_breakable=True, is_collidable=False, can_build_on=True)
         return cls.__TREE_LEAVES__    
 
+    @classmethod
+    def from_id(cls, block_id: int) -> "Block":
+        """!
+        @brief Returns the block with the given id.
+        @param block_id The id of the block, as stored in the chunked world storage.
+        @return The block with the given id.
+        """
+        block = cls.__BLOCKS_BY_ID__.get(block_id)
+        if block is None:
+            block = cls.__BLOCKS_BY_ID__[block_id] = getattr(cls, cls.__BLOCK_NAMES__[block_id])
+        return block
+
     def __init__(self, name: str, texture_coordinates: tuple, is_breakable: bool = True, is_collidable: bool = True,
-                 can_build_on: bool = True) -> None:
+                 can_build_on: bool = True, is_opaque: bool = True) -> None:
         """!
         @brief Initializes an instance of a Block class
         @param name The name of the block.
@@ -121,14 +139,18 @@ class Block:
         @param is_collidable A flag indicating if this type of block will prevent the player from moving through it.
             Default is True.
         @param can_build_on A flag indicating if the player can place blocks off of this block type. Default is True.
+        @param is_opaque A flag indicating if this type of block hides the faces of the blocks next to it, which are then
+            left out of the meshes. Default is True.
         @return An instance of the Block class
         @see [Issue#47](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/47)
         """
         self.name = name
+        self.id = Block.__BLOCK_NAMES__.index(name) if name in Block.__BLOCK_NAMES__ else None
         self.texture_coordinates = tex_coords(*texture_coordinates)
         self.is_breakable = is_breakable
         self.is_collidable = is_collidable
         self.can_build_on = can_build_on
+        self.is_opaque = is_opaque
 
 def tex_coord(x: int, y: int, n=4) -> tuple:
     """!
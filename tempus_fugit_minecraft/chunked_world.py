@@ -0,0 +1,642 @@
+from collections.abc import ItemsView, MutableMapping
+from typing import Iterator
+
+import numpy as np
+
+from tempus_fugit_minecraft.block import Block
+from tempus_fugit_minecraft.occlusion import OPPOSITE_FACES
+from tempus_fugit_minecraft.utilities import FACES
+from tempus_fugit_minecraft.world import Position
+
+CHUNK_SIZE_IN_BLOCKS = 16  # Chunks are cubes of this many blocks along each axis, aligned with the sectors.
+CHUNK_SHIFT = 4  # log2(CHUNK_SIZE_IN_BLOCKS), used to find the chunk of a block with a shift instead of a division.
+CHUNK_MASK = CHUNK_SIZE_IN_BLOCKS - 1
+
+# Offsets of the six face neighbors inside a flattened chunk, in the same order as `FACES`. A chunk is stored with
+# x as the slowest axis and z as the fastest, so moving one block along x skips a whole 16x16 y-z slice.
+FACE_OFFSETS_IN_CHUNK = tuple(
+    dx * CHUNK_SIZE_IN_BLOCKS * CHUNK_SIZE_IN_BLOCKS + dy * CHUNK_SIZE_IN_BLOCKS + dz for dx, dy, dz in FACES)
+
+# Height stored in the heightmap of a column that has no block.
+NO_BLOCK_HEIGHT = np.iinfo(np.int32).min
+
+# Whether each block id is collidable ("solid"), indexed by block id.
+SOLID_BLOCK_IDS = np.array([False] + [Block.from_id(block_id).is_collidable
+                                      for block_id in range(1, len(Block.__BLOCK_NAMES__))])
+
+# Whether each block id hides the faces of the blocks next to it, indexed by block id.
+OPAQUE_BLOCK_IDS = np.array([False] + [Block.from_id(block_id).is_opaque
+                                       for block_id in range(1, len(Block.__BLOCK_NAMES__))])
+
+# Neighbor mask of a position with a block on all 6 sides, see `neighbor_masks()`.
+ALL_NEIGHBORS = (1 << len(FACES)) - 1
+
+# Bit of the neighbor masks of every side, in the order of `FACES`.
+_FACE_BITS = tuple(1 << face for face in range(len(FACES)))
+
+# Bit of the neighbor masks set in the neighbor on each side of a block when the block is added, in the order of
+# `FACES`: the neighbor above sees the block below it.
+_BITS_SEEN_BY_NEIGHBORS = tuple(1 << OPPOSITE_FACES[face] for face in range(len(FACES)))
+
+
+def chunk_of(position: Position) -> Position:
+    """!
+    @brief Returns the (x, y, z) coordinates of the chunk containing the block at `position`.
+    @param position : tuple of len 3 The (x, y, z) position of a block.
+    @return chunk : tuple of len 3 The chunk coordinates.
+    """
+    x, y, z = position
+    return x >> CHUNK_SHIFT, y >> CHUNK_SHIFT, z >> CHUNK_SHIFT
+
+
+def padded_chunk(chunks, chunk: Position, lookup=None, size=CHUNK_SIZE_IN_BLOCKS) -> np.ndarray:
+    """!
+    @brief Returns which positions of a chunk and of the one-block border around it hold a block.
+    @details The border is taken from the 6 neighboring chunks, so all the blocks of the chunk can be checked against
+        their neighbors at once. The corners and edges of the border are always False.
+    @param chunks A mapping from chunk coordinates to chunk arrays, like `ChunkedWorld.chunks`.
+    @param chunk : tuple of len 3 The coordinates of the chunk.
+    @param lookup A boolean array indexed by block id, like OPAQUE_BLOCK_IDS, to only count some kinds of blocks, or
+        None to count every block.
+    @param size : int The length of the sides of the chunk arrays, smaller than CHUNK_SIZE_IN_BLOCKS for downsampled
+        chunks.
+    @return An 18x18x18 `bool` array (for the default size), whose [1, 1, 1] element is the [0, 0, 0] position of the
+        chunk.
+    """
+    n = size
+    padded = np.zeros((n + 2,) * 3, dtype=bool)
+    array = chunks.get(chunk)
+    if array is not None:
+        padded[1:-1, 1:-1, 1:-1] = array != 0 if lookup is None else lookup[array]
+    cx, cy, cz = chunk
+    for face in FACES:
+        neighbor = chunks.get((cx + face[0], cy + face[1], cz + face[2]))
+        if neighbor is None:
+            continue
+        axis = face.index(1) if 1 in face else face.index(-1)
+        # The border on the side of `face` is the opposite side of the neighboring chunk.
+        border = [slice(1, -1)] * 3
+        border[axis] = -1 if face[axis] > 0 else 0
+        side = [slice(None)] * 3
+        side[axis] = 0 if face[axis] > 0 else -1
+        ids = neighbor[tuple(side)]
+        padded[tuple(border)] = ids != 0 if lookup is None else lookup[ids]
+    return padded
+
+
+def neighbor_masks(padded: np.ndarray) -> np.ndarray:
+    """!
+    @brief Returns the neighbor masks of all the positions of a chunk, whose bit i tells whether the neighbor on the
+        side `FACES[i]` holds a block.
+    @param padded A `bool` array of a chunk and of the border around it, see `padded_chunk()`.
+    @return A `uint8` array of the shape of the chunk, `ALL_NEIGHBORS` for the positions surrounded on all 6 sides.
+    """
+    n = padded.shape[0] - 2
+    masks = np.zeros((n,) * 3, dtype=np.uint8)
+    for face, (dx, dy, dz) in enumerate(FACES):
+        masks |= padded[1 + dx:1 + dx + n, 1 + dy:1 + dy + n, 1 + dz:1 + dz + n].view(np.uint8) << np.uint8(face)
+    return masks
+
+
+class ChunkItemsView(ItemsView):
+    """!
+    @brief Items view of a ChunkedWorld that walks the chunk arrays instead of looking every position up again.
+    """
+    def __iter__(self) -> Iterator[tuple[Position, Block]]:
+        return self._mapping.iter_items()
+
+
+class ChunkedWorld(MutableMapping):
+    """!
+    @brief Block storage that keeps the world in dense chunks of block ids instead of one dict entry per block.
+    @details Each chunk is a 16x16x16 `uint8` array holding the id of the block at every position of the chunk, 0
+        meaning no block. Chunks are created the first time a block is placed in them and dropped when their last
+        block is removed. The class behaves like the `dict` mapping positions to blocks it replaces, so the code using
+        `GameModel.world` does not need to know about chunks.
+    @return world An instance of ChunkedWorld.
+    """
+    def __init__(self) -> None:
+        """!
+        @brief Initializes an empty world.
+        """
+        # Mapping from chunk coordinates to the array of block ids of the chunk.
+        self.chunks = {}
+
+        # Mapping from chunk coordinates to a flat memoryview of the chunk array. Reading a single block through the
+        # memoryview returns a plain int and is several times faster than indexing the numpy array.
+        self._views = {}
+
+        # Mapping from chunk coordinates to the number of blocks in the chunk.
+        self._block_counts = {}
+        self._length = 0
+
+        # Mapping from the (x, z) coordinates of a column of chunks to the y coordinates of its chunks.
+        self._column_chunks = {}
+
+        # Mapping from the (x, z) coordinates of a column of chunks to its heightmap, a 2x16x16 `int32` array holding
+        # the y of the top block of any kind ([0]) and of the top solid block ([1]) of every column of blocks,
+        # NO_BLOCK_HEIGHT if there is none. `_height_views` holds flat memoryviews of the same arrays.
+        self._heights = {}
+        self._height_views = {}
+
+        # Mapping from chunk coordinates to the neighbor masks of the chunk, see `neighbor_masks()`, and to flat
+        # memoryviews of them. They are computed the first time they are needed and kept up to date as blocks are
+        # added and removed, each block flipping one bit in each of its 6 neighbors.
+        self._neighbor_masks = {}
+        self._mask_views = {}
+
+    def _create_chunk(self, chunk: Position) -> memoryview:
+        """!
+        @brief Allocates an empty chunk.
+        @param chunk : tuple of len 3 The coordinates of the chunk.
+        @return view A flat memoryview of the new chunk.
+        """
+        array = np.zeros((CHUNK_SIZE_IN_BLOCKS,) * 3, dtype=np.uint8)
+        view = memoryview(array).cast('B', (array.size,))
+        self.chunks[chunk] = array
+        self._views[chunk] = view
+        self._block_counts[chunk] = 0
+        cx, cy, cz = chunk
+        if (cx, cz) not in self._column_chunks:
+            self._column_chunks[(cx, cz)] = set()
+            heights = np.full((2, CHUNK_SIZE_IN_BLOCKS, CHUNK_SIZE_IN_BLOCKS), NO_BLOCK_HEIGHT, dtype=np.int32)
+            self._heights[(cx, cz)] = heights
+            self._height_views[(cx, cz)] = memoryview(heights).cast('B').cast('i')
+        self._column_chunks[(cx, cz)].add(cy)
+        return view
+
+    def _drop_chunk(self, chunk: Position) -> None:
+        """!
+        @brief Releases an empty chunk.
+        @param chunk : tuple of len 3 The coordinates of the chunk.
+        """
+        self._views.pop(chunk).release()
+        del self.chunks[chunk]
+        del self._block_counts[chunk]
+        if chunk in self._mask_views:
+            self._mask_views.pop(chunk).release()
+            del self._neighbor_masks[chunk]
+        cx, cy, cz = chunk
+        self._column_chunks[(cx, cz)].discard(cy)
+        if not self._column_chunks[(cx, cz)]:
+            del self._column_chunks[(cx, cz)]
+            del self._heights[(cx, cz)]
+            self._height_views.pop((cx, cz)).release()
+
+    @staticmethod
+    def _index_in_chunk(x: int, y: int, z: int) -> int:
+        """!
+        @brief Returns the index of the block at (x, y, z) inside the flattened array of its chunk.
+        """
+        return ((x & CHUNK_MASK) << (2 * CHUNK_SHIFT)) | ((y & CHUNK_MASK) << CHUNK_SHIFT) | (z & CHUNK_MASK)
+
+    def block_id(self, position: Position) -> int:
+        """!
+        @brief Returns the id of the block at `position`, or 0 if there is no block there.
+        @param position : tuple of len 3 The (x, y, z) position to look up.
+        @return block_id : int
+        """
+        x, y, z = position
+        view = self._views.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT, z >> CHUNK_SHIFT))
+        if view is None:
+            return 0
+        return view[self._index_in_chunk(x, y, z)]
+
+    def __getitem__(self, position: Position) -> Block:
+        block_id = self.block_id(position)
+        if not block_id:
+            raise KeyError(position)
+        return Block.from_id(block_id)
+
+    def get(self, position: Position, default=None):
+        block_id = self.block_id(position)
+        return Block.from_id(block_id) if block_id else default
+
+    def __contains__(self, position) -> bool:
+        return self.block_id(position) != 0
+
+    def __setitem__(self, position: Position, block: Block) -> None:
+        if not block.id:
+            raise ValueError(f"Block {block.name} has no id and cannot be stored in the world")
+        x, y, z = position
+        chunk = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT, z >> CHUNK_SHIFT)
+        view = self._views.get(chunk)
+        if view is None:
+            view = self._create_chunk(chunk)
+        index = self._index_in_chunk(x, y, z)
+        if not view[index]:
+            self._block_counts[chunk] += 1
+            self._length += 1
+            if self._mask_views:
+                self._flip_neighbor_bits(x, y, z, True)
+        view[index] = block.id
+        heights = self._height_views[(chunk[0], chunk[2])]
+        column = ((x & CHUNK_MASK) << CHUNK_SHIFT) | (z & CHUNK_MASK)
+        solid_column = column + CHUNK_SIZE_IN_BLOCKS * CHUNK_SIZE_IN_BLOCKS
+        if y > heights[column]:
+            heights[column] = y
+        if block.is_collidable:
+            if y > heights[solid_column]:
+                heights[solid_column] = y
+        elif y == heights[solid_column]:
+            self._update_column_height(x, z)
+
+    def __delitem__(self, position: Position) -> None:
+        x, y, z = position
+        chunk = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT, z >> CHUNK_SHIFT)
+        view = self._views.get(chunk)
+        index = self._index_in_chunk(x, y, z)
+        if view is None or not view[index]:
+            raise KeyError(position)
+        view[index] = 0
+        self._length -= 1
+        self._block_counts[chunk] -= 1
+        if self._mask_views:
+            self._flip_neighbor_bits(x, y, z, False)
+        if not self._block_counts[chunk]:
+            self._drop_chunk(chunk)
+        heights = self._height_views.get((chunk[0], chunk[2]))
+        if heights is not None:
+            column = ((x & CHUNK_MASK) << CHUNK_SHIFT) | (z & CHUNK_MASK)
+            if y == heights[column] or y == heights[column + CHUNK_SIZE_IN_BLOCKS * CHUNK_SIZE_IN_BLOCKS]:
+                self._update_column_height(x, z)
+
+    def _flip_neighbor_bits(self, x: int, y: int, z: int, occupied: bool) -> None:
+        """!
+        @brief Updates the neighbor masks of the 6 neighbors of (x, y, z) after a block was added there or removed.
+        @details Only the masks that were already computed are updated, the others will be computed from the chunk
+            arrays when they are needed.
+        @param x : int The x coordinate of the block.
+        @param y : int The y coordinate of the block.
+        @param z : int The z coordinate of the block.
+        @param occupied : bool Whether there is now a block at (x, y, z).
+        """
+        masks = self._mask_views.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT, z >> CHUNK_SHIFT))
+        if masks is not None and 0 < x & CHUNK_MASK < CHUNK_MASK and 0 < y & CHUNK_MASK < CHUNK_MASK \
+                and 0 < z & CHUNK_MASK < CHUNK_MASK:
+            index = self._index_in_chunk(x, y, z)
+            for offset, bit in zip(FACE_OFFSETS_IN_CHUNK, _BITS_SEEN_BY_NEIGHBORS):
+                if occupied:
+                    masks[index + offset] |= bit
+                else:
+                    masks[index + offset] &= ~bit
+            return
+        for (dx, dy, dz), bit in zip(FACES, _BITS_SEEN_BY_NEIGHBORS):
+            nx, ny, nz = x + dx, y + dy, z + dz
+            masks = self._mask_views.get((nx >> CHUNK_SHIFT, ny >> CHUNK_SHIFT, nz >> CHUNK_SHIFT))
+            if masks is None:
+                continue
+            index = self._index_in_chunk(nx, ny, nz)
+            if occupied:
+                masks[index] |= bit
+            else:
+                masks[index] &= ~bit
+
+    def _invalidate_neighbor_masks(self, chunks) -> None:
+        """!
+        @brief Forgets the neighbor masks of some chunks and of their neighbors, after the chunk arrays were changed
+            without going through `__setitem__()` and `__delitem__()`.
+        @param chunks An iterable of chunk coordinates.
+        """
+        if not self._mask_views:
+            return
+        for cx, cy, cz in chunks:
+            for dx, dy, dz in [(0, 0, 0)] + FACES:
+                view = self._mask_views.pop((cx + dx, cy + dy, cz + dz), None)
+                if view is not None:
+                    view.release()
+                    del self._neighbor_masks[(cx + dx, cy + dy, cz + dz)]
+
+    def neighbor_mask_array(self, chunk: Position):
+        """!
+        @brief Returns the neighbor masks of all the positions of a chunk, see `neighbor_masks()`.
+        @details The masks are kept up to date by the world, and must not be changed.
+        @param chunk : tuple of len 3 The coordinates of the chunk.
+        @return A 16x16x16 `uint8` array, or None if the chunk has no block.
+        """
+        masks = self._neighbor_masks.get(chunk)
+        if masks is None and chunk in self.chunks:
+            masks = neighbor_masks(self.padded_chunk(chunk))
+            self._neighbor_masks[chunk] = masks
+            self._mask_views[chunk] = memoryview(masks).cast('B', (masks.size,))
+        return masks
+
+    def neighbor_mask(self, position: Position) -> int:
+        """!
+        @brief Returns which of the 6 neighbors of `position` hold a block.
+        @param position : tuple of len 3 The (x, y, z) position.
+        @return An int whose bit i is set when the neighbor on the side `FACES[i]` holds a block.
+        """
+        x, y, z = position
+        chunk = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT, z >> CHUNK_SHIFT)
+        masks = self._mask_views.get(chunk)
+        if masks is None:
+            if chunk not in self.chunks:
+                mask = 0
+                for bit, (dx, dy, dz) in zip(_FACE_BITS, FACES):
+                    if self.block_id((x + dx, y + dy, z + dz)):
+                        mask |= bit
+                return mask
+            self.neighbor_mask_array(chunk)
+            masks = self._mask_views[chunk]
+        return masks[self._index_in_chunk(x, y, z)]
+
+    def exposed_faces(self, position: Position) -> int:
+        """!
+        @brief Returns which faces of the block at `position` have no block in front of them.
+        @param position : tuple of len 3 The (x, y, z) position.
+        @return An int whose bit i is set when the face on the side `FACES[i]` is not covered.
+        """
+        return ~self.neighbor_mask(position) & ALL_NEIGHBORS
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Position]:
+        for position, _ in self.iter_items():
+            yield position
+
+    def iter_items(self) -> Iterator[tuple[Position, Block]]:
+        """!
+        @brief Iterates over the (position, block) pairs of every block in the world, one chunk at a time.
+        @return An iterator of pairs of positions and blocks.
+        """
+        for (cx, cy, cz), array in list(self.chunks.items()):
+            xs, ys, zs = np.nonzero(array)
+            ids = array[xs, ys, zs].tolist()
+            xs = (xs + cx * CHUNK_SIZE_IN_BLOCKS).tolist()
+            ys = (ys + cy * CHUNK_SIZE_IN_BLOCKS).tolist()
+            zs = (zs + cz * CHUNK_SIZE_IN_BLOCKS).tolist()
+            for x, y, z, block_id in zip(xs, ys, zs, ids):
+                yield (x, y, z), Block.from_id(block_id)
+
+    def positions_in_chunk(self, chunk: Position) -> list[Position]:
+        """!
+        @brief Returns the positions of all the blocks in the given chunk.
+        @param chunk : tuple of len 3 The coordinates of the chunk.
+        @return A list of (x, y, z) positions.
+        """
+        array = self.chunks.get(chunk)
+        if array is None:
+            return []
+        cx, cy, cz = chunk
+        xs, ys, zs = np.nonzero(array)
+        return list(zip((xs + cx * CHUNK_SIZE_IN_BLOCKS).tolist(), (ys + cy * CHUNK_SIZE_IN_BLOCKS).tolist(),
+                        (zs + cz * CHUNK_SIZE_IN_BLOCKS).tolist()))
+
+    def block_count(self, chunk: Position) -> int:
+        """!
+        @brief Returns the number of blocks in the given chunk.
+        @param chunk : tuple of len 3 The coordinates of the chunk.
+        @return int
+        """
+        return self._block_counts.get(chunk, 0)
+
+    def chunks_in_column(self, column: tuple[int, int]) -> list[Position]:
+        """!
+        @brief Returns the coordinates of the chunks of a column of chunks, from bottom to top.
+        @param column : tuple of len 2 The (x, z) coordinates of the column of chunks.
+        @return A list of chunk coordinates.
+        """
+        cx, cz = column
+        return [(cx, cy, cz) for cy in sorted(self._column_chunks.get(column, ()))]
+
+    def padded_chunk(self, chunk: Position, lookup=None) -> np.ndarray:
+        """!
+        @brief Returns which positions of a chunk of this world and of the one-block border around it hold a block,
+            see `padded_chunk()`.
+        """
+        return padded_chunk(self.chunks, chunk, lookup)
+
+    def exposed_positions_in_chunk(self, chunk: Position) -> list[Position]:
+        """!
+        @brief Returns the positions of the blocks of a chunk that are not surrounded on all 6 sides by blocks.
+        @details All the blocks of the chunk are checked at once, with the neighbor masks of the chunk, see
+            `neighbor_mask_array()`.
+        @param chunk : tuple of len 3 The coordinates of the chunk.
+        @return A list of (x, y, z) positions.
+        """
+        array = self.chunks.get(chunk)
+        if array is None:
+            return []
+        n = CHUNK_SIZE_IN_BLOCKS
+        cx, cy, cz = chunk
+        xs, ys, zs = np.nonzero((array != 0) & (self.neighbor_mask_array(chunk) != ALL_NEIGHBORS))
+        return list(zip((xs + cx * n).tolist(), (ys + cy * n).tolist(), (zs + cz * n).tolist()))
+
+    def _volume_parts(self, origin: Position, shape: tuple) -> Iterator[tuple[Position, tuple, tuple]]:
+        """!
+        @brief Splits a box of positions along the borders of the chunks.
+        @param origin : tuple of len 3 The position of the [0, 0, 0] corner of the box.
+        @param shape : tuple of len 3 The size of the box along x, y and z.
+        @return An iterator of (chunk coordinates, index of the part in a volume of the box, index of the part in the
+            chunk array) triples, one per chunk the box overlaps.
+        """
+        ox, oy, oz = origin
+        high = (ox + shape[0], oy + shape[1], oz + shape[2])
+        for cx in range(ox >> CHUNK_SHIFT, ((high[0] - 1) >> CHUNK_SHIFT) + 1):
+            for cy in range(oy >> CHUNK_SHIFT, ((high[1] - 1) >> CHUNK_SHIFT) + 1):
+                for cz in range(oz >> CHUNK_SHIFT, ((high[2] - 1) >> CHUNK_SHIFT) + 1):
+                    chunk_low = (cx * CHUNK_SIZE_IN_BLOCKS, cy * CHUNK_SIZE_IN_BLOCKS, cz * CHUNK_SIZE_IN_BLOCKS)
+                    low = [max(c, o) for c, o in zip(chunk_low, origin)]
+                    top = [min(c + CHUNK_SIZE_IN_BLOCKS, h) for c, h in zip(chunk_low, high)]
+                    yield ((cx, cy, cz), tuple(slice(l - o, t - o) for l, t, o in zip(low, top, origin)),
+                           tuple(slice(l - c, t - c) for l, t, c in zip(low, top, chunk_low)))
+
+    def read_volume(self, origin: Position, shape: tuple) -> np.ndarray:
+        """!
+        @brief Copies the block ids of a box of positions out of the world, one chunk at a time.
+        @param origin : tuple of len 3 The position of the [0, 0, 0] corner of the box.
+        @param shape : tuple of len 3 The size of the box along x, y and z.
+        @return A `uint8` array of block ids indexed by [x, y, z], 0 where there is no block.
+        """
+        volume = np.zeros(shape, dtype=np.uint8)
+        for chunk, part, inside_chunk in self._volume_parts(origin, shape):
+            array = self.chunks.get(chunk)
+            if array is not None:
+                volume[part] = array[inside_chunk]
+        return volume
+
+    def write_volume(self, origin: Position, volume: np.ndarray, where: np.ndarray) -> list[Position]:
+        """!
+        @brief Copies some of the block ids of `volume` into the world, one chunk at a time, 0 removing the block.
+        @details Chunks are created when blocks are written in them and dropped when they are left without blocks.
+        @param origin : tuple of len 3 The position of the volume's [0, 0, 0] element.
+        @param volume : numpy array of block ids indexed by [x, y, z].
+        @param where : numpy array of `bool` of the shape of `volume`, True for the positions to write.
+        @return The coordinates of the chunks that were written.
+        """
+        written = []
+        for chunk, part, inside_chunk in self._volume_parts(origin, volume.shape):
+            mask = where[part]
+            if not mask.any():
+                continue
+            ids = volume[part]
+            if chunk not in self.chunks:
+                if not ids[mask].any():
+                    continue
+                self._create_chunk(chunk)
+            array = self.chunks[chunk]
+            np.copyto(array[inside_chunk], ids, where=mask)
+            count = int(np.count_nonzero(array))
+            self._length += count - self._block_counts[chunk]
+            self._block_counts[chunk] = count
+            if not count:
+                self._drop_chunk(chunk)
+            written.append(chunk)
+        self._invalidate_neighbor_masks(written)
+        self._update_heightmaps({(cx, cz) for cx, _, cz in written})
+        return written
+
+    def insert_volume(self, origin: Position, volume: np.ndarray) -> list[Position]:
+        """!
+        @brief Copies every block of `volume` into the world, one chunk at a time.
+        @details Positions where the volume holds 0 keep the block they already have.
+        @param origin : tuple of len 3 The position of the volume's [0, 0, 0] element.
+        @param volume : numpy array of block ids indexed by [x, y, z].
+        @return The coordinates of the chunks that received blocks.
+        """
+        return self.write_volume(origin, volume, volume != 0)
+
+    def insert_chunks(self, chunks: Iterator[tuple[Position, np.ndarray, int]]) -> None:
+        """!
+        @brief Adds whole chunks to the world, replacing the chunks with the same coordinates.
+        @details The arrays are used as they are, without copying them, so they can be views of a memory-mapped file.
+        @param chunks An iterable of (chunk coordinates, 16x16x16 `uint8` array of block ids, number of blocks of the
+            chunk) triples. Chunks without any block are skipped.
+        """
+        columns = set()
+        inserted = []
+        for chunk, array, block_count in chunks:
+            if chunk in self.chunks:
+                self.discard_chunk(chunk)
+            if not block_count:
+                continue
+            self._create_chunk(chunk)
+            self._views[chunk].release()
+            self.chunks[chunk] = array
+            self._views[chunk] = memoryview(array).cast('B', (array.size,))
+            self._block_counts[chunk] = block_count
+            self._length += block_count
+            columns.add((chunk[0], chunk[2]))
+            inserted.append(chunk)
+        self._invalidate_neighbor_masks(inserted)
+        self._update_heightmaps(columns)
+
+    def _update_heightmaps(self, columns) -> None:
+        """!
+        @brief Computes the heightmaps of whole columns of chunks from their chunk arrays.
+        @details The chunks of all the columns are processed together in a few numpy operations.
+        @param columns An iterable of the (x, z) coordinates of the columns of chunks.
+        """
+        columns = [column for column in columns if column in self._heights]
+        if not columns:
+            return
+        chunks = [(cx, cy, cz) for cx, cz in columns for cy in self._column_chunks[(cx, cz)]]
+        starts = np.cumsum([0] + [len(self._column_chunks[column]) for column in columns[:-1]])
+        arrays = np.stack([self.chunks[chunk] for chunk in chunks])
+        bottoms = np.array([cy * CHUNK_SIZE_IN_BLOCKS for _, cy, _ in chunks], dtype=np.int32)[:, None, None]
+        tops = []
+        for occupied in (arrays != 0, SOLID_BLOCK_IDS[arrays]):
+            # The top block of each column of a chunk is the first occupied position when walking down from the top
+            # of the chunk.
+            top = bottoms + (CHUNK_SIZE_IN_BLOCKS - 1) - occupied[:, :, ::-1, :].argmax(axis=2).astype(np.int32)
+            top[~occupied.any(axis=2)] = NO_BLOCK_HEIGHT
+            tops.append(np.maximum.reduceat(top, starts, axis=0))
+        for i, column in enumerate(columns):
+            self._heights[column][0] = tops[0][i]
+            self._heights[column][1] = tops[1][i]
+
+    def _update_column_height(self, x: int, z: int) -> None:
+        """!
+        @brief Finds the top blocks of the column of blocks at (x, z) again, after its top block was removed.
+        @param x : int The x coordinate of the column.
+        @param z : int The z coordinate of the column.
+        """
+        column = (x >> CHUNK_SHIFT, z >> CHUNK_SHIFT)
+        lx, lz = x & CHUNK_MASK, z & CHUNK_MASK
+        heights = self._heights[column]
+        heights[:, lx, lz] = NO_BLOCK_HEIGHT
+        for cy in sorted(self._column_chunks[column], reverse=True):
+            ids = self.chunks[(column[0], cy, column[1])][lx, :, lz]
+            for layer, occupied in enumerate((ids != 0, SOLID_BLOCK_IDS[ids])):
+                if heights[layer, lx, lz] == NO_BLOCK_HEIGHT and occupied.any():
+                    heights[layer, lx, lz] = cy * CHUNK_SIZE_IN_BLOCKS + int(np.nonzero(occupied)[0][-1])
+            if (heights[:, lx, lz] != NO_BLOCK_HEIGHT).all():
+                return
+
+    def top_block_y(self, x: int, z: int, solid=False):
+        """!
+        @brief Returns the y coordinate of the top block of the column at (x, z), read from the heightmap.
+        @param x : int The x coordinate of the column.
+        @param z : int The z coordinate of the column.
+        @param solid : bool Whether to skip the blocks that are not collidable, like clouds and leaves.
+        @return The y coordinate of the top block, or None if the column has no (solid) block.
+        """
+        heights = self._height_views.get((x >> CHUNK_SHIFT, z >> CHUNK_SHIFT))
+        if heights is None:
+            return None
+        y = heights[solid * CHUNK_SIZE_IN_BLOCKS * CHUNK_SIZE_IN_BLOCKS + (((x & CHUNK_MASK) << CHUNK_SHIFT)
+                                                                           | (z & CHUNK_MASK))]
+        return None if y == NO_BLOCK_HEIGHT else y
+
+    def iter_column_tops(self, solid=False) -> Iterator[Position]:
+        """!
+        @brief Iterates over the positions of the top block of every column of blocks of the world.
+        @param solid : bool Whether to skip the blocks that are not collidable, like clouds and leaves.
+        @return An iterator of (x, y, z) positions.
+        """
+        for (cx, cz), heights in list(self._heights.items()):
+            xs, zs = np.nonzero(heights[int(solid)] != NO_BLOCK_HEIGHT)
+            ys = heights[int(solid)][xs, zs].tolist()
+            xs = (xs + cx * CHUNK_SIZE_IN_BLOCKS).tolist()
+            zs = (zs + cz * CHUNK_SIZE_IN_BLOCKS).tolist()
+            yield from zip(xs, ys, zs)
+
+    def discard_chunk(self, chunk: Position) -> None:
+        """!
+        @brief Removes a whole chunk and all of its blocks from the world, if the chunk exists.
+        @param chunk : tuple of len 3 The coordinates of the chunk.
+        """
+        if chunk in self.chunks:
+            self._length -= self._block_counts[chunk]
+            self._drop_chunk(chunk)
+            self._invalidate_neighbor_masks([chunk])
+            self._update_heightmaps([(chunk[0], chunk[2])])
+
+    def items(self) -> ChunkItemsView:
+        return ChunkItemsView(self)
+
+    def clear(self) -> None:
+        for view in self._views.values():
+            view.release()
+        for view in self._height_views.values():
+            view.release()
+        for view in self._mask_views.values():
+            view.release()
+        self.chunks.clear()
+        self._views.clear()
+        self._block_counts.clear()
+        self._column_chunks.clear()
+        self._heights.clear()
+        self._height_views.clear()
+        self._neighbor_masks.clear()
+        self._mask_views.clear()
+        self._length = 0
+
+    def is_exposed(self, position: Position) -> bool:
+        """!
+        @brief Returns False if the block at `position` is surrounded on all 6 sides by blocks, True otherwise.
+        @details A single test of the neighbor mask of the position, see `neighbor_mask()`.
+        @param position : tuple of len 3 The (x, y, z) position to check
+        @return boolean
+        """
+        return self.neighbor_mask(position) != ALL_NEIGHBORS
+
+    @property
+    def nbytes(self) -> int:
+        """!
+        @brief The number of bytes used by the chunk arrays.
+        @return int
+        """
+        return sum(array.nbytes for array in self.chunks.values())
@@ -0,0 +1,253 @@
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Iterator
+
+import numpy as np
+
+from tempus_fugit_minecraft import world_storage
+from tempus_fugit_minecraft.chunked_world import CHUNK_SHIFT, ChunkedWorld, chunk_of
+from tempus_fugit_minecraft.world import Position
+
+# Every edit of the world is one fixed-size record: the operation, the (x, y, z) position of the block and the id of
+# the block that was set, 0 for a removal.
+JOURNAL_RECORD = struct.Struct('<BiiiB')
+# The same record as a numpy type, to record the edits of many blocks at once.
+JOURNAL_RECORD_DTYPE = np.dtype([('operation', 'u1'), ('x', '<i4'), ('y', '<i4'), ('z', '<i4'), ('block_id', 'u1')])
+SET_BLOCK = 1
+REMOVE_BLOCK = 2
+
+
+def journal_file_name(generation: int) -> str:
+    """!
+    @brief Returns the name of the journal file of the given generation inside a saved world.
+    @param generation : int The generation of the journal, increased by every snapshot.
+    @return The file name.
+    """
+    return f'journal.{generation}.bin'
+
+
+def journal_generations(path: str) -> list[int]:
+    """!
+    @brief Returns the generations of the journal files of a saved world, in increasing order.
+    @param path : str The directory of the saved world.
+    @return A list of generations.
+    """
+    generations = []
+    for name in os.listdir(path):
+        parts = name.split('.')
+        if len(parts) == 3 and parts[0] == 'journal' and parts[2] == 'bin' and parts[1].isdigit():
+            generations.append(int(parts[1]))
+    return sorted(generations)
+
+
+def read_edits(path: str, first_generation: int) -> Iterator[tuple[Position, int]]:
+    """!
+    @brief Reads the edits recorded in the journal files of a saved world that are not in its snapshot yet.
+    @details A record cut short by a crash at the end of a file is ignored.
+    @param path : str The directory of the saved world.
+    @param first_generation : int The generation of the journal started by the last snapshot of the world.
+    @return An iterator of (position, block id) pairs in the order of the edits, the block id being 0 for removals.
+    """
+    for generation in journal_generations(path):
+        if generation < first_generation:
+            continue
+        with open(os.path.join(path, journal_file_name(generation)), 'rb') as file:
+            data = file.read()
+        for offset in range(0, len(data) - JOURNAL_RECORD.size + 1, JOURNAL_RECORD.size):
+            operation, x, y, z, block_id = JOURNAL_RECORD.unpack_from(data, offset)
+            yield (x, y, z), block_id if operation == SET_BLOCK else 0
+
+
+class EditJournal(object):
+    """!
+    @brief Append-only journal of the edits of a world, with periodic snapshots, written by a background thread.
+    @details Edits are appended to an in-memory buffer that the background thread writes to the journal file and
+        fsyncs once per batch window, so a crash loses at most the edits of the last window. A snapshot writes the
+        regions changed since the previous snapshot as region files and starts a new journal file, whose generation is
+        saved with the state of the game, so the journal files of older generations can be deleted. The game thread
+        only copies the chunks of the changed regions to take a snapshot, the files are written by the background
+        thread. Loading a world replays the journal files from the generation of its snapshot, see `read_edits()`.
+    @return journal An instance of EditJournal.
+    """
+    def __init__(self, path: str, generation: int = 0, batch_interval_in_seconds: float = 0.5,
+                 snapshot_interval_in_seconds: float = 60.0) -> None:
+        """!
+        @brief Starts a journal in the directory of a saved world.
+        @param path : str The directory of the saved world.
+        @param generation : int The generation of the journal started by the last snapshot of the world.
+        @param batch_interval_in_seconds : float How long edits are buffered before they are written and fsynced.
+        @param snapshot_interval_in_seconds : float How often a snapshot is due when the world changed.
+        """
+        self.path = path
+        self.generation = generation
+        self.batch_interval_in_seconds = batch_interval_in_seconds
+        self.snapshot_interval_in_seconds = snapshot_interval_in_seconds
+
+        # Chunks edited since the last snapshot. Only used by the game thread.
+        self.dirty_chunks = set()
+        self.last_snapshot_time = time.perf_counter()
+
+        # Records not written yet, shared with the background thread.
+        self._buffer = bytearray()
+        self._buffer_lock = threading.Lock()
+
+        # Snapshots waiting to be written, and the event telling that the last one was written.
+        self._tasks = queue.Queue()
+        self._snapshot_done = threading.Event()
+        self._snapshot_done.set()
+
+        # The journal file the background thread writes to, and its generation.
+        self._file = open(os.path.join(path, journal_file_name(generation)), 'ab')
+        self._file_generation = generation
+        self._thread = threading.Thread(target=self._run, name='EditJournal', daemon=True)
+        self._thread.start()
+
+    def record_set(self, position: Position, block_id: int) -> None:
+        """!
+        @brief Records that the block at `position` was set to the block with id `block_id`.
+        @param position : tuple of len 3 The (x, y, z) position of the block.
+        @param block_id : int The id of the block.
+        """
+        self._record(SET_BLOCK, position, block_id)
+
+    def record_remove(self, position: Position) -> None:
+        """!
+        @brief Records that the block at `position` was removed.
+        @param position : tuple of len 3 The (x, y, z) position of the block.
+        """
+        self._record(REMOVE_BLOCK, position, 0)
+
+    def record_volume(self, origin: Position, volume: np.ndarray, where: np.ndarray) -> None:
+        """!
+        @brief Records that some of the blocks of a box were set to the block ids of `volume`, 0 meaning removed, see
+            `ChunkedWorld.write_volume()`.
+        @details The records are the same as the ones of `record_set()` and `record_remove()`, built all at once.
+        @param origin : tuple of len 3 The position of the volume's [0, 0, 0] element.
+        @param volume : numpy array of block ids indexed by [x, y, z].
+        @param where : numpy array of `bool` of the shape of `volume`, True for the positions that were written.
+        """
+        xs, ys, zs = np.nonzero(where)
+        block_ids = volume[xs, ys, zs]
+        records = np.empty(len(xs), dtype=JOURNAL_RECORD_DTYPE)
+        records['operation'] = np.where(block_ids != 0, SET_BLOCK, REMOVE_BLOCK)
+        records['x'] = xs + origin[0]
+        records['y'] = ys + origin[1]
+        records['z'] = zs + origin[2]
+        records['block_id'] = block_ids
+        with self._buffer_lock:
+            self._buffer += records.tobytes()
+        chunks = np.unique(np.stack((records['x'], records['y'], records['z']), axis=1) >> CHUNK_SHIFT, axis=0)
+        self.dirty_chunks.update(map(tuple, chunks.tolist()))
+
+    def _record(self, operation: int, position: Position, block_id: int) -> None:
+        """!
+        @brief Private implementation of `record_set()` and `record_remove()`.
+        """
+        record = JOURNAL_RECORD.pack(operation, *position, block_id)
+        with self._buffer_lock:
+            self._buffer += record
+        self.dirty_chunks.add(chunk_of(position))
+
+    def snapshot_due(self) -> bool:
+        """!
+        @brief Returns whether the world changed since the last snapshot, the snapshot interval elapsed and the last
+            snapshot was written.
+        @return boolean
+        """
+        return bool(self.dirty_chunks) and self._snapshot_done.is_set() and \
+            time.perf_counter() - self.last_snapshot_time >= self.snapshot_interval_in_seconds
+
+    def snapshot(self, world: ChunkedWorld, level: dict, everything=False) -> None:
+        """!
+        @brief Takes a snapshot of the regions of `world` changed since the last snapshot, written in the background.
+        @param world : ChunkedWorld The world to take a snapshot of.
+        @param level : dict The state of the game to save with the snapshot, see `world_storage.write_level()`.
+        @param everything : bool Whether to take a snapshot of all the regions of the world instead, the region files
+            of the other regions being removed, like `world_storage.save_world()` does.
+        """
+        regions = world_storage.collect_regions(
+            world, None if everything else {world_storage.region_of(chunk) for chunk in self.dirty_chunks}, copy=True)
+        with self._buffer_lock:
+            # The records of the current generation end here, the next ones go to the journal of the next generation.
+            records = bytes(self._buffer)
+            self._buffer.clear()
+            self.generation += 1
+        self.dirty_chunks.clear()
+        self.last_snapshot_time = time.perf_counter()
+        self._snapshot_done.clear()
+        self._tasks.put((records, regions, dict(level, journal_generation=self.generation), self.generation,
+                         everything))
+
+    def wait_for_snapshot(self) -> None:
+        """!
+        @brief Blocks until the last snapshot is written.
+        """
+        self._snapshot_done.wait()
+
+    def close(self) -> None:
+        """!
+        @brief Writes the buffered edits and the pending snapshots, then stops the background thread.
+        """
+        self._tasks.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _flush(self) -> None:
+        """!
+        @brief Writes and fsyncs the buffered records in the current journal file. Runs in the background thread.
+        """
+        with self._buffer_lock:
+            if self.generation != self._file_generation:
+                # The buffered records belong to the journal a pending snapshot starts.
+                return
+            records = bytes(self._buffer)
+            self._buffer.clear()
+        self._write(records)
+
+    def _write(self, records: bytes) -> None:
+        """!
+        @brief Writes and fsyncs records in the current journal file. Runs in the background thread.
+        @param records : bytes The records.
+        """
+        if records:
+            self._file.write(records)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _write_snapshot(self, records: bytes, regions: dict, level: dict, generation: int, everything: bool) -> None:
+        """!
+        @brief Ends the journal file of the previous generation and writes a snapshot. Runs in the background thread.
+        @details The state of the game is written last. Until it is, loading the world replays the journal of the
+            previous generation too, on top of the regions that were already written, which gives the same blocks
+            since every record sets or removes a single block.
+        """
+        self._write(records)
+        self._file.close()
+        self._file = open(os.path.join(self.path, journal_file_name(generation)), 'ab')
+        self._file_generation = generation
+        world_storage.write_regions(self.path, regions)
+        if everything:
+            world_storage.remove_other_regions(self.path, regions)
+        world_storage.write_level(self.path, level)
+        for old_generation in journal_generations(self.path):
+            if old_generation < generation:
+                os.remove(os.path.join(self.path, journal_file_name(old_generation)))
+        self._snapshot_done.set()
+
+    def _run(self) -> None:
+        """!
+        @brief Loop of the background thread: writes the buffered records once per batch window, and the snapshots.
+        """
+        while True:
+            try:
+                task = self._tasks.get(timeout=self.batch_interval_in_seconds)
+            except queue.Empty:
+                self._flush()
+                continue
+            if task is None:
+                self._flush()
+                return
+            self._write_snapshot(*task)
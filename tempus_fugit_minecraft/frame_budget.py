@@ -0,0 +1,89 @@
+from tempus_fugit_minecraft.utilities import TICKS_PER_SEC
+
+# The time a frame should take, one tick of the game loop.
+TARGET_FRAME_TIME_IN_SECONDS = 1.0 / TICKS_PER_SEC
+# The queue always gets at least this much time per frame, so it keeps moving on machines that cannot draw a frame in
+# the target time, and at most this much, the old fixed budget.
+MIN_BUDGET_IN_SECONDS = 0.002
+MAX_BUDGET_IN_SECONDS = 1.0 / TICKS_PER_SEC
+# Weight of the last measure in the moving averages of the durations.
+SMOOTHING = 0.1
+
+
+class FrameBudget(object):
+    """!
+    @brief Decides how long `GameModel.process_queue()` may work in a frame, so the whole frame takes about the target
+        frame time.
+    @details The durations of the rest of the frame, drawing it and updating the game outside of the queue, are
+        recorded every frame and smoothed with exponential moving averages. The queue gets what is left of the target
+        frame time, between `min_budget` and `max_budget`, so it gets less time when drawing is slow and uses the
+        time a fast machine leaves idle. What the budget was based on is reported by stats().
+    """
+
+    def __init__(self, target: float = TARGET_FRAME_TIME_IN_SECONDS, min_budget: float = MIN_BUDGET_IN_SECONDS,
+                 max_budget: float = MAX_BUDGET_IN_SECONDS) -> None:
+        """!
+        @brief Creates a budget with no measure yet, which gives the queue `max_budget`.
+        @param target : float The time a frame should take, in seconds.
+        @param min_budget : float The least time the queue gets per frame, in seconds.
+        @param max_budget : float The most time the queue gets per frame, in seconds.
+        """
+        self.target = target
+        self.min_budget = min_budget
+        self.max_budget = max_budget
+
+        # Mapping from the name of a part of the frame, like 'draw' or
+        # 'update', to the moving average of its duration in seconds.
+        self.averages = {}
+
+        # The last budget given to the queue, the time the queue took in the
+        # last frame and its moving average, the number of calls it made in
+        # the last frame, and how many frames it went over its budget.
+        self.budget = max_budget
+        self.queue_time = 0.0
+        self.average_queue_time = 0.0
+        self.queue_calls = 0
+        self.overruns = 0
+        self.frames = 0
+
+    def record(self, name: str, seconds: float) -> None:
+        """!
+        @brief Adds the duration of a part of the frame that is not the queue to its moving average.
+        @param name : str The name of the part of the frame, like 'draw' or 'update'.
+        @param seconds : float How long it took.
+        """
+        average = self.averages.get(name)
+        self.averages[name] = seconds if average is None else average + SMOOTHING * (seconds - average)
+
+    def next_budget(self) -> float:
+        """!
+        @brief Returns how long the queue may work in this frame: the target frame time minus the average time taken
+            by the rest of the frame, between `min_budget` and `max_budget`.
+        @return The budget in seconds.
+        """
+        self.budget = min(max(self.target - sum(self.averages.values()), self.min_budget), self.max_budget)
+        return self.budget
+
+    def record_queue(self, seconds: float, calls: int) -> None:
+        """!
+        @brief Records how the queue used the budget of this frame.
+        @param seconds : float How long the queue worked.
+        @param calls : int How many calls of the queue were made.
+        """
+        self.queue_time = seconds
+        self.average_queue_time += SMOOTHING * (seconds - self.average_queue_time)
+        self.queue_calls = calls
+        self.overruns += seconds > self.budget
+        self.frames += 1
+
+    def stats(self) -> dict:
+        """!
+        @brief Returns what the last budget was based on and how the queue used it, the durations in seconds.
+        @return A dict with the target frame time ('target'), the average durations of the parts of the frame ('draw',
+            'update', ...), the last budget ('budget'), the time the queue took in the last frame and on average
+            ('queue_time', 'average_queue_time'), its calls in the last frame ('queue_calls'), and the number of
+            frames in which it went over its budget ('overruns') out of all of them ('frames').
+        """
+        return dict(self.averages, target=self.target, budget=self.budget, queue_time=self.queue_time,
+                    average_queue_time=self.average_queue_time, queue_calls=self.queue_calls,
+                    overruns=self.overruns, frames=self.frames)
@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+
+# Perspective of the 3D view, see `Window.set_3d()`.
+FIELD_OF_VIEW_IN_DEGREES = 65.0
+NEAR_PLANE_DISTANCE = 0.1
+FAR_PLANE_DISTANCE = 60.0
+
+
+def perspective_matrix(field_of_view_in_degrees: float, aspect_ratio: float, near: float, far: float) -> np.ndarray:
+    """!
+    @brief Returns the projection matrix set by `gluPerspective()` with the same arguments.
+    @param field_of_view_in_degrees : float The vertical field of view.
+    @param aspect_ratio : float The width of the view divided by its height.
+    @param near : float The distance of the near clipping plane.
+    @param far : float The distance of the far clipping plane.
+    @return A 4x4 matrix.
+    """
+    f = 1.0 / math.tan(math.radians(field_of_view_in_degrees) / 2)
+    return np.array([
+        [f / aspect_ratio, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0],
+    ])
+
+
+def rotation_matrix(angle_in_degrees: float, axis: tuple) -> np.ndarray:
+    """!
+    @brief Returns the matrix of the rotation applied by `glRotatef()` with the same arguments.
+    @param angle_in_degrees : float The angle of the rotation.
+    @param axis : tuple of len 3 The (x, y, z) axis of the rotation.
+    @return A 4x4 matrix.
+    """
+    x, y, z = np.asarray(axis, dtype=np.float64) / np.linalg.norm(axis)
+    c = math.cos(math.radians(angle_in_degrees))
+    s = math.sin(math.radians(angle_in_degrees))
+    return np.array([
+        [x * x * (1 - c) + c, x * y * (1 - c) - z * s, x * z * (1 - c) + y * s, 0],
+        [y * x * (1 - c) + z * s, y * y * (1 - c) + c, y * z * (1 - c) - x * s, 0],
+        [x * z * (1 - c) - y * s, y * z * (1 - c) + x * s, z * z * (1 - c) + c, 0],
+        [0, 0, 0, 1],
+    ])
+
+
+def view_matrix(position: tuple, rotation_in_degrees: tuple) -> np.ndarray:
+    """!
+    @brief Returns the model-view matrix set by `Window.set_3d()` for the player's position and rotation.
+    @param position : tuple of len 3 The (x, y, z) position of the player.
+    @param rotation_in_degrees : tuple of len 2 The rotation of the player around the y axis and up from the ground.
+    @return A 4x4 matrix.
+    """
+    x, y = rotation_in_degrees
+    translation = np.identity(4)
+    translation[:3, 3] = [-c for c in position]
+    return rotation_matrix(x, (0, 1, 0)) @ \
+        rotation_matrix(-y, (math.cos(math.radians(x)), 0, math.sin(math.radians(x)))) @ translation
+
+
+def frustum_planes(matrix: np.ndarray) -> np.ndarray:
+    """!
+    @brief Returns the 6 planes bounding the view frustum of a projection times model-view matrix.
+    @details Each plane is read from the rows of the matrix, and points inside the frustum are on its positive side.
+    @param matrix : numpy array The 4x4 projection times model-view matrix.
+    @return A 6x4 array of (a, b, c, d) planes, where a point (x, y, z) is inside a plane if ax + by + cz + d >= 0.
+    """
+    return np.array([matrix[3] + matrix[0], matrix[3] - matrix[0],
+                     matrix[3] + matrix[1], matrix[3] - matrix[1],
+                     matrix[3] + matrix[2], matrix[3] - matrix[2]])
+
+
+def boxes_in_frustum(planes: np.ndarray, lows: np.ndarray, highs: np.ndarray) -> np.ndarray:
+    """!
+    @brief Tests axis-aligned boxes against a view frustum, all at once.
+    @details A box is outside the frustum when its corner farthest along the normal of one of the planes is outside
+        that plane. Boxes near the corners of the frustum may be kept even though they are not visible.
+    @param planes : numpy array The 6x4 planes of the frustum, see `frustum_planes()`.
+    @param lows : numpy array The (x, y, z) coordinates of the low corner of every box, of shape (number of boxes, 3).
+    @param highs : numpy array The (x, y, z) coordinates of the high corner of every box.
+    @return A `bool` array telling for every box whether it may be visible.
+    """
+    normals = planes[:, :3]
+    farthest = np.where(normals[None, :, :] >= 0, highs[:, None, :], lows[:, None, :])
+    return ((farthest * normals).sum(axis=2) + planes[:, 3] >= 0).all(axis=1)
@@ -1,17 +1,29 @@
+import math
+import os
 import random
 import sys
 import time
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable
 
-from pyglet.gl import GL_QUADS
+import numpy as np
+
+from pyglet.gl import GL_NEAREST, GL_TRIANGLES, GL_TEXTURE_MAG_FILTER, GL_TEXTURE_MIN_FILTER, glBindTexture, \
+    glTexParameteri
 from pyglet.graphics import TextureGroup, Batch
 from pyglet import image
-from tempus_fugit_minecraft import sound_list
+from pyglet.image import TileableTexture
+from tempus_fugit_minecraft import edit_journal, frustum, mesher, occlusion, sound_list, world_cache, world_storage
 from tempus_fugit_minecraft.block import Block
+from tempus_fugit_minecraft.chunked_world import CHUNK_SHIFT, CHUNK_SIZE_IN_BLOCKS, OPAQUE_BLOCK_IDS, ChunkedWorld, \
+    chunk_of
+from tempus_fugit_minecraft.frame_budget import FrameBudget
 from tempus_fugit_minecraft.player import Player
-from tempus_fugit_minecraft.utilities import FACES, TICKS_PER_SEC, cube_vertices
-from tempus_fugit_minecraft.world import World, normalize, sectorize, Position
+from tempus_fugit_minecraft.sector_index import SectorIndex, offsets_in_range, range_changes
+from tempus_fugit_minecraft.sector_queue import SectorQueue
+from tempus_fugit_minecraft.utilities import FACES
+from tempus_fugit_minecraft.vertex_pool import VertexListPool
+from tempus_fugit_minecraft.world import SECTOR_SIZE_IN_BLOCKS, World, normalize, sectorize
 
 if sys.version_info[0] >= 3:
     xrange = range
@@ -22,40 +34,144 @@ class GameModel(object):
     @brief A 3D world model for block-based rendering.
     @return model an instance of Model class.
     """
-    def __init__(self) -> None:
+    def __init__(self, seed: int = World.DEFAULT_SEED, generation_workers=None, lazy_generation=False,
+                 vertical_sectors=False, use_world_cache=True, world_cache_dir=None, greedy_meshing=False,
+                 mesh_workers=1, view_distance_in_sectors=4, lod_distance_in_sectors=None,
+                 occlusion_culling=True, vertical_view_distance_in_sectors=None) -> None:
         """!
         @brief init function for Model class
+        @param seed : int The seed the world is generated from. The same seed always generates the same world.
+        @param generation_workers : int The number of processes generating the world (default: the number of CPUs).
+        @param lazy_generation : bool Whether to generate the sectors of an unbounded world only when they come in
+            range of the player, instead of generating the whole bounded world at startup.
+        @param vertical_sectors : bool Whether sectors are also subdivided along y, so only the sectors around the
+            player's height are shown instead of full-height columns.
+        @param use_world_cache : bool Whether to load the generated world from the on-disk cache of generated worlds,
+            and to add it to the cache when it is not there yet.
+        @param world_cache_dir : str The directory of the cache (default: `world_cache.default_cache_dir()`).
+        @param greedy_meshing : bool Whether to merge adjacent coplanar faces with the same texture into larger quads,
+            see `mesher.build_greedy_mesh()`.
+        @param mesh_workers : int The number of threads building the meshes of the sectors in the queue, or 0 to build
+            them in the game loop.
+        @param view_distance_in_sectors : int How many sectors away from the player's sector the sectors are shown.
+        @param lod_distance_in_sectors : int How many sectors away from the player's sector the sectors are shown at
+            full detail, farther sectors getting simplified meshes, see `mesher.build_lod_mesh()`. None shows every
+            sector at full detail.
+        @param occlusion_culling : bool Whether to skip drawing the sectors that cannot be seen from the player's
+            sector because opaque blocks close them off, see `occlusion.visible_sectors()`. Only used with
+            `vertical_sectors`, since full-height columns are open to the sky and can always see each other.
+        @param vertical_view_distance_in_sectors : int How many sectors above and below the player's sector the sectors
+            are shown when sectors are subdivided along y. None uses `view_distance_in_sectors`.
         """
         TEXTURE_PATH = 'assets/texture.png'
 
         # A Batch is a collection of vertex lists for batched rendering.
         self.batch = Batch()
 
+        # The vertex lists of the meshes of the sectors come from a pool,
+        # which recycles the ones of the hidden sectors.
+        self._vertex_pool = VertexListPool(self.batch, GL_TRIANGLES, 'v3f/static', 't2f/static')
+
         # A TextureGroup manages an OpenGL texture.
         self.group = TextureGroup(image.load(TEXTURE_PATH).get_texture())
 
         # A mapping from position to the block at that position.
         # This defines all the blocks that are currently in the world.
-        self.world = {}
+        # The blocks are stored as ids in dense per-chunk arrays, see
+        # `ChunkedWorld`.
+        self.world = ChunkedWorld()
 
         # Same mapping as `world` but only contains blocks that are
         # shown.
         self.shown = {}
 
-        # Mapping from position to a pyglet `VertexList` for all shown
-        # blocks.
+        # Mapping from sector to the list of pyglet `VertexList`s holding
+        # the merged mesh of the visible faces of all the shown blocks of
+        # the sector, one per texture group.
         self._shown = {}
 
-        # Mapping from sector to a list of positions inside that sector.
+        # Faces repeat the texture of a single tile of the texture atlas,
+        # see `mesher.build_mesh()`, so every tile gets its own texture
+        # group, created the first time it is needed.
+        self.greedy_meshing = greedy_meshing
+        self._tile_groups = {}
+
+        # Sectors farther than `lod_distance_in_sectors` from the sector the
+        # player was in at the last change_sectors() get simplified meshes.
+        # `_range_radii` are the view distances the sectors around that sector
+        # were shown with, see set_view_distance().
+        self.view_distance_in_sectors = view_distance_in_sectors
+        self.vertical_view_distance_in_sectors = vertical_view_distance_in_sectors
+        self.lod_distance_in_sectors = lod_distance_in_sectors
+        self._center_sector = None
+        self._range_radii = None
+
+        # Mapping from sector to the connectivity of its faces, see
+        # `occlusion.face_connectivity()`, computed by the queue once it is
+        # needed and dropped whenever the mesh of the sector changes. The sectors
+        # that can be seen from `_center_sector` are flooded from it again
+        # when the player changes sector or a mesh changes.
+        self.occlusion_culling = occlusion_culling
+        self._connectivity = {}
+        self._pending_connectivity = set()
+        self._visible_sectors = None
+
+        # Mapping from sector to the (x, y, z) low and high corners of the
+        # box bounding its mesh, used to skip the sectors out of view.
+        self._mesh_bounds = {}
+
+        # Sectors whose mesh rebuild is in the queue.
+        self._pending_meshes = set()
+
+        # Meshes of the sectors in the queue are built by worker threads
+        # from a snapshot of the blocks of the sector. Mapping from sector
+        # to the future of its meshes, uploaded by process_queue() once they
+        # are built.
+        self._mesh_executor = ThreadPoolExecutor(mesh_workers, 'Mesher') if mesh_workers else None
+        self._mesh_futures = {}
+
+        # Mapping from sector to the set of positions of the shown blocks
+        # inside that sector.
+        self.shown_in_sector = {}
+
+        # Mapping from sector to the positions inside that sector, read
+        # from the chunks of `world`.
         self.sector = None
-        self.sectors = {}
+        self.sectors = SectorIndex(self.world, vertical_sectors)
+
+        # Queue of the work on the sectors, the _submit_mesh() and
+        # _update_connectivity() calls, the sectors closest to the player and
+        # in front of them first. `_focus` is the (position, sight vector) of
+        # the player the priorities were last computed from.
+        self.queue = SectorQueue(self._sector_priority)
+        self._focus = None
 
-        # Simple function queue implementation. The queue is populated
-        # with _show_block() and _hide_block() calls
-        self.queue = deque()
+        # How long process_queue() may work per frame, sized from the
+        # durations of drawing and updating the game, see `FrameBudget`.
+        self.frame_budget = FrameBudget()
+
+        self.seed = seed
+        self.generation_workers = generation_workers
+        self.lazy_generation = lazy_generation
+        self.world_cache_dir = (world_cache_dir or world_cache.default_cache_dir()) if use_world_cache else None
+
+        # The sectors whose blocks are in `world`, and the sectors and the
+        # chunks the player changed. With lazy generation, the chunks of the
+        # sectors that go out of range are unloaded unless they were changed,
+        # and generated again from the seed the next time they come in range.
+        self.generated_sectors = set()
+        self.edited_sectors = set()
+        self.edited_chunks = set()
+
+        # The journal of the edits started by start_autosave().
+        self.journal = None
 
         self.player = Player()
-        self.generate()
+        # Whether the player was placed on the ground yet, see
+        # `find_spawn_position()`.
+        self.player_spawned = False
+        if not self.lazy_generation:
+            self.generate()
 
         self.sound_effects = sound_list.sound_effects_list
         self.background_noise = sound_list.background_sound_list
@@ -65,20 +181,211 @@ class GameModel(object):
     def generate(self) -> None:
         """!
         @brief Initialize the world by placing all the blocks.
+        @details The world is generated one sector at a time, in parallel, as numpy volumes of block ids that are
+            copied into `world` in bulk instead of adding the blocks one by one with add_block(). Generated worlds are
+            cached on the disk, so the same world is only generated once, see `world_cache`.
         @see [Issue#84](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/84)
         @see [Issue#86](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/86)
         """
-        def add_blocks(blockList: list[tuple[Block, Position]]):
-            for block, position in blockList:
-                self.add_block(position, block, immediate=False)
-                
-        add_blocks(World.generate_base_layer())
-        for hill in World.generate_hills():
-            add_blocks(hill)        
-        for cloud in World.generate_clouds():
-            add_blocks(cloud)
-        for tree in World.generate_trees(self):
-            add_blocks(tree)
+        if self.world_cache_dir:
+            sectors = world_cache.load_generated_world(self.world, self.seed, self.world_cache_dir)
+            if sectors is not None:
+                self.generated_sectors.update(sectors)
+                return
+        sectors = World.sectors_in_world()
+        for origin, volume in World.generate_sectors(self.seed, sectors, self.generation_workers):
+            self.world.insert_volume(origin, volume)
+        self.generated_sectors.update(sectors)
+        if self.world_cache_dir:
+            try:
+                world_cache.store_generated_world(self.world, self.seed, sectors, self.world_cache_dir)
+            except OSError:
+                # The cache only makes the next startup faster, the game runs without it.
+                pass
+
+    def generate_sector(self, sector: tuple) -> None:
+        """!
+        @brief Generate the blocks of the full-height column of `sector` if they are not in the world yet.
+        @details The sector is generated from the seed alone, so unloading it and generating it again gives the same
+            blocks. The chunks the player changed, which were kept when the sector was unloaded, are left as they are.
+        @param sector : tuple of len 3 The (x, y, z) sector to generate.
+        """
+        sector = (sector[0], 0, sector[2])
+        if sector in self.generated_sectors:
+            return
+        origin, volume = World.generate_sector(self.seed, sector, not self.lazy_generation)
+        where = volume != 0
+        for cy in range(origin[1] >> CHUNK_SHIFT, ((origin[1] + volume.shape[1] - 1) >> CHUNK_SHIFT) + 1):
+            if (sector[0], cy, sector[2]) in self.edited_chunks:
+                bottom = cy * CHUNK_SIZE_IN_BLOCKS - origin[1]
+                where[:, max(bottom, 0):bottom + CHUNK_SIZE_IN_BLOCKS, :] = False
+        self.world.write_volume(origin, volume, where)
+        self.generated_sectors.add(sector)
+        self._update_column_sides(sector)
+
+    def unload_sector(self, sector: tuple) -> None:
+        """!
+        @brief Remove the chunks of a full-height column of sectors the player did not change from the world, to be
+            generated again later.
+        @details The chunks the player changed stay in the world, the others are the same as the ones generated from
+            the seed.
+        @param sector : tuple of len 3 The (x, 0, z) sector to unload.
+        """
+        if sector not in self.generated_sectors:
+            return
+        sx, _, sz = sector
+        chunks = self.world.chunks_in_column((sx, sz))
+        # The sectors of the column, the size of its chunks when sectors are vertical, are out of range but hiding
+        # them may still be waiting in the queue. They are hidden now, so the blocks shown when they come back in range
+        # are the ones generated again.
+        for column_sector in chunks if self.sectors.vertical else [sector]:
+            self.queue.cancel(('visibility', column_sector))
+            self.hide_sector(column_sector)
+        for chunk in chunks:
+            if chunk not in self.edited_chunks:
+                self.world.discard_chunk(chunk)
+        self.generated_sectors.discard(sector)
+        self._update_column_sides(sector)
+
+    def _update_column_sides(self, sector: tuple) -> None:
+        """!
+        @brief Show the exposed blocks and rebuild the meshes of the shown sectors next to the full-height column of
+            `sector` again, after the blocks of the column were generated or unloaded.
+        @details Only the layer of blocks of each side neighbor that touches the column is checked, the only blocks
+            whose exposure and faces depend on the column.
+        @param sector : tuple of len 3 The (x, 0, z) sector whose column changed.
+        """
+        sx, _, sz = sector
+        for dx, dz in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            column = (sx + dx, sz + dz)
+            chunk_ys = [cy for _, cy, _ in self.world.chunks_in_column(column)]
+            if not chunk_ys:
+                continue
+            # The (x, z) corner and size of the layer of the neighbor that touches the column.
+            x = (sx + (dx > 0)) * SECTOR_SIZE_IN_BLOCKS - (dx < 0) if dx else column[0] * SECTOR_SIZE_IN_BLOCKS
+            z = (sz + (dz > 0)) * SECTOR_SIZE_IN_BLOCKS - (dz < 0) if dz else column[1] * SECTOR_SIZE_IN_BLOCKS
+            width, depth = (1, SECTOR_SIZE_IN_BLOCKS) if dx else (SECTOR_SIZE_IN_BLOCKS, 1)
+            if self.sectors.vertical:
+                ranges = [(cy, cy, cy + 1) for cy in chunk_ys]
+            else:
+                ranges = [(0, chunk_ys[0], chunk_ys[-1] + 1)]
+            for sector_y, bottom, top in ranges:
+                # Sectors that are not shown yet are checked when they are.
+                if not self.shown_in_sector.get((column[0], sector_y, column[1])):
+                    continue
+                self._update_shown_region((x, bottom * CHUNK_SIZE_IN_BLOCKS, z),
+                                          (width, (top - bottom) * CHUNK_SIZE_IN_BLOCKS, depth), False)
+
+    def _level(self) -> dict:
+        """!
+        @brief Returns the state of the game saved with the world.
+        @return level : dict
+        """
+        return {
+            'seed': self.seed,
+            'lazy_generation': self.lazy_generation,
+            'generated_sectors': sorted(self.generated_sectors),
+            'edited_sectors': sorted(self.edited_sectors),
+            'edited_chunks': sorted(self.edited_chunks),
+            'player_position': list(self.player.position_in_blocks_from_origin),
+            'player_rotation': list(self.player.rotation_in_degrees),
+            'journal_generation': self.journal.generation if self.journal else 0,
+        }
+
+    def save(self, path: str) -> None:
+        """!
+        @brief Save the world and the state of the game in the directory `path`.
+        @details The blocks are saved as arrays of block ids in region files, see `world_storage`.
+        @param path : str The directory of the saved world, created if it does not exist.
+        """
+        world_storage.save_world(self.world, path, self._level())
+
+    def start_autosave(self, path: str, batch_interval_in_seconds: float = 0.5,
+                       snapshot_interval_in_seconds: float = 60.0) -> None:
+        """!
+        @brief Save the world in the directory `path`, then keep the save up to date with a journal of the edits.
+        @details The world is saved by a first snapshot of all its regions: only copying the chunks is done here, the
+            files are written by the background thread of the journal. Every edit made with add_block() and
+            remove_block() is recorded in the journal, which is written to the disk in the background once per batch
+            window. The regions changed since the last snapshot are written in the background too, every
+            `snapshot_interval_in_seconds`, see `EditJournal`. A world that was saved in `path` before should be
+            loaded first, see load(): until the first snapshot is written, loading replays the new edits on the old
+            save.
+        @param path : str The directory of the saved world, created if it does not exist.
+        @param batch_interval_in_seconds : float The most time an edit can stay in memory before it is on the disk.
+        @param snapshot_interval_in_seconds : float How often the changed regions are saved.
+        """
+        self.stop_autosave()
+        os.makedirs(path, exist_ok=True)
+        generation = max(edit_journal.journal_generations(path), default=-1) + 1
+        self.journal = edit_journal.EditJournal(path, generation, batch_interval_in_seconds,
+                                                snapshot_interval_in_seconds)
+        self.journal.snapshot(self.world, self._level(), everything=True)
+
+    def stop_autosave(self) -> None:
+        """!
+        @brief Write the edits that are still in memory and stop the journal started by start_autosave().
+        """
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+
+    def close(self) -> None:
+        """!
+        @brief Write the edits that are still in memory and stop the threads of the model, when the game ends.
+        @details The meshes still being built are dropped, nothing will draw them.
+        """
+        self.stop_autosave()
+        if self._mesh_executor:
+            self._mesh_executor.shutdown(wait=False, cancel_futures=True)
+            self._mesh_executor = None
+        self._mesh_futures.clear()
+
+    def load(self, path: str) -> None:
+        """!
+        @brief Replace the world and the state of the game with the ones saved in the directory `path`.
+        @details The blocks of the saved world are memory-mapped from its region files instead of being read and
+            parsed, so they are only read from the disk when they are needed.
+        @param path : str The directory of the saved world.
+        """
+        self.stop_autosave()
+        for vertex_lists in self._shown.values():
+            for vertex_list in vertex_lists:
+                self._vertex_pool.free(vertex_list)
+        self._vertex_pool.clear()
+        self._shown.clear()
+        self.shown.clear()
+        self.shown_in_sector.clear()
+        self.queue.clear()
+        self._pending_meshes.clear()
+        self._mesh_futures.clear()
+        self._mesh_bounds.clear()
+        self._connectivity.clear()
+        self._pending_connectivity.clear()
+        self._visible_sectors = None
+        level = world_storage.load_world(self.world, path)
+        if 'edited_chunks' not in level:
+            # Worlds saved before the changed chunks were recorded keep every chunk of their changed sectors.
+            level['edited_chunks'] = [chunk for x, _, z in level['edited_sectors']
+                                      for chunk in self.world.chunks_in_column((x, z))]
+        # Apply the edits recorded in the journal since the last snapshot of the world.
+        for position, block_id in edit_journal.read_edits(path, level.get('journal_generation', 0)):
+            if block_id:
+                self.world[position] = Block.from_id(block_id)
+            elif position in self.world:
+                del self.world[position]
+            level['edited_sectors'].append(sectorize(position))
+            level['edited_chunks'].append(chunk_of(position))
+        self.seed = level['seed']
+        self.lazy_generation = level['lazy_generation']
+        self.generated_sectors = set(tuple(sector) for sector in level['generated_sectors'])
+        self.edited_sectors = set(tuple(sector) for sector in level['edited_sectors'])
+        self.edited_chunks = set(tuple(chunk) for chunk in level['edited_chunks'])
+        self.player.position_in_blocks_from_origin = tuple(level['player_position'])
+        self.player.rotation_in_degrees = tuple(level['player_rotation'])
+        self.player_spawned = True
+        # Show the sectors around the player again on the next update.
+        self.sector = None
 
     def hit_test(self, position: tuple, vector: tuple, max_distance=8) -> tuple:
         """!
@@ -102,17 +409,28 @@ class GameModel(object):
             x, y, z = x + dx / m, y + dy / m, z + dz / m
         return None, None
 
+    def find_spawn_position(self, x: int = 0, z: int = 0) -> tuple:
+        """!
+        @brief Find where the player stands on the ground of the column at (x, z), using the heightmap of the world.
+        @param x : int The x coordinate of the column.
+        @param z : int The z coordinate of the column.
+        @return position : tuple of len 3 The (x, y, z) position of the player standing on the top solid block of the
+            column, or None if the column has no solid block.
+        """
+        ground = self.world.top_block_y(x, z, solid=True)
+        if ground is None:
+            return None
+        return x, ground + self.player.PLAYER_HEIGHT_IN_BLOCKS, z
+
     def exposed(self, position: tuple) -> bool:
         """!
         @brief Returns False is given `position` is surrounded on all 6 sides by blocks, True otherwise.
+        @details A single test of the neighbor mask the world keeps for every position, see
+            `ChunkedWorld.neighbor_mask()`.
         @param position : tuple of len 3 The (x, y, z) position to check
         @returns boolean
         """
-        x, y, z = position
-        for dx, dy, dz in FACES:
-            if (x + dx, y + dy, z + dz) not in self.world:
-                return True
-        return False
+        return self.world.is_exposed(position)
 
     def add_block(self, position: tuple, block: Block, immediate=True) -> None:
         """!
@@ -124,10 +442,13 @@ class GameModel(object):
         if position in self.world:
             self.remove_block(position, immediate)
         self.world[position] = block
-        self.sectors.setdefault(sectorize(position), []).append(position)
+        self.edited_sectors.add(sectorize(position))
+        self.edited_chunks.add(chunk_of(position))
+        if self.journal:
+            self.journal.record_set(position, block.id)
         if immediate:
             if self.exposed(position):
-                self.show_block(position)
+                self._show(position)
             self.check_neighbors(position)
 
     def remove_block(self, position: tuple, immediate=True) -> None:
@@ -137,10 +458,13 @@ class GameModel(object):
         @param immediate : bool Whether to immediately remove block from canvas.
         """
         del self.world[position]
-        self.sectors[sectorize(position)].remove(position)
+        self.edited_sectors.add(sectorize(position))
+        self.edited_chunks.add(chunk_of(position))
+        if self.journal:
+            self.journal.record_remove(position)
         if immediate:
             if position in self.shown:
-                self.hide_block(position)
+                self._hide(position)
                 self.sound_effects.get_sound('rock_hit').play_sound()
             self.check_neighbors(position)
 
@@ -149,19 +473,128 @@ class GameModel(object):
         @brief Check all blocks surrounding `position` and ensure their visual state is current. This means hiding
             blocks that are not exposed and ensuring that all exposed blocks are shown. Usually used after a block is
             added or removed.
+        @details The meshes of the sector of `position` and of the sectors of its shown neighbors are rebuilt, since
+            the faces of the neighbors turned toward `position` appear or disappear with the block there.
         @param position tuple of len 3 The (x, y, z) position to check around.
         """
+        sectors = {self.sectors.sector_of(position)}
         x, y, z = position
-        for dx, dy, dz in FACES:
-            key = (x + dx, y + dy, z + dz)
-            if key not in self.world:
+        neighbors = self.world.neighbor_mask(position)
+        for face, (dx, dy, dz) in enumerate(FACES):
+            if not neighbors >> face & 1:
                 continue
+            key = (x + dx, y + dy, z + dz)
             if self.exposed(key):
-                if key not in self.shown:
-                    self.show_block(key)
+                sectors.add(self._show(key) if key not in self.shown else self.sectors.sector_of(key))
             else:
                 if key in self.shown:
-                    self.hide_block(key)
+                    sectors.add(self._hide(key))
+        for sector in sectors:
+            self._update_mesh(sector)
+
+    def fill(self, region: tuple, block: Block, immediate=True) -> None:
+        """!
+        @brief Put `block` at every position of `region`, replacing the blocks there.
+        @param region : tuple of len 2 Two opposite (x, y, z) corners of the box of positions, both included.
+        @param block : Block The block to put.
+        @param immediate : bool Whether to rebuild the meshes of the changed sectors immediately.
+        """
+        self._edit_region(region, block.id, None, immediate)
+
+    def replace(self, region: tuple, from_block: Block, to_block: Block, immediate=True) -> None:
+        """!
+        @brief Replace every `from_block` of `region` with `to_block`.
+        @param region : tuple of len 2 Two opposite (x, y, z) corners of the box of positions, both included.
+        @param from_block : Block The block to replace.
+        @param to_block : Block The block to put instead.
+        @param immediate : bool Whether to rebuild the meshes of the changed sectors immediately.
+        """
+        self._edit_region(region, to_block.id, from_block.id, immediate)
+
+    def clear(self, region: tuple, immediate=True) -> None:
+        """!
+        @brief Remove every block of `region`.
+        @param region : tuple of len 2 Two opposite (x, y, z) corners of the box of positions, both included.
+        @param immediate : bool Whether to rebuild the meshes of the changed sectors immediately.
+        """
+        self._edit_region(region, 0, None, immediate)
+
+    def _edit_region(self, region: tuple, block_id: int, from_id, immediate: bool) -> None:
+        """!
+        @brief Private implementation of fill(), replace() and clear(), which write the whole box at once instead of
+            adding or removing its blocks one by one.
+        @details The chunks of the box are written with numpy, see `ChunkedWorld.write_volume()`, and the shown blocks
+            are updated from the box and the layer of blocks around it, the only ones whose exposure may change. The
+            mesh of every sector with changed shown blocks is rebuilt once.
+        @param region : tuple of len 2 Two opposite (x, y, z) corners of the box of positions, both included.
+        @param block_id : int The id of the block to put, 0 to remove the blocks.
+        @param from_id : int The id of the only block to change, or None to change every position.
+        @param immediate : bool Whether to rebuild the meshes of the changed sectors immediately.
+        """
+        low = tuple(map(min, *region))
+        shape = tuple(hi - lo + 1 for hi, lo in zip(map(max, *region), low))
+        before = self.world.read_volume(low, shape)
+        if from_id is None:
+            after = np.full(shape, block_id, dtype=np.uint8)
+        else:
+            after = np.where(before == from_id, np.uint8(block_id), before)
+        changed = after != before
+        if not changed.any():
+            return
+        self.world.write_volume(low, after, changed)
+        xs, zs = np.nonzero(changed.any(axis=1))
+        columns = np.unique(np.stack((xs + low[0], zs + low[2]), axis=1) // SECTOR_SIZE_IN_BLOCKS, axis=0)
+        self.edited_sectors.update((x, 0, z) for x, z in columns.tolist())
+        self.edited_chunks.update(map(tuple, np.unique(np.argwhere(changed) + low >> CHUNK_SHIFT, axis=0).tolist()))
+        if self.journal:
+            self.journal.record_volume(low, after, changed)
+        self._update_shown_region(tuple(c - 1 for c in low), tuple(n + 2 for n in shape), immediate)
+
+    def _update_shown_region(self, low: tuple, shape: tuple, immediate: bool) -> None:
+        """!
+        @brief Show the exposed blocks of a box of positions and hide the others, then rebuild the meshes of the
+            sectors whose shown blocks changed.
+        @param low : tuple of len 3 The (x, y, z) position of the lowest corner of the box.
+        @param shape : tuple of len 3 The size of the box along x, y and z.
+        @param immediate : bool Whether to rebuild the meshes immediately.
+        """
+        ids = self.world.read_volume(tuple(c - 1 for c in low), tuple(n + 2 for n in shape))
+        occupied = ids != 0
+        covered = occupied[1:-1, 1:-1, 1:-1].copy()
+        for dx, dy, dz in FACES:
+            covered &= occupied[1 + dx:1 + dx + shape[0], 1 + dy:1 + dy + shape[1], 1 + dz:1 + dz + shape[2]]
+        block_ids = ids[1:-1, 1:-1, 1:-1]
+        exposed = np.argwhere(occupied[1:-1, 1:-1, 1:-1] & ~covered)
+        exposed_ids = block_ids[tuple(exposed.T)].tolist()
+        exposed += low
+        sector_coordinates = exposed // SECTOR_SIZE_IN_BLOCKS
+        if not self.sectors.vertical:
+            sector_coordinates[:, 1] = 0
+        exposed_in_sector = {}
+        for position, sector, block_id in zip(map(tuple, exposed.tolist()), map(tuple, sector_coordinates.tolist()),
+                                              exposed_ids):
+            exposed_in_sector.setdefault(sector, {})[position] = Block.from_id(block_id)
+        high = tuple(c + n - 1 for c, n in zip(low, shape))
+        lowest_sector = self.sectors.sector_of(low)
+        highest_sector = self.sectors.sector_of(high)
+        sectors = set(exposed_in_sector)
+        sectors.update((x, y, z) for x in range(lowest_sector[0], highest_sector[0] + 1)
+                       for y in range(lowest_sector[1], highest_sector[1] + 1)
+                       for z in range(lowest_sector[2], highest_sector[2] + 1) if self.shown_in_sector.get((x, y, z)))
+        for sector in sectors:
+            shown = self.shown_in_sector.setdefault(sector, set())
+            # The faces of the shown blocks next to the changed ones may have appeared or disappeared too.
+            shown_in_box = [position for position in shown
+                            if all(l <= c <= h for l, c, h in zip(low, position, high))]
+            blocks = exposed_in_sector.get(sector, {})
+            for position in shown_in_box:
+                if position not in blocks:
+                    del self.shown[position]
+                    shown.discard(position)
+            self.shown.update(blocks)
+            shown.update(blocks)
+            if shown_in_box or blocks:
+                self._request_mesh(sector, immediate)
 
     def show_block(self, position: tuple, immediate=True) -> None:
         """!
@@ -172,28 +605,7 @@ class GameModel(object):
         """
         if position not in self.world:
             return
-
-        block = self.world[position]
-        self.shown[position] = block
-        if immediate:
-            self._show_block(position, block)
-        else:
-            self._enqueue(self._show_block, position, block)
-
-    def _show_block(self, position: tuple, block: Block) -> None:
-        """!
-        @brief Private implementation of the `show_block()` method.
-        @param position : tuple of len 3 The (x, y, z) position of the block to show.
-        @param block : list of len 3 The coordinates of the texture squares. Use `tex_coords()` to generate.
-        """
-        x, y, z = position
-        vertex_data = cube_vertices(x, y, z, 0.5)
-        texture_data = list(block.texture_coordinates)
-        # create vertex list
-        # FIXME Maybe `add_indexed()` should be used instead
-        self._shown[position] = self.batch.add(24, GL_QUADS, self.group,
-                                               ('v3f/static', vertex_data),
-                                               ('t2f/static', texture_data))
+        self._request_mesh(self._show(position), immediate)
 
     def hide_block(self, position: tuple, immediate=True) -> None:
         """!
@@ -201,96 +613,440 @@ class GameModel(object):
         @param position : tuple of len 3 The (x, y, z) position of the block to hide.
         @param immediate : bool Whether to immediately remove the block from the canvas.
         """
+        self._request_mesh(self._hide(position), immediate)
+
+    def _show(self, position: tuple) -> tuple:
+        """!
+        @brief Marks the block at `position` as shown, without rebuilding the mesh of its sector.
+        @param position : tuple of len 3 The (x, y, z) position of the block.
+        @return The sector of the block.
+        """
+        self.shown[position] = self.world[position]
+        sector = self.sectors.sector_of(position)
+        self.shown_in_sector.setdefault(sector, set()).add(position)
+        return sector
+
+    def _hide(self, position: tuple) -> tuple:
+        """!
+        @brief Marks the block at `position` as hidden, without rebuilding the mesh of its sector.
+        @param position : tuple of len 3 The (x, y, z) position of the block.
+        @return The sector of the block.
+        """
         self.shown.pop(position)
+        sector = self.sectors.sector_of(position)
+        self.shown_in_sector[sector].discard(position)
+        return sector
+
+    def _request_mesh(self, sector: tuple, immediate=True) -> None:
+        """!
+        @brief Rebuild the mesh of `sector` now, or enqueue its rebuild if it is not in the queue yet.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        @param immediate : bool Whether to rebuild the mesh immediately.
+        """
         if immediate:
-            self._hide_block(position)
+            self._update_mesh(sector)
+        elif sector not in self._pending_meshes:
+            self._pending_meshes.add(sector)
+            self._enqueue(sector, self._submit_mesh, sector)
+
+    def _update_mesh(self, sector: tuple) -> None:
+        """!
+        @brief Replace the vertex lists of `sector` with ones holding the visible faces of all the shown blocks of the
+            sector, built right away.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        """
+        self._pending_meshes.discard(sector)
+        build, arguments = self._mesh_task(sector, self.world.chunks)
+        self._upload_meshes(sector, build(*arguments))
+
+    def _submit_mesh(self, sector: tuple) -> None:
+        """!
+        @brief Start building the meshes of `sector` in a worker thread, from a snapshot of the blocks of the sector.
+            They are uploaded by process_queue() once they are built.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        """
+        if not self._mesh_executor or not self.shown_in_sector.get(sector):
+            self._update_mesh(sector)
+            return
+        self._pending_meshes.discard(sector)
+        chunks = mesher.snapshot(self.world, self.sectors.chunks_in_sector(sector))
+        build, arguments = self._mesh_task(sector, chunks)
+        self._mesh_futures[sector] = self._mesh_executor.submit(build, *arguments)
+
+    def _mesh_task(self, sector: tuple, chunks) -> tuple:
+        """!
+        @brief Returns the function building the meshes of `sector` and its arguments, which only refer to `chunks`
+            and to copies of the state of the model.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        @param chunks A mapping from chunk coordinates to chunk arrays holding the blocks of the sector and of its
+            neighbors, `world.chunks` or a snapshot of it.
+        @return A (function, tuple of arguments) pair.
+        """
+        positions = list(self.shown_in_sector.get(sector, ()))
+        if positions and self._is_far(sector, self._center_sector):
+            return mesher.build_lod_mesh, (chunks, self.sectors.chunks_in_sector(sector))
+        # The neighbor masks kept by the world are only read on this thread.
+        masks = self.world.neighbor_mask_array if chunks is self.world.chunks else None
+        return mesher.build_sector_meshes, (chunks, positions, self.greedy_meshing, masks)
+
+    def _is_far(self, sector: tuple, center: tuple) -> bool:
+        """!
+        @brief Returns whether `sector` is shown with a simplified mesh when the player is in sector `center`.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        @param center : tuple of len 3 The (x, y, z) coordinates of the player's sector, or None.
+        @return boolean
+        """
+        if self.lod_distance_in_sectors is None or center is None:
+            return False
+        return sum((a - b) ** 2 for a, b in zip(sector, center)) > self.lod_distance_in_sectors ** 2
+
+    def _upload_built_meshes(self, wait=False) -> None:
+        """!
+        @brief Upload the meshes built by the worker threads.
+        @param wait : bool Whether to wait for all the meshes being built, instead of only uploading the finished ones.
+        """
+        for sector, future in list(self._mesh_futures.items()):
+            if wait or future.done():
+                meshes = future.result()
+                # The sector may have been rebuilt in the meantime.
+                if self._mesh_futures.get(sector) is future:
+                    self._upload_meshes(sector, meshes)
+
+    def _upload_meshes(self, sector: tuple, meshes: dict) -> None:
+        """!
+        @brief Replace the vertex lists of `sector` with new ones holding the given meshes.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        @param meshes : dict The meshes, see `mesher.build_sector_meshes()`.
+        """
+        self._mesh_futures.pop(sector, None)
+        self._mesh_bounds.pop(sector, None)
+        self._connectivity.pop(sector, None)
+        self._visible_sectors = None
+        for vertex_list in self._shown.pop(sector, ()):
+            self._vertex_pool.free(vertex_list)
+        vertex_lists = []
+        for tile, (vertices, tex_coords, indices) in meshes.items():
+            vertex_list = self._vertex_pool.allocate(self._tile_group(tile), len(vertices) // 3, len(indices))
+            mesher.copy_mesh(vertex_list, vertices, tex_coords, indices)
+            vertex_lists.append(vertex_list)
+        if vertex_lists:
+            self._shown[sector] = vertex_lists
+            corners = np.concatenate([vertices for vertices, _, _ in meshes.values()]).reshape(-1, 3)
+            self._mesh_bounds[sector] = (corners.min(axis=0), corners.max(axis=0))
+
+    def vertex_lists_in_frustum(self, planes: np.ndarray) -> list:
+        """!
+        @brief Returns the vertex lists of the sectors whose mesh may be inside a view frustum, leaving out the sectors
+            closed off from the player's sector when occlusion culling is on and sectors are subdivided along y, see
+            visible_sectors().
+        @param planes : numpy array The 6x4 planes of the frustum, see `frustum.frustum_planes()`.
+        @return A list of pyglet `VertexList`s.
+        """
+        sectors = list(self._shown)
+        if self.occlusion_culling and self.sectors.vertical and self._center_sector is not None:
+            visible_sectors = self.visible_sectors()
+            sectors = [sector for sector in sectors if sector in visible_sectors]
+        if not sectors:
+            return []
+        lows = np.array([self._mesh_bounds[sector][0] for sector in sectors])
+        highs = np.array([self._mesh_bounds[sector][1] for sector in sectors])
+        visible = frustum.boxes_in_frustum(planes, lows, highs)
+        return [vertex_list for sector, is_visible in zip(sectors, visible.tolist()) if is_visible
+                for vertex_list in self._shown[sector]]
+
+    def draw(self, planes: np.ndarray) -> None:
+        """!
+        @brief Draws the meshes of the sectors that may be inside a view frustum, see vertex_lists_in_frustum().
+        @param planes : numpy array The 6x4 planes of the frustum, see `frustum.frustum_planes()`.
+        """
+        self._vertex_pool.draw(self.vertex_lists_in_frustum(planes))
+
+    def visible_sectors(self) -> set:
+        """!
+        @brief Returns the sectors in range that may be seen from the sector of the player, the others being closed off
+            by opaque blocks.
+        @details Sectors that are full-height columns are open to the sky above them, so every column in range can see
+            the others and there is nothing to flood.
+        @return A set of sectors.
+        """
+        if self._visible_sectors is None:
+            cx, cy, cz = self._center_sector
+            offsets = offsets_in_range(*self._range_radii)
+            if not self.sectors.vertical:
+                self._visible_sectors = {(cx + dx, cy + dy, cz + dz) for dx, dy, dz in offsets}
+                return self._visible_sectors
+
+            def in_range(sector: tuple) -> bool:
+                return (sector[0] - cx, sector[1] - cy, sector[2] - cz) in offsets
+
+            self._visible_sectors = occlusion.visible_sectors(self._center_sector, self._sector_connectivity, in_range)
+        return self._visible_sectors
+
+    def _sector_connectivity(self, sector: tuple) -> tuple:
+        """!
+        @brief Returns which faces of `sector` can see each other through the blocks of the sector that are not
+            opaque, see `occlusion.face_connectivity()`.
+        @details Until it is computed by the queue, every face of the sector is taken to see every other face.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        @return A tuple of 6 ints, one bitmask of faces per face.
+        """
+        connectivity = self._connectivity.get(sector)
+        if connectivity is not None:
+            return connectivity
+        if sector in self.sectors and sector not in self._pending_connectivity:
+            self._pending_connectivity.add(sector)
+            self._enqueue(sector, self._update_connectivity, sector)
+        return occlusion.OPEN_CONNECTIVITY
+
+    def _update_connectivity(self, sector: tuple) -> None:
+        """!
+        @brief Computes the connectivity of the faces of `sector`, a single chunk, from its blocks.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        """
+        self._pending_connectivity.discard(sector)
+        chunks = self.sectors.chunks_in_sector(sector)
+        if not chunks:
+            connectivity = occlusion.OPEN_CONNECTIVITY
         else:
-            self._enqueue(self._hide_block, position)
+            connectivity = occlusion.face_connectivity(~OPAQUE_BLOCK_IDS[self.world.chunks[chunks[0]]])
+        self._connectivity[sector] = connectivity
+        self._visible_sectors = None
 
-    def _hide_block(self, position: tuple) -> None:
+    def _tile_group(self, tile: int) -> TextureGroup:
         """!
-        @brief Private implementation of the `hide_block()` method.
-        @param position : tuple of len 3 The (x, y, z) position of the block to hide.
+        @brief Returns the texture group of a single tile of the texture atlas, whose texture wraps around so merged
+            quads can repeat it.
+        @param tile : int The number of the tile, see `mesher.ATLAS_SIZE_IN_TILES`.
+        @return The texture group.
         """
-        self._shown.pop(position).delete()
+        group = self._tile_groups.get(tile)
+        if group is None:
+            atlas = self.group.texture
+            width = atlas.width // mesher.ATLAS_SIZE_IN_TILES
+            height = atlas.height // mesher.ATLAS_SIZE_IN_TILES
+            region = atlas.get_region(tile % mesher.ATLAS_SIZE_IN_TILES * width,
+                                      tile // mesher.ATLAS_SIZE_IN_TILES * height, width, height)
+            texture = TileableTexture.create_for_image(region.get_image_data())
+            glBindTexture(texture.target, texture.id)
+            glTexParameteri(texture.target, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(texture.target, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            group = self._tile_groups[tile] = TextureGroup(texture)
+        return group
 
     def show_sector(self, sector: tuple) -> None:
         """!
         @brief Ensure all blocks in the given sector that should be shown are drawn to the canvas.
+        @details The blocks are marked as shown together and the mesh of the sector is rebuilt once, in the background.
         @param sector : tuple of len 3 The (x, y, z) coordinates of the sector to show.
         """
-        for position in self.sectors.get(sector, []):
-            if position not in self.shown and self.exposed(position):
-                self.show_block(position, False)
+        positions = [position for position in self.sectors.exposed_positions(sector) if position not in self.shown]
+        if not positions:
+            return
+        get = self.world.get
+        self.shown.update((position, get(position)) for position in positions)
+        self.shown_in_sector.setdefault(sector, set()).update(positions)
+        self._request_mesh(sector, False)
 
     def hide_sector(self, sector: tuple) -> None:
         """!
         @brief Ensure all blocks in the given sector that should be hidden are removed from the canvas.
         @param sector : tuple of len 3 The (x, y, z) coordinates of the sector to hide.
         """
-        for position in self.sectors.get(sector, []):
-            if position in self.shown:
-                self.hide_block(position, False)
+        positions = self.shown_in_sector.get(sector)
+        if not positions:
+            return
+        for position in positions:
+            del self.shown[position]
+        positions.clear()
+        self._request_mesh(sector, False)
 
     def change_sectors(self, before: tuple, after: tuple) -> None:
         """!
         @brief Move from sector `before` to sector `after`. A sector is a contiguous x, y sub-region of world.
             Sectors are used to speed up world rendering.
+        @details The sectors to show and to hide are looked up by the offset from `before` to `after`, see
+            `sector_index.range_changes()`, unless the view distances changed since the last call.
         @param before : tuple of len 3 The (x, y, z) sector we are moving from.
         @param after : tuple of len 3 The (x, y, z) sector we are moving to.
         """
-        before_set = set()
-        after_set = set()
-        pad = 4
-        for dx in xrange(-pad, pad + 1):
-            for dy in [0]:  # xrange(-pad, pad + 1):
-                for dz in xrange(-pad, pad + 1):
-                    if dx ** 2 + dy ** 2 + dz ** 2 > (pad + 1) ** 2:
-                        continue
-                    if before:
-                        x, y, z = before
-                        before_set.add((x + dx, y + dy, z + dz))
-                    if after:
-                        x, y, z = after
-                        after_set.add((x + dx, y + dy, z + dz))
-        show = after_set - before_set
-        hide = before_set - after_set
+        self._refocus_queue()
+        before_radii = self._range_radii
+        after_radii = self._range_radii = self._view_radii()
+        if before and after and before_radii == after_radii:
+            x, y, z = after
+            show_offsets, hide_offsets = range_changes((x - before[0], y - before[1], z - before[2]), *after_radii)
+            show = [(x + dx, y + dy, z + dz) for dx, dy, dz in show_offsets]
+            hide = [(x + dx, y + dy, z + dz) for dx, dy, dz in hide_offsets]
+        else:
+            before_set = self._sectors_in_range(before, before_radii)
+            after_set = self._sectors_in_range(after, after_radii)
+            show = after_set - before_set
+            hide = before_set - after_set
+        self._center_sector = after
+        self._visible_sectors = None
+        if self.lod_distance_in_sectors is not None and before and after:
+            for sector in self._sectors_in_range(after, after_radii) - set(show):
+                if self._is_far(sector, before) != self._is_far(sector, after):
+                    self._request_mesh(sector, False)
+        if self.lazy_generation:
+            for sector in show:
+                self.generate_sector(sector)
         for sector in show:
-            self.show_sector(sector)
+            self._queue_visibility(sector, True)
         for sector in hide:
-            self.hide_sector(sector)
+            self._queue_visibility(sector, False)
+        if self.lazy_generation:
+            columns_in_range = offsets_in_range(after_radii[0]) if after else frozenset()
+            for x, _, z in hide:
+                if (x - after[0], 0, z - after[2]) not in columns_in_range:
+                    self.unload_sector((x, 0, z))
+
+    def set_view_distance(self, distance: int, vertical_distance=None) -> None:
+        """!
+        @brief Change how far from the player's sector the sectors are shown, showing and hiding the sectors that come
+            in range or go out of range.
+        @param distance : int How many sectors away from the player's sector the sectors are shown.
+        @param vertical_distance : int How many sectors above and below the player's sector the sectors are shown when
+            sectors are subdivided along y, or None to use `distance`.
+        """
+        self.view_distance_in_sectors = distance
+        self.vertical_view_distance_in_sectors = vertical_distance
+        if self._center_sector is not None:
+            self.change_sectors(self._center_sector, self._center_sector)
 
-    def _enqueue(self, func: Callable, *args) -> None:
+    def _view_radii(self) -> tuple[int, int]:
+        """!
+        @brief Returns the view distances along x and z and along y, see `sector_index.offsets_in_range()`.
+        @return A (radius, vertical radius) pair, the vertical radius being 0 for sectors that are full-height columns.
+        """
+        if not self.sectors.vertical:
+            return self.view_distance_in_sectors, 0
+        vertical = self.vertical_view_distance_in_sectors
+        return self.view_distance_in_sectors, self.view_distance_in_sectors if vertical is None else vertical
+
+    def _sectors_in_range(self, center: tuple, radii=None) -> set:
+        """!
+        @brief Returns the sectors that are shown when the player is in sector `center`.
+        @param center : tuple of len 3 The (x, y, z) coordinates of the player's sector, or None.
+        @param radii : tuple of len 2 The view distances, see _view_radii(), or None for the current ones.
+        @return A set of sectors, empty if `center` is None.
+        """
+        if not center:
+            return set()
+        x, y, z = center
+        return {(x + dx, y + dy, z + dz) for dx, dy, dz in offsets_in_range(*(radii or self._view_radii()))}
+
+    def _queue_visibility(self, sector: tuple, visible: bool) -> None:
+        """!
+        @brief Enqueue showing or hiding `sector`, unless it cancels the opposite call for the sector in the queue.
+        @details A show and a hide of the same sector that are both waiting in the queue leave the sector as it is, so
+            going back and forth across the border of a sector before the queue is processed costs nothing.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        @param visible : bool Whether to show the sector rather than hide it.
+        """
+        key = ('visibility', sector)
+        func = self.show_sector if visible else self.hide_sector
+        queued = self.queue.get(key)
+        if queued is not None and queued[0] != func:
+            self.queue.cancel(key)
+        else:
+            self.queue.push(sector, func, sector, key=key)
+
+    def queue_length(self) -> int:
+        """!
+        @brief Returns how many calls are waiting in the queue, replaced and cancelled calls left out.
+        @return int
+        """
+        return len(self.queue)
+
+    def _enqueue(self, sector: tuple, func: Callable, *args) -> None:
         """!
         @brief Add `func` to the internal queue.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector the call is about, which decides when
+            it is made, see _sector_priority().
         @param func : Callable The function to add to the queue.
         @param args The arguments to pass to the function.
         """
-        self.queue.append((func, args))
+        self.queue.push(sector, func, *args)
 
     def _dequeue(self) -> None:
         """!
-        @brief Pop the top function from the internal queue and call it.
+        @brief Pop the most urgent function from the internal queue and call it.
         """
-        func, args = self.queue.popleft()
+        func, args = self.queue.pop()
         func(*args)
 
+    def _sector_priority(self, sector: tuple) -> float:
+        """!
+        @brief Returns how urgent the work on `sector` is, the lowest first: the distance in sectors from the player to
+            the center of the sector, minus up to one sector for the sectors in front of the player and plus up to
+            one for the ones behind them.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        @return The priority.
+        """
+        if self._focus is None:
+            return 0.0
+        (px, py, pz), (sx, sy, sz) = self._focus
+        dx = (sector[0] + 0.5) * SECTOR_SIZE_IN_BLOCKS - px
+        dy = (sector[1] + 0.5) * SECTOR_SIZE_IN_BLOCKS - py if self.sectors.vertical else 0.0
+        dz = (sector[2] + 0.5) * SECTOR_SIZE_IN_BLOCKS - pz
+        distance = math.sqrt(dx * dx + dy * dy + dz * dz)
+        if not distance:
+            return 0.0
+        return distance / SECTOR_SIZE_IN_BLOCKS - (dx * sx + dy * sy + dz * sz) / distance
+
+    def _refocus_queue(self) -> None:
+        """!
+        @brief Computes the priorities of the queue again from the position and the sight vector of the player, when
+            the player moved by half a sector or turned by more than 45 degrees since they were last computed.
+        """
+        position = self.player.position_in_blocks_from_origin
+        sight = self.player.get_sight_vector()
+        if self._focus is not None:
+            focus_position, focus_sight = self._focus
+            moved = math.dist(position, focus_position) >= SECTOR_SIZE_IN_BLOCKS / 2
+            turned = sum(a * b for a, b in zip(sight, focus_sight)) < math.cos(math.radians(45))
+            if not moved and not turned:
+                return
+        self._focus = (tuple(position), sight)
+        self.queue.reprioritize()
+
     def process_queue(self) -> None:
         """!
         @brief Process the entire queue while taking periodic breaks. This allows the game loop to run smoothly. The
-            queue contains calls to _show_block() and _hide_block() so this method should be called if add_block() or
-            remove_block() was called with immediate=False.
+            queue contains the mesh rebuilds of the sectors, so this method should be called if add_block() or
+            remove_block() was called with immediate=False. The work on the sectors the player sees first comes out
+            first, see _sector_priority(). The meshes built by the worker threads since the last call are uploaded
+            first, and the vertex lists of hidden sectors are given back to pyglet a few at a time when there is
+            nothing to do. The time the queue may work in a frame is what drawing and updating the game leave of the
+            target frame time, see `FrameBudget`.
          """
         start = time.perf_counter()
-        while self.queue and time.perf_counter() - start < 1.0 / TICKS_PER_SEC:
+        budget = self.frame_budget.next_budget()
+        self._upload_built_meshes()
+        self._refocus_queue()
+        if not self.queue and not self._mesh_futures:
+            self._vertex_pool.release_idle()
+        calls = 0
+        while self.queue and time.perf_counter() - start < budget:
             self._dequeue()
+            calls += 1
+        self.frame_budget.record_queue(time.perf_counter() - start, calls)
+
+    def frame_stats(self) -> dict:
+        """!
+        @brief Returns how the time process_queue() may work per frame was decided, see `FrameBudget.stats()`.
+        @return A dict of durations in seconds and counters.
+        """
+        return self.frame_budget.stats()
 
     def process_entire_queue(self) -> None:
         """!
-        @brief Process the entire queue with no breaks.
+        @brief Process the entire queue with no breaks, and upload all the meshes once they are built.
         """
         while self.queue:
             self._dequeue()
+        self._upload_built_meshes(wait=True)
 
     def can_pass_through_block(self, player_current_coords: tuple) -> bool:
         """!
@@ -330,20 +1086,36 @@ class GameModel(object):
         @param delta_time_in_seconds : float The change in time (seconds) since the last call.
         @see [Issue#68](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/68)
         """
+        start = time.perf_counter()
         self.process_queue()
-        sector = sectorize(self.player.position_in_blocks_from_origin)
+        # The time of the queue is not part of the rest of the frame the
+        # budget of the queue is sized from.
+        queue_time = self.frame_budget.queue_time
+        if self.journal and self.journal.snapshot_due():
+            self.journal.snapshot(self.world, self._level())
+        sector = self.sectors.sector_of(self.player.position_in_blocks_from_origin)
         if sector != self.sector:
             self.change_sectors(self.sector, sector)
             if self.sector is None:
+                loading_start = time.perf_counter()
                 self.process_entire_queue()
+                queue_time += time.perf_counter() - loading_start
+            if not self.player_spawned:
+                x, _, z = normalize(self.player.position_in_blocks_from_origin)
+                spawn_position = self.find_spawn_position(x, z)
+                if spawn_position:
+                    self.player.position_in_blocks_from_origin = spawn_position
+                self.player_spawned = True
             self.sector = sector
 
-        self.player.check_player_within_world_boundaries()
+        if not self.lazy_generation:
+            self.player.check_player_within_world_boundaries()
 
         moves = 8
         delta_time_in_seconds = min(delta_time_in_seconds, 0.2)
         for _ in xrange(moves):
             self.player.update(delta_time_in_seconds / moves, self.collide)
+        self.frame_budget.record('update', time.perf_counter() - start - queue_time)
 
     def collide(self, position: tuple, height: int) -> tuple:
         """!
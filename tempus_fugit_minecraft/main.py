@@ -2,6 +2,7 @@ from __future__ import division
 
 from pyglet import app
 from pyglet.gl import *
+from tempus_fugit_minecraft import world_storage
 from tempus_fugit_minecraft.window import Window, WINDOW_WIDTH, WINDOW_HEIGHT
 
 
@@ -51,7 +52,8 @@ def main() -> None:
         width=WINDOW_WIDTH,
         height=WINDOW_HEIGHT,
         caption='Tempus Fugit Minecraft',
-        resizable=True
+        resizable=True,
+        save_dir=world_storage.default_save_dir()
     )
     window.set_exclusive_mouse(True)  # Hide the mouse cursor and prevent the mouse from leaving the window.
     setup()
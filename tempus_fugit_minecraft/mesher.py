@@ -0,0 +1,348 @@
+import ctypes
+from typing import Iterator
+
+import numpy as np
+
+from tempus_fugit_minecraft.block import Block
+from tempus_fugit_minecraft.chunked_world import CHUNK_MASK, CHUNK_SHIFT, CHUNK_SIZE_IN_BLOCKS, OPAQUE_BLOCK_IDS, \
+    ChunkedWorld, neighbor_masks, padded_chunk
+from tempus_fugit_minecraft.utilities import FACES, UNIT_CUBE_VERTICES
+
+# Offsets of the 4 corners of every face of a block from the center of the block, in the order of `FACES`. The faces
+# and their corners are in the same order as in `cube_vertices()`, which is the order of `Block.texture_coordinates`.
+FACE_CORNERS = UNIT_CUBE_VERTICES.reshape(len(FACES), 4, 3) * np.float32(0.5)
+
+# Texture coordinates of the 4 corners of every face of every block, indexed by [block id, face].
+FACE_TEX_COORDS = np.zeros((len(Block.__BLOCK_NAMES__), len(FACES), 8), dtype=np.float32)
+for _block_id in range(1, len(Block.__BLOCK_NAMES__)):
+    FACE_TEX_COORDS[_block_id] = np.reshape(Block.from_id(_block_id).texture_coordinates, (len(FACES), 8))
+
+# Whether every kind of block is opaque, so the neighbor masks of a `ChunkedWorld`, which count every block, also tell
+# which faces are hidden, see `_visible_faces()`.
+ALL_BLOCKS_OPAQUE = bool(OPAQUE_BLOCK_IDS[1:].all())
+
+# The texture atlas is a square of ATLAS_SIZE_IN_TILES x ATLAS_SIZE_IN_TILES tiles, see `tex_coord()`. A tile is
+# numbered x + y * ATLAS_SIZE_IN_TILES from its (x, y) coordinates in the atlas.
+ATLAS_SIZE_IN_TILES = 4
+
+# Tile of every face of every block, indexed by [block id, face].
+FACE_TILES = np.rint(FACE_TEX_COORDS[:, :, 0] * ATLAS_SIZE_IN_TILES).astype(np.int64) + \
+    np.rint(FACE_TEX_COORDS[:, :, 1] * ATLAS_SIZE_IN_TILES).astype(np.int64) * ATLAS_SIZE_IN_TILES
+
+# Axes along which the u and the v texture coordinates of every face grow, in the order of `FACES`, and whether they
+# grow with the coordinate along that axis (1) or against it (-1).
+FACE_TEXTURE_AXES = tuple((int(np.flatnonzero(corners[1] - corners[0])[0]),
+                           int(np.flatnonzero(corners[2] - corners[1])[0])) for corners in FACE_CORNERS)
+FACE_TEXTURE_SIGNS = tuple((int(np.sign((corners[1] - corners[0]).sum())),
+                            int(np.sign((corners[2] - corners[1]).sum()))) for corners in FACE_CORNERS)
+
+# The 2 triangles of a quad, as indices of its 4 corners.
+QUAD_TRIANGLES = np.array([0, 1, 2, 0, 2, 3], dtype=np.int64)
+
+
+def cube_tex_coords_array(block_ids) -> np.ndarray:
+    """!
+    @brief Returns the texture coordinates of the whole cubes of many blocks at once, the batched version of
+        `Block.texture_coordinates`.
+    @param block_ids An array of N block ids.
+    @return A `float32` array of shape (N, 48), matching the vertices of `utilities.cube_vertices_array()`.
+    """
+    block_ids = np.asarray(block_ids).reshape(-1)
+    return FACE_TEX_COORDS[block_ids].reshape(len(block_ids), -1)
+
+
+def _visible_faces(chunks, positions, masks=None) -> Iterator[tuple[np.ndarray, np.ndarray, int, np.ndarray]]:
+    """!
+    @brief Finds the visible faces of the given blocks, one chunk and one side at a time.
+    @details A face is left out when the neighbor of the block on that side is opaque, since it can never be seen.
+        The blocks are grouped by chunk and the faces of a whole chunk are found at once from the neighbor masks of
+        its opaque blocks, see `neighbor_masks()`.
+    @param chunks A mapping from chunk coordinates to the chunk arrays holding the blocks, like
+        `ChunkedWorld.chunks`.
+    @param positions An iterable of the (x, y, z) positions of the blocks.
+    @param masks A function returning the neighbor masks of a chunk of `chunks`, like
+        `ChunkedWorld.neighbor_mask_array`, or None to compute them. Since they count every block, they are only used
+        when every kind of block is opaque.
+    @return An iterator of (position of the chunk's [0, 0, 0] block, chunk array, face index in `FACES`, 16x16x16
+        `bool` array of the blocks of the chunk whose face on that side is visible) tuples.
+    """
+    if not ALL_BLOCKS_OPAQUE:
+        masks = None
+    positions = np.array(list(positions), dtype=np.int64).reshape(-1, 3)
+    keys, chunk_indices = np.unique(positions >> CHUNK_SHIFT, axis=0, return_inverse=True)
+    chunk_indices = chunk_indices.reshape(-1)
+    for i, chunk in enumerate(map(tuple, keys.tolist())):
+        ids = chunks.get(chunk)
+        if ids is None:
+            continue
+        visible = np.zeros(ids.shape, dtype=bool)
+        visible[tuple((positions[chunk_indices == i] & CHUNK_MASK).T)] = True
+        visible &= ids != 0
+        covered = masks(chunk) if masks else neighbor_masks(padded_chunk(chunks, chunk, OPAQUE_BLOCK_IDS))
+        origin = np.array(chunk, dtype=np.int64) * CHUNK_SIZE_IN_BLOCKS
+        for face in range(len(FACES)):
+            yield origin, ids, face, visible & (covered & np.uint8(1 << face) == 0)
+
+
+def _world_tex_coords(face: int, corners: np.ndarray) -> np.ndarray:
+    """!
+    @brief Returns the texture coordinates of the corners of quads, in tiles, from their position in the world.
+    @details The texture of a tile repeats once per block, so the texture coordinates of a corner only depend on its
+        position and on the side the quad faces: the corners shared by adjacent quads facing the same side get the
+        same texture coordinates, and can be shared vertices. Corners are on block boundaries, so the coordinates are
+        whole numbers. They grow in the same directions as the texture coordinates of `Block.texture_coordinates`.
+    @param face : int The index in `FACES` of the side the quads face.
+    @param corners : numpy array of the (x, y, z) positions of the corners, of shape (number of quads, 4, 3).
+    @return A `float32` array of shape (number of quads, 4, 2).
+    """
+    (u_axis, v_axis), (u_sign, v_sign) = FACE_TEXTURE_AXES[face], FACE_TEXTURE_SIGNS[face]
+    return np.stack((u_sign * (corners[:, :, u_axis] + 0.5), v_sign * (corners[:, :, v_axis] + 0.5)),
+                    axis=2).astype(np.float32)
+
+
+def _add_quads(quads: dict, face: int, tiles: np.ndarray, corners: np.ndarray) -> None:
+    """!
+    @brief Adds quads facing the same side to the quads of their tiles.
+    @param quads : dict A mapping from tile number to a list of (corners, texture coordinates) pairs.
+    @param face : int The index in `FACES` of the side the quads face.
+    @param tiles : numpy array of the tile number of every quad.
+    @param corners : numpy array of the (x, y, z) positions of the corners, of shape (number of quads, 4, 3).
+    """
+    tex_coords = _world_tex_coords(face, corners)
+    for tile in np.unique(tiles).tolist():
+        selected = tiles == tile
+        quads.setdefault(tile, []).append((corners[selected], tex_coords[selected]))
+
+
+def _row_keys(rows: np.ndarray) -> np.ndarray:
+    """!
+    @brief Packs rows of whole numbers into a single `int64` per row, so equal rows can be found with a 1D sort.
+    @param rows : numpy array of shape (number of rows, number of columns) holding whole numbers.
+    @return An array with one key per row, or the rows themselves as `int64` if the keys would not fit in 64 bits.
+    """
+    rows = rows.astype(np.int64)
+    if not len(rows):
+        return rows
+    rows -= rows.min(axis=0)
+    ranges = rows.max(axis=0) + 1
+    if np.log2(ranges.astype(np.float64)).sum() >= 63:
+        return rows
+    keys = np.zeros(len(rows), dtype=np.int64)
+    for column, size in zip(rows.T, ranges.tolist()):
+        keys = keys * size + column
+    return keys
+
+
+def _index_quads(quads: dict) -> dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """!
+    @brief Turns quads into indexed triangle meshes where corners with the same position and texture coordinates are
+        a single vertex.
+    @param quads : dict A mapping from tile number to a list of (corners, texture coordinates) pairs.
+    @return A mapping from tile number to a tuple of the `float32` array of the (x, y, z) coordinates of the vertices,
+        the `float32` array of the (u, v) texture coordinates of the vertices and the `uint32` array of the indices
+        of the vertices of the triangles, 2 triangles per quad.
+    """
+    meshes = {}
+    for tile, parts in quads.items():
+        corners = np.concatenate([part[0] for part in parts]).reshape(-1, 3)
+        tex_coords = np.concatenate([part[1] for part in parts]).reshape(-1, 2)
+        # Corners are on half blocks and texture coordinates are whole numbers, so the keys are exact.
+        _, first, inverse = np.unique(_row_keys(np.concatenate((np.rint(corners * 2), tex_coords), axis=1)),
+                                      axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        indices = inverse.reshape(-1, 4)[:, QUAD_TRIANGLES].astype(np.uint32)
+        meshes[tile] = (corners[first].astype(np.float32).reshape(-1), tex_coords[first].reshape(-1),
+                        indices.reshape(-1))
+    return meshes
+
+
+def build_mesh(chunks, positions, masks=None) -> dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """!
+    @brief Builds indexed meshes holding the visible faces of the given blocks, see `_visible_faces()`.
+    @details The faces repeat the texture of a single tile of the texture atlas, so there is one mesh per tile, and
+        the corners shared by adjacent faces with the same texture are shared vertices, see `_world_tex_coords()`.
+    @param chunks A mapping from chunk coordinates to the chunk arrays holding the blocks, like
+        `ChunkedWorld.chunks`.
+    @param positions An iterable of the (x, y, z) positions of the blocks.
+    @param masks A function returning the neighbor masks of a chunk, see `_visible_faces()`.
+    @return A mapping from tile number, see `ATLAS_SIZE_IN_TILES`, to a mesh, see `_index_quads()`.
+    """
+    quads = {}
+    for origin, ids, face, mask in _visible_faces(chunks, positions, masks):
+        xs, ys, zs = np.nonzero(mask)
+        if not len(xs):
+            continue
+        centers = (np.stack((xs, ys, zs), axis=1) + origin).astype(np.float32)
+        _add_quads(quads, face, FACE_TILES[ids[xs, ys, zs], face], centers[:, None, :] + FACE_CORNERS[face])
+    return _index_quads(quads)
+
+
+def _merge_faces(tiles: np.ndarray) -> tuple[np.ndarray, ...]:
+    """!
+    @brief Merges the faces of a stack of slices into rectangles of faces with the same tile.
+    @details The faces of every row are first merged into runs along the last axis, then runs with the same start,
+        end and tile on consecutive rows are merged into rectangles. Everything is done with a few numpy operations
+        over the whole stack instead of walking the faces one by one.
+    @param tiles : numpy array of the tile number + 1 of every face indexed by [slice, row, column], 0 for no face.
+    @return A tuple of arrays giving, for every rectangle, its slice, its first row, its row after the last one, its
+        first column, its column after the last one and its tile number + 1.
+    """
+    before = np.zeros_like(tiles)
+    before[..., 1:] = tiles[..., :-1]
+    after = np.zeros_like(tiles)
+    after[..., :-1] = tiles[..., 1:]
+    slices, rows, starts = np.nonzero((tiles != 0) & (tiles != before))
+    ends = np.nonzero((tiles != 0) & (tiles != after))[2] + 1
+    run_tiles = tiles[slices, rows, starts]
+    order = np.lexsort((rows, run_tiles, ends, starts, slices))
+    slices, rows, starts, ends, run_tiles = (array[order] for array in (slices, rows, starts, ends, run_tiles))
+    new = np.ones(len(order), dtype=bool)
+    new[1:] = (slices[1:] != slices[:-1]) | (starts[1:] != starts[:-1]) | (ends[1:] != ends[:-1]) | \
+        (run_tiles[1:] != run_tiles[:-1]) | (rows[1:] != rows[:-1] + 1)
+    first = np.flatnonzero(new)
+    last = np.append(first[1:], len(order)) - 1
+    return slices[first], rows[first], rows[last] + 1, starts[first], ends[first], run_tiles[first]
+
+
+def build_greedy_mesh(chunks, positions, masks=None) -> dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """!
+    @brief Builds indexed meshes of the visible faces of the given blocks, where adjacent coplanar faces with the same
+        texture are merged into larger quads.
+    @details Faces are merged inside each chunk, see `_merge_faces()`. A merged quad repeats the texture of its
+        faces once per block, like the faces of `build_mesh()`.
+    @param chunks A mapping from chunk coordinates to the chunk arrays holding the blocks, like
+        `ChunkedWorld.chunks`.
+    @param positions An iterable of the (x, y, z) positions of the blocks.
+    @param masks A function returning the neighbor masks of a chunk, see `_visible_faces()`.
+    @return A mapping from tile number, see `ATLAS_SIZE_IN_TILES`, to a mesh, see `_index_quads()`.
+    """
+    quads = {}
+    for origin, ids, face, mask in _visible_faces(chunks, positions, masks):
+        if not mask.any():
+            continue
+        u_axis, v_axis = FACE_TEXTURE_AXES[face]
+        normal_axis = 3 - u_axis - v_axis
+        tiles = np.where(mask, FACE_TILES[ids, face] + 1, 0).transpose(normal_axis, v_axis, u_axis)
+        slices, v_starts, v_ends, u_starts, u_ends, quad_tiles = _merge_faces(tiles)
+        lows = np.empty((len(slices), 3), dtype=np.int64)
+        highs = np.empty((len(slices), 3), dtype=np.int64)
+        lows[:, normal_axis] = highs[:, normal_axis] = slices
+        lows[:, v_axis], highs[:, v_axis] = v_starts, v_ends - 1
+        lows[:, u_axis], highs[:, u_axis] = u_starts, u_ends - 1
+        corners = FACE_CORNERS[face]
+        _add_quads(quads, face, quad_tiles - 1,
+                   (np.where(corners < 0, lows[:, None, :], highs[:, None, :]) + origin + corners).astype(np.float32))
+    return _index_quads(quads)
+
+
+def _downsample(ids: np.ndarray) -> np.ndarray:
+    """!
+    @brief Shrinks a chunk array to half its size along each axis, each cell of 2x2x2 blocks becoming a single block.
+    @details A cell holding any block becomes the block that is the most common in it, so thin layers like the ground
+        and the clouds do not disappear.
+    @param ids : numpy array of the block ids of a chunk, of shape (n, n, n) with n even.
+    @return The array of the block ids of the cells, of shape (n / 2, n / 2, n / 2).
+    """
+    n = ids.shape[0] // 2
+    cells = ids.reshape(n, 2, n, 2, n, 2).transpose(0, 2, 4, 1, 3, 5).reshape(n, n, n, 8)
+    counts = (cells[..., :, None] == cells[..., None, :]).sum(axis=-1)
+    counts[cells == 0] = 0
+    return np.take_along_axis(cells, counts.argmax(axis=-1)[..., None], axis=-1)[..., 0]
+
+
+def build_lod_mesh(chunks, sector_chunks) -> dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """!
+    @brief Builds simplified indexed meshes of all the blocks of some chunks, for sectors far from the player.
+    @details The chunks are downsampled to cells of 2x2x2 blocks, see `_downsample()`, and the visible faces of the
+        cells are meshed like the faces of blocks twice as large, so there are about 4 times fewer faces. The
+        textures still repeat once per block.
+    @param chunks A mapping from chunk coordinates to chunk arrays, holding the chunks to mesh and their neighbors,
+        like `ChunkedWorld.chunks`.
+    @param sector_chunks An iterable of the coordinates of the chunks to mesh.
+    @return A mapping from tile number, see `ATLAS_SIZE_IN_TILES`, to a mesh, see `_index_quads()`.
+    """
+    size = CHUNK_SIZE_IN_BLOCKS // 2
+    coarse_chunks = {}
+    quads = {}
+    for cx, cy, cz in sector_chunks:
+        for chunk in [(cx, cy, cz)] + [(cx + dx, cy + dy, cz + dz) for dx, dy, dz in FACES]:
+            if chunk not in coarse_chunks and chunk in chunks:
+                coarse_chunks[chunk] = _downsample(chunks[chunk])
+        ids = coarse_chunks.get((cx, cy, cz))
+        if ids is None:
+            continue
+        opaque = padded_chunk(coarse_chunks, (cx, cy, cz), OPAQUE_BLOCK_IDS, size)
+        origin = np.array((cx, cy, cz), dtype=np.int64) * CHUNK_SIZE_IN_BLOCKS
+        for face, (dx, dy, dz) in enumerate(FACES):
+            neighbors = opaque[1 + dx:1 + dx + size, 1 + dy:1 + dy + size, 1 + dz:1 + dz + size]
+            xs, ys, zs = np.nonzero((ids != 0) & ~neighbors)
+            if not len(xs):
+                continue
+            centers = (np.stack((xs, ys, zs), axis=1) * 2 + origin + 0.5).astype(np.float32)
+            _add_quads(quads, face, FACE_TILES[ids[xs, ys, zs], face], centers[:, None, :] + FACE_CORNERS[face] * 2)
+    return _index_quads(quads)
+
+
+def snapshot(world: ChunkedWorld, chunks) -> dict:
+    """!
+    @brief Copies the chunks of `world` needed to build the meshes of some chunks.
+    @details The copy holds the chunks and their neighboring chunks, which decide which faces are visible, so the
+        meshes can be built by another thread while `world` keeps changing.
+    @param world : ChunkedWorld The world holding the blocks.
+    @param chunks An iterable of the coordinates of the chunks to mesh.
+    @return A mapping from chunk coordinates to copies of the chunk arrays.
+    """
+    keys = {(cx + dx, cy + dy, cz + dz) for cx, cy, cz in chunks for dx, dy, dz in [(0, 0, 0)] + FACES}
+    return {chunk: np.array(world.chunks[chunk]) for chunk in keys if chunk in world.chunks}
+
+
+def build_sector_meshes(chunks, positions, greedy=False,
+                        masks=None) -> dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """!
+    @brief Builds the meshes of the visible faces of the given blocks, with `build_mesh()` or `build_greedy_mesh()`.
+    @param chunks A mapping from chunk coordinates to the chunk arrays holding the blocks, like
+        `ChunkedWorld.chunks`.
+    @param positions An iterable of the (x, y, z) positions of the blocks.
+    @param greedy : bool Whether to merge adjacent coplanar faces with the same texture.
+    @param masks A function returning the neighbor masks of a chunk, see `_visible_faces()`.
+    @return A mapping from tile number to a mesh, see `_index_quads()`.
+    """
+    return build_greedy_mesh(chunks, positions, masks) if greedy else build_mesh(chunks, positions, masks)
+
+
+def _attribute_array(vertex_list, name: str) -> np.ndarray:
+    """!
+    @brief Returns a writable numpy view of one attribute of a pyglet `VertexList`, one row per vertex.
+    @details Static attributes share a single interleaved buffer, so the view is strided over the vertices of the list
+        in that buffer. The buffer is marked as changed, and uploaded again the next time it is drawn.
+    @param vertex_list The `VertexList`.
+    @param name : str The name of the attribute, like 'vertices' or 'tex_coords'.
+    @return A (number of vertices, number of components) array.
+    """
+    attribute = vertex_list.domain.attribute_names[name]
+    element_size = ctypes.sizeof(attribute.c_type)
+    stride = attribute.stride // element_size
+    region = attribute.buffer.get_region(attribute.stride * vertex_list.start, attribute.stride * vertex_list.count,
+                                         ctypes.POINTER(attribute.c_type * (stride * vertex_list.count)))
+    region.invalidate()
+    offset = attribute.offset // element_size
+    return np.ctypeslib.as_array(region.array).reshape(vertex_list.count, stride)[:, offset:offset + attribute.count]
+
+
+def copy_mesh(vertex_list, vertices: np.ndarray, tex_coords: np.ndarray, indices: np.ndarray) -> None:
+    """!
+    @brief Copies an indexed mesh into a pyglet `IndexedVertexList` with at least as many vertices and exactly as many
+        indices, see `vertex_pool.VertexListPool.allocate()`.
+    @details The arrays are copied straight into the buffers of the vertex list, instead of going through Python
+        lists like the initial data given to `Batch.add_indexed()`.
+    @param vertex_list The `IndexedVertexList`, with `v3f` and `t2f` attributes.
+    @param vertices The `float32` array of the (x, y, z) coordinates of the vertices.
+    @param tex_coords The `float32` array of the (u, v) texture coordinates of the vertices.
+    @param indices The `uint32` array of the indices of the vertices of the triangles.
+    """
+    count = len(vertices) // 3
+    _attribute_array(vertex_list, 'vertices')[:count] = vertices.reshape(-1, 3)
+    _attribute_array(vertex_list, 'tex_coords')[:count] = tex_coords.reshape(-1, 2)
+    region = vertex_list.domain.get_index_region(vertex_list.index_start, vertex_list.index_count)
+    region.invalidate()
+    np.ctypeslib.as_array(region.array)[:] = indices + vertex_list.start
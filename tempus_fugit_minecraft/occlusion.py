@@ -0,0 +1,99 @@
+from collections import deque
+from typing import Callable
+
+import numpy as np
+
+from tempus_fugit_minecraft.utilities import FACES
+
+# Index in `FACES` of the face on the other side of every face.
+OPPOSITE_FACES = tuple(FACES.index((-dx, -dy, -dz)) for dx, dy, dz in FACES)
+
+# Every face connected to every face, the connectivity of a volume with nothing in it.
+ALL_FACES = (1 << len(FACES)) - 1
+OPEN_CONNECTIVITY = (ALL_FACES,) * len(FACES)
+
+
+def face_connectivity(open_cells: np.ndarray) -> tuple:
+    """!
+    @brief Finds which faces of a box of blocks can see each other through the cells that are not opaque.
+    @details Each open cell on a face of the box is flooded with the bit of that face, and the bits spread to the open
+        neighbors of the cells until nothing changes, so two faces are connected when there is a path of open cells
+        from one to the other.
+    @param open_cells : numpy array A 3D `bool` array, True for the cells of the box light goes through.
+    @return A tuple of 6 ints, in the order of `FACES`, whose bit j of element i tells whether face i is connected to
+        face j.
+    """
+    if open_cells.all():
+        return OPEN_CONNECTIVITY
+    if not open_cells.any():
+        return (0,) * len(FACES)
+    seeds = np.zeros(open_cells.shape, dtype=np.uint8)
+    for face in range(len(FACES)):
+        seeds[_face_slice(open_cells.shape, face)] |= np.uint8(1 << face)
+    seeds &= np.where(open_cells, np.uint8(ALL_FACES), np.uint8(0))
+    reached = seeds
+    while True:
+        spread = reached.copy()
+        spread[1:] |= reached[:-1]
+        spread[:-1] |= reached[1:]
+        spread[:, 1:] |= reached[:, :-1]
+        spread[:, :-1] |= reached[:, 1:]
+        spread[:, :, 1:] |= reached[:, :, :-1]
+        spread[:, :, :-1] |= reached[:, :, 1:]
+        spread[~open_cells] = 0
+        if np.array_equal(spread, reached):
+            break
+        reached = spread
+    return tuple(int(np.bitwise_or.reduce(reached[_face_slice(open_cells.shape, face)], axis=None))
+                 for face in range(len(FACES)))
+
+
+def _face_slice(shape: tuple, face: int) -> tuple:
+    """!
+    @brief Returns the index of the layer of cells on one face of a box.
+    @param shape : tuple The shape of the box.
+    @param face : int The index of the face in `FACES`.
+    @return A tuple of slices.
+    """
+    index = [slice(None)] * 3
+    axis = int(np.flatnonzero(FACES[face])[0])
+    index[axis] = slice(shape[axis] - 1, None) if FACES[face][axis] > 0 else slice(0, 1)
+    return tuple(index)
+
+
+def visible_sectors(start: tuple, connectivity: Callable[[tuple], tuple], in_range: Callable[[tuple], bool],
+                    faces=range(len(FACES))) -> set:
+    """!
+    @brief Finds the sectors that may be seen from inside sector `start`, by flooding from it through the faces of the
+        sectors that are connected to each other.
+    @details A sector is entered through one face and left through another one only if the two faces are connected,
+        see `face_connectivity()`. The flood only moves away from `start`, since no line of sight turns back, which
+        keeps it from going around caves to sectors hidden behind solid rock.
+    @param start : tuple of len 3 The (x, y, z) coordinates of the sector of the camera.
+    @param connectivity A function returning the connectivity of a sector, see `face_connectivity()`.
+    @param in_range A function telling whether a sector is close enough to be shown.
+    @param faces The indices in `FACES` of the directions to move in, only the horizontal ones for sectors that are
+        whole columns.
+    @return A set of sectors, `start` included.
+    """
+    visible = {start}
+    exits_taken = {}
+    queue = deque([(start, ALL_FACES)])
+    while queue:
+        sector, exits = queue.popleft()
+        # The neighbors behind a face do not depend on how the sector was entered, so every face is left only once.
+        exits &= ~exits_taken.get(sector, 0)
+        if not exits:
+            continue
+        exits_taken[sector] = exits_taken.get(sector, 0) | exits
+        for face in faces:
+            if not exits >> face & 1:
+                continue
+            dx, dy, dz = FACES[face]
+            neighbor = (sector[0] + dx, sector[1] + dy, sector[2] + dz)
+            if (neighbor[0] - start[0]) * dx + (neighbor[1] - start[1]) * dy + (neighbor[2] - start[2]) * dz <= 0 \
+                    or not in_range(neighbor):
+                continue
+            visible.add(neighbor)
+            queue.append((neighbor, connectivity(neighbor)[OPPOSITE_FACES[face]]))
+    return visible
@@ -0,0 +1,110 @@
+import functools
+from collections.abc import Mapping
+from typing import Iterator
+
+from tempus_fugit_minecraft.chunked_world import ChunkedWorld
+from tempus_fugit_minecraft.world import Position, sectorize
+
+
+@functools.lru_cache(maxsize=64)
+def offsets_in_range(radius: int, vertical_radius: int = 0) -> frozenset:
+    """!
+    @brief Returns the offsets from the player's sector of the sectors that are shown around it.
+    @details The sectors shown are the ones inside an ellipsoid of radius `radius + 1` along x and z and
+        `vertical_radius + 1` along y, a sphere when both radii are the same.
+    @param radius : int How many sectors away from the player's sector the sectors are shown along x and z.
+    @param vertical_radius : int How many sectors away from the player's sector the sectors are shown along y, 0 for
+        sectors that are full-height columns.
+    @return A frozenset of (dx, dy, dz) offsets.
+    """
+    horizontal, vertical = (radius + 1) ** 2, (vertical_radius + 1) ** 2
+    return frozenset((dx, dy, dz) for dx in range(-radius, radius + 1)
+                     for dy in range(-vertical_radius, vertical_radius + 1)
+                     for dz in range(-radius, radius + 1)
+                     if (dx * dx + dz * dz) * vertical + dy * dy * horizontal <= horizontal * vertical)
+
+
+@functools.lru_cache(maxsize=1024)
+def range_changes(offset: Position, radius: int, vertical_radius: int = 0) -> tuple[tuple, tuple]:
+    """!
+    @brief Returns the sectors that come in range and the ones that go out of range when the player moves by
+        `offset` sectors, see `offsets_in_range()`.
+    @details Players move to a neighboring sector nearly every time, so the same few offsets come back over and over.
+    @param offset : tuple of len 3 The (dx, dy, dz) offset from the sector the player left to the one they entered.
+    @param radius : int How many sectors away from the player's sector the sectors are shown along x and z.
+    @param vertical_radius : int How many sectors away from the player's sector the sectors are shown along y.
+    @return A pair of tuples of offsets from the sector the player entered, of the sectors to show and to hide.
+    """
+    offsets = offsets_in_range(radius, vertical_radius)
+    dx, dy, dz = offset
+    moved = frozenset((x - dx, y - dy, z - dz) for x, y, z in offsets)
+    return tuple(sorted(offsets - moved)), tuple(sorted(moved - offsets))
+
+
+class SectorIndex(Mapping):
+    """!
+    @brief Mapping from a sector to the positions of the blocks inside that sector.
+    @details Sectors have the same width as the chunks of `ChunkedWorld`, so the index does not store any position:
+        the chunk arrays already are a bitset of the blocks of every sector, and the positions of a sector are read
+        from them when they are needed. Adding or removing a block from the world costs nothing more than writing its
+        chunk, no matter how many blocks the sector holds. Sectors are either full-height columns of chunks with a y
+        of 0, like `sectorize()` returns by default, or single chunks when `vertical` is True.
+    @return sectors An instance of SectorIndex.
+    """
+    def __init__(self, world: ChunkedWorld, vertical=False) -> None:
+        """!
+        @brief Initializes the index of the sectors of `world`.
+        @param world : ChunkedWorld The blocks to index.
+        @param vertical : bool Whether sectors are also subdivided along y.
+        """
+        self.world = world
+        self.vertical = vertical
+
+    def sector_of(self, position: tuple) -> Position:
+        """!
+        @brief Returns the sector containing `position`.
+        @param position : tuple of len 3 The (x, y, z) position, which does not need to be a block position.
+        @return sector : tuple of len 3
+        """
+        return sectorize(position, self.vertical)
+
+    def chunks_in_sector(self, sector: Position) -> list[Position]:
+        """!
+        @brief Returns the coordinates of the chunks of the world that are inside `sector`.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        @return A list of chunk coordinates.
+        """
+        x, y, z = sector
+        if self.vertical:
+            return [sector] if sector in self.world.chunks else []
+        return self.world.chunks_in_column((x, z))
+
+    def exposed_positions(self, sector: Position) -> list[Position]:
+        """!
+        @brief Returns the positions of the blocks of `sector` that are not surrounded on all 6 sides by blocks.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector.
+        @return A list of (x, y, z) positions.
+        """
+        positions = []
+        for chunk in self.chunks_in_sector(sector):
+            positions.extend(self.world.exposed_positions_in_chunk(chunk))
+        return positions
+
+    def __getitem__(self, sector: Position) -> list[Position]:
+        positions = []
+        for chunk in self.chunks_in_sector(sector):
+            positions.extend(self.world.positions_in_chunk(chunk))
+        if not positions:
+            raise KeyError(sector)
+        return positions
+
+    def __contains__(self, sector) -> bool:
+        return bool(self.chunks_in_sector(sector))
+
+    def __iter__(self) -> Iterator[Position]:
+        if self.vertical:
+            return iter(list(self.world.chunks))
+        return iter(list({(cx, 0, cz) for cx, _, cz in self.world.chunks}))
+
+    def __len__(self) -> int:
+        return len(list(iter(self)))
@@ -0,0 +1,111 @@
+import heapq
+import itertools
+from typing import Callable
+
+
+class SectorQueue(object):
+    """!
+    @brief A queue of work on sectors, whose most urgent sector comes out first.
+    @details Every call in the queue is about one sector, and how urgent it is comes from a priority function of the
+        sector, the lowest first, calls of the same priority coming out in the order they were added. The priorities
+        are computed when the calls are added, and all over again by reprioritize() when what they depend on changes,
+        like the position of the player. A call added with a key replaces the call in the queue with the same key, so
+        only the last of several calls doing the same thing is made, and cancel() takes it out of the queue.
+    """
+
+    def __init__(self, priority: Callable[[tuple], float]) -> None:
+        """!
+        @brief Creates an empty queue.
+        @param priority A function returning the priority of a sector, the lowest coming out first.
+        """
+        self.priority = priority
+
+        # Heap of [priority, order, sector, function, arguments, key] entries.
+        # Replaced and cancelled entries stay in the heap with no function,
+        # and are skipped when they come out.
+        self._heap = []
+        self._order = itertools.count()
+
+        # Mapping from key to the entry of the call with that key.
+        self._keyed_entries = {}
+        self._length = 0
+
+    def push(self, sector: tuple, func: Callable, *args, key=None) -> None:
+        """!
+        @brief Adds a call to the queue.
+        @param sector : tuple of len 3 The (x, y, z) coordinates of the sector the call is about.
+        @param func : Callable The function to call.
+        @param args The arguments to pass to the function.
+        @param key A hashable identifying what the call does, or None. The call replaces the call in the queue with
+            the same key.
+        """
+        if key is not None:
+            self.cancel(key)
+        entry = [self.priority(sector), next(self._order), sector, func, args, key]
+        heapq.heappush(self._heap, entry)
+        self._length += 1
+        if key is not None:
+            self._keyed_entries[key] = entry
+
+    def get(self, key):
+        """!
+        @brief Returns the call with the given key in the queue.
+        @param key The key the call was added with.
+        @return A (function, arguments) pair, or None if there is no call with that key.
+        """
+        entry = self._keyed_entries.get(key)
+        return None if entry is None else (entry[3], entry[4])
+
+    def cancel(self, key) -> bool:
+        """!
+        @brief Takes the call with the given key out of the queue.
+        @param key The key the call was added with.
+        @return Whether there was a call with that key.
+        """
+        entry = self._keyed_entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[3] = entry[4] = None
+        self._length -= 1
+        return True
+
+    def pop(self) -> tuple:
+        """!
+        @brief Removes the most urgent call from the queue.
+        @return A (function, arguments) pair.
+        """
+        while True:
+            _, _, _, func, args, key = heapq.heappop(self._heap)
+            if func is not None:
+                break
+        self._length -= 1
+        if key is not None:
+            del self._keyed_entries[key]
+        return func, args
+
+    def reprioritize(self) -> None:
+        """!
+        @brief Computes the priorities of all the calls in the queue again.
+        """
+        self._heap = [entry for entry in self._heap if entry[3] is not None]
+        for entry in self._heap:
+            entry[0] = self.priority(entry[2])
+        heapq.heapify(self._heap)
+
+    def sectors(self) -> list:
+        """!
+        @brief Returns the sectors of the calls in the queue, the most urgent first.
+        @return A list of sectors.
+        """
+        return [entry[2] for entry in sorted(self._heap) if entry[3] is not None]
+
+    def clear(self) -> None:
+        """!
+        @brief Removes every call from the queue.
+        """
+        self._heap.clear()
+        self._keyed_entries.clear()
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
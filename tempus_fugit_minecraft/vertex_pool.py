@@ -0,0 +1,197 @@
+import ctypes
+from collections import OrderedDict
+
+import numpy as np
+from pyglet.gl import GL_CLIENT_VERTEX_ARRAY_BIT, GLintptr, GLsizei, GLvoid, glMultiDrawElements, \
+    glPopClientAttrib, glPushClientAttrib
+
+# Free vertex lists are kept for reuse as long as they hold at most this fraction of the vertices of the vertex lists
+# in use, the oldest ones being deleted during idle frames beyond that, see `VertexListPool.release_idle()`.
+MAX_POOLED_FRACTION = 0.5
+# How many free vertex lists `VertexListPool.release_idle()` deletes at most per call.
+RELEASES_PER_IDLE_FRAME = 8
+
+
+def size_class(count: int) -> int:
+    """!
+    @brief Returns the capacity of the vertex lists allocated for `count` vertices or indices.
+    @details The capacities are 4, 5, 6 or 7 times a power of two, so a vertex list wastes less than a quarter of its
+        capacity and meshes of about the same size share the same free vertex lists.
+    @param count : int The number of vertices or indices.
+    @return The capacity, at least `count`.
+    """
+    if count <= 4:
+        return 4
+    shift = max(count.bit_length() - 3, 0)
+    return -(-count // (1 << shift)) << shift
+
+
+def _index_array(vertex_list, start: int, count: int) -> np.ndarray:
+    """!
+    @brief Returns a writable numpy view of some of the indices of a pyglet `IndexedVertexList`.
+    @details The indices are the ones in the index buffer, offset by the start of the vertex list.
+    @param vertex_list The `IndexedVertexList`.
+    @param start : int The first index of the view, from the start of the indices of the vertex list.
+    @param count : int The number of indices of the view.
+    @return A one-dimensional array.
+    """
+    region = vertex_list.domain.get_index_region(vertex_list.index_start + start, count)
+    region.invalidate()
+    return np.ctypeslib.as_array(region.array)
+
+
+def _draw_elements(domain, mode: int, vertex_lists: list) -> None:
+    """!
+    @brief Draws the indices of some vertex lists of a pyglet `IndexedVertexDomain` with a single glMultiDrawElements
+        call.
+    @details The buffers are bound like `IndexedVertexDomain.draw()` does, which can only draw one vertex list or all
+        of them.
+    @param domain The `IndexedVertexDomain` of the vertex lists.
+    @param mode : int The OpenGL primitive of the vertex lists, like `GL_TRIANGLES`.
+    @param vertex_lists : list The `IndexedVertexList`s to draw.
+    """
+    glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+    for buffer, attributes in domain.buffer_attributes:
+        buffer.bind()
+        for attribute in attributes:
+            attribute.enable()
+            attribute.set_pointer(attribute.buffer.ptr)
+    domain.index_buffer.bind()
+    count = len(vertex_lists)
+    starts = (GLintptr * count)(*(domain.index_buffer.ptr + vertex_list.index_start * domain.index_element_size
+                                  for vertex_list in vertex_lists))
+    sizes = (GLsizei * count)(*(vertex_list.index_count for vertex_list in vertex_lists))
+    glMultiDrawElements(mode, sizes, domain.index_gl_type, ctypes.cast(starts, ctypes.POINTER(ctypes.POINTER(GLvoid))),
+                        count)
+    domain.index_buffer.unbind()
+    for buffer, _ in domain.buffer_attributes:
+        buffer.unbind()
+    glPopClientAttrib()
+
+
+class VertexListPool(object):
+    """!
+    @brief Allocates the indexed vertex lists of the meshes of a batch, and recycles the freed ones instead of deleting
+        them, so meshes that are shown again do not allocate new regions of the vertex buffers.
+    @details The vertex lists are allocated with a capacity rounded up to a size class, see `size_class()`, and a
+        freed vertex list is reused for the next mesh of the same group in the same size classes. pyglet draws the
+        `index_count` indices of a vertex list, so the pool sets it to the number of indices of the mesh and turns the
+        indices past it into degenerate triangles, restoring the capacity before the region goes back to pyglet.
+    """
+
+    def __init__(self, batch, mode: int, *formats: str) -> None:
+        """!
+        @brief Creates an empty pool.
+        @param batch The pyglet `Batch` holding the vertex lists.
+        @param mode : int The OpenGL primitive of the vertex lists, like `GL_TRIANGLES`.
+        @param formats : str The attribute formats of the vertex lists, like 'v3f/static'.
+        """
+        self.batch = batch
+        self.mode = mode
+        self.formats = formats
+
+        # Mapping from vertex list to its (group, vertex capacity, index capacity) key.
+        self._keys = {}
+
+        # Mapping from key to the free vertex lists with that key, the last freed at the end.
+        self._free = {}
+
+        # The free vertex lists, the oldest first.
+        self._free_order = OrderedDict()
+
+        # Number of vertices of the vertex lists in use and of the free ones.
+        self.used_capacity = 0
+        self.free_capacity = 0
+
+        # Counters of the vertex lists added to the batch, reused and deleted.
+        self.allocations = 0
+        self.reuses = 0
+        self.releases = 0
+
+    def allocate(self, group, count: int, index_count: int):
+        """!
+        @brief Returns a vertex list for a mesh, reusing a free one if there is one of the right size.
+        @details The vertices past `count` are left as they are, and the indices past `index_count` are degenerate.
+        @param group The pyglet `Group` of the vertex list.
+        @param count : int The number of vertices of the mesh.
+        @param index_count : int The number of indices of the mesh.
+        @return An `IndexedVertexList` of `index_count` indices and at least `count` vertices.
+        """
+        key = (group, size_class(count), size_class(index_count))
+        free = self._free.get(key)
+        if free:
+            vertex_list = free.pop()
+            del self._free_order[vertex_list]
+            self.free_capacity -= key[1]
+            self.reuses += 1
+        else:
+            vertex_list = self.batch.add_indexed(key[1], self.mode, group, [0] * key[2], *self.formats)
+            self._keys[vertex_list] = key
+            self.allocations += 1
+        self.used_capacity += key[1]
+        _index_array(vertex_list, index_count, key[2] - index_count)[:] = vertex_list.start
+        vertex_list.index_count = index_count
+        return vertex_list
+
+    def free(self, vertex_list) -> None:
+        """!
+        @brief Gives a vertex list allocated by the pool back to it, making all its triangles degenerate.
+        @param vertex_list The `IndexedVertexList`.
+        """
+        key = self._keys[vertex_list]
+        _index_array(vertex_list, 0, key[2])[:] = vertex_list.start
+        vertex_list.index_count = key[2]
+        self._free.setdefault(key, []).append(vertex_list)
+        self._free_order[vertex_list] = key
+        self.used_capacity -= key[1]
+        self.free_capacity += key[1]
+
+    def draw(self, vertex_lists) -> None:
+        """!
+        @brief Draws some of the vertex lists of the pool, with one draw call per vertex domain.
+        @details pyglet's `Batch.draw_subset()` binds the buffers of a domain and draws once for every vertex list,
+            which is slower than drawing the whole batch. The vertex lists are grouped by domain instead, a domain
+            belonging to a single group, so the state of each group is set and the buffers of each domain are bound
+            once, see `_draw_elements()`.
+        @param vertex_lists An iterable of vertex lists allocated by the pool.
+        """
+        domains = {}
+        for vertex_list in vertex_lists:
+            domains.setdefault(vertex_list.domain, []).append(vertex_list)
+        for domain, domain_vertex_lists in domains.items():
+            group = self._keys[domain_vertex_lists[0]][0]
+            group.set_state_recursive()
+            _draw_elements(domain, self.mode, domain_vertex_lists)
+            group.unset_state_recursive()
+
+    def release_idle(self, limit: int = RELEASES_PER_IDLE_FRAME) -> int:
+        """!
+        @brief Deletes the oldest free vertex lists while they hold more than `MAX_POOLED_FRACTION` of the vertices in
+            use, so pyglet can merge their regions with the free space around them. Meant to be called when there is
+            nothing else to do in a frame.
+        @param limit : int The maximum number of vertex lists to delete.
+        @return The number of deleted vertex lists.
+        """
+        released = 0
+        while released < limit and self._free_order and \
+                self.free_capacity > MAX_POOLED_FRACTION * self.used_capacity:
+            vertex_list, key = self._free_order.popitem(last=False)
+            self._free[key].remove(vertex_list)
+            del self._keys[vertex_list]
+            self.free_capacity -= key[1]
+            vertex_list.delete()
+            released += 1
+        self.releases += released
+        return released
+
+    def clear(self) -> None:
+        """!
+        @brief Deletes all the free vertex lists.
+        """
+        while self._free_order:
+            vertex_list, key = self._free_order.popitem(last=False)
+            del self._keys[vertex_list]
+            vertex_list.delete()
+            self.releases += 1
+        self._free.clear()
+        self.free_capacity = 0
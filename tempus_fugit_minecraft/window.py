@@ -7,6 +7,7 @@ from pyglet.gui import Slider
 from pyglet.image import load
 from pyglet.sprite import Sprite
 from pyglet.window import key, mouse
+from tempus_fugit_minecraft import frustum, world_storage
 from tempus_fugit_minecraft.utilities import *
 from tempus_fugit_minecraft.game_model import GameModel
 from tempus_fugit_minecraft.shaders import Shaders
@@ -25,10 +26,13 @@ class Window(pyglet.window.Window):
         screen, and more.
     @return window An instance of Window class.
     """
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, save_dir=None, **kwargs):
         """!
         @brief This method sets all the default values for the instance.
+        @details With a `save_dir`, the world saved there is loaded instead of generating one, and every edit is
+            saved there as it is made, see `GameModel.start_autosave()`.
         @param args
+        @param save_dir : str The directory the world is saved in, or None to play without saving.
         @param kwargs
         @see [Issue#7](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/7)
         @see [Issue#12](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/12)
@@ -47,7 +51,19 @@ class Window(pyglet.window.Window):
             key._6, key._7, key._8, key._9, key._0]
 
         #Issue 68 Instance of the model that handles the world.
-        self.game_model = GameModel()
+        # A saved world replaces the generated one, so nothing is generated when there is one.
+        saved = save_dir is not None and world_storage.is_saved_world(save_dir)
+        self.game_model = GameModel(lazy_generation=saved)
+        if saved:
+            try:
+                self.game_model.load(save_dir)
+            except ValueError:
+                # The save was written by another version of the game and is replaced by a new world.
+                self.game_model.world.clear()
+                self.game_model.lazy_generation = False
+                self.game_model.generate()
+        if save_dir is not None:
+            self.game_model.start_autosave(save_dir)
 
         # Instance of the shaders in the world
         """Placed in Windows for being a OpenGL related Class. Solves issue #7"""
@@ -139,6 +155,14 @@ class Window(pyglet.window.Window):
         super(Window, self).set_exclusive_mouse(exclusive)
         self.exclusive = exclusive
 
+    def on_close(self) -> None:
+        """!
+        @brief Called when the window is closed. Stops the autosave journal and the mesh threads of the game model
+            before closing the window.
+        """
+        self.game_model.close()
+        super(Window, self).on_close()
+
     def update(self, delta_time_in_seconds: float) -> None:
         """!
         @brief This method is scheduled to be called repeatedly by the pyglet clock.
@@ -400,7 +424,8 @@ class Window(pyglet.window.Window):
         glViewport(0, 0, max(1, viewport[0]), max(1, viewport[1]))
         glMatrixMode(GL_PROJECTION)
         glLoadIdentity()
-        gluPerspective(65.0, width / float(height), 0.1, 60.0)
+        gluPerspective(frustum.FIELD_OF_VIEW_IN_DEGREES, width / float(height), frustum.NEAR_PLANE_DISTANCE,
+                       frustum.FAR_PLANE_DISTANCE)
         glMatrixMode(GL_MODELVIEW)
         glLoadIdentity()
         x, y = self.game_model.player.rotation_in_degrees
@@ -409,15 +434,30 @@ class Window(pyglet.window.Window):
         x, y, z = self.game_model.player.position_in_blocks_from_origin
         glTranslatef(-x, -y, -z)
 
+    def frustum_planes(self):
+        """!
+        @brief Returns the planes bounding the volume seen by the 3D view set by set_3d().
+        @return A 6x4 numpy array of planes, see `frustum.frustum_planes()`.
+        """
+        width, height = self.get_size()
+        projection = frustum.perspective_matrix(frustum.FIELD_OF_VIEW_IN_DEGREES, width / float(max(1, height)),
+                                                frustum.NEAR_PLANE_DISTANCE, frustum.FAR_PLANE_DISTANCE)
+        view = frustum.view_matrix(self.game_model.player.position_in_blocks_from_origin,
+                                   self.game_model.player.rotation_in_degrees)
+        return frustum.frustum_planes(projection @ view)
+
     def on_draw(self):
         """!
         @brief Called by pyglet to draw the canvas.
+        @details Only the sectors whose mesh may be in view are drawn. How long drawing takes sizes the time the queue
+            may work in the next frames, see `GameModel.process_queue()`.
         @see [Issue#68](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/68)
         """
+        start = time.perf_counter()
         self.clear()
         self.set_3d()
         glColor3d(1, 1, 1)
-        self.game_model.batch.draw()
+        self.game_model.draw(self.frustum_planes())
         self.draw_focused_block()
         self.set_2d()
         self.draw_label()
@@ -425,6 +465,7 @@ class Window(pyglet.window.Window):
 
         if self.paused:
             self.draw_pause_menu()
+        self.game_model.frame_budget.record('draw', time.perf_counter() - start)
 
     def draw_pause_menu(self) -> None:
         """!
@@ -484,9 +525,9 @@ class Window(pyglet.window.Window):
         @see [Issue#68](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/68)
         """
         x, y, z = self.game_model.player.position_in_blocks_from_origin
-        self.label.text = '%02d (%.2f, %.2f, %.2f) %d / %d' % (
+        self.label.text = '%02d (%.2f, %.2f, %.2f) %d / %d queued %d' % (
             pyglet.clock.get_fps(), x, y, z,
-            len(self.game_model._shown), len(self.game_model.world))
+            len(self.game_model.shown), len(self.game_model.world), self.game_model.queue_length())
         self.label.draw()
 
     def draw_reticle(self) -> None:
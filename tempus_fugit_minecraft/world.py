@@ -1,7 +1,13 @@
+import functools
+import multiprocessing
+import os
 import random
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, TypeAlias
 
+import numpy as np
+
 from tempus_fugit_minecraft.block import Block
 
 Position: TypeAlias = tuple[int, int, int]
@@ -10,6 +16,9 @@ Map: TypeAlias = Dict[Position, Block]
 if sys.version_info[0] >= 3:
     xrange = range
 
+SECTOR_SIZE_IN_BLOCKS = 16  # Size of sectors used to ease block loading.
+MASK_32_BITS = 0xFFFFFFFF
+
 
 def normalize(position: tuple) -> Position:
     """!
@@ -22,17 +31,17 @@ def normalize(position: tuple) -> Position:
     return x, y, z
 
 
-def sectorize(position: tuple) -> tuple:
+def sectorize(position: tuple, vertical=False) -> tuple:
     """!
     @brief Returns a tuple representing the sector for the given `position`.
     @param position : tuple of len 3
+    @param vertical : bool Whether sectors are also subdivided along y. Otherwise every sector is a full-height column
+        and its y is 0.
     @return sector : tuple of len 3
     """
-    SECTOR_SIZE_IN_BLOCKS = 16  # Size of sectors used to ease block loading.
-
     x, y, z = normalize(position)
     x, y, z = x // SECTOR_SIZE_IN_BLOCKS, y // SECTOR_SIZE_IN_BLOCKS, z // SECTOR_SIZE_IN_BLOCKS
-    return x, 0, z
+    return x, y if vertical else 0, z
 
 
 class World:
@@ -43,6 +52,14 @@ class World:
     """
     WIDTH_IN_BLOCKS = 320
     WIDTH_FROM_ORIGIN_IN_BLOCKS = WIDTH_IN_BLOCKS // 2
+    DEFAULT_SEED = 7140
+    NUM_HILLS = int(WIDTH_FROM_ORIGIN_IN_BLOCKS * 1.5)
+    NUM_CLOUDS = int(WIDTH_FROM_ORIGIN_IN_BLOCKS * 3.75)
+    NUM_TREES = int(WIDTH_FROM_ORIGIN_IN_BLOCKS * 3.125)
+    CLOUD_HEIGHTS_IN_BLOCKS = [18, 20, 22, 24, 26]
+    MAX_CLOUD_SIZE_IN_BLOCKS = 6
+    LOWEST_BLOCK_Y_IN_BLOCKS = -3
+    HIGHEST_BLOCK_Y_IN_BLOCKS = max(CLOUD_HEIGHTS_IN_BLOCKS)
 
     @staticmethod
     def generate_base_layer() -> list[tuple[Block, Position]]:
@@ -51,23 +68,15 @@ class World:
         @return a list of pairs of blocks and their positions
         @see [Issue#86](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/86)
         """
-        blockList = []
-        step_size_in_block = 1
-        y_hight_in_block = 0
-        for x in xrange(-World.WIDTH_FROM_ORIGIN_IN_BLOCKS, World.WIDTH_FROM_ORIGIN_IN_BLOCKS + 1, step_size_in_block):
-            for z in xrange(-World.WIDTH_FROM_ORIGIN_IN_BLOCKS, World.WIDTH_FROM_ORIGIN_IN_BLOCKS + 1, step_size_in_block):
-                # create a layer stone and grass everywhere.
-                blockList.append((Block.GRASS, (x, y_hight_in_block - 2, z)))
-                blockList.append((Block.STONE, (x, y_hight_in_block - 3, z)))
-                if x in (-World.WIDTH_FROM_ORIGIN_IN_BLOCKS, World.WIDTH_FROM_ORIGIN_IN_BLOCKS) or z in (-World.WIDTH_FROM_ORIGIN_IN_BLOCKS, World.WIDTH_FROM_ORIGIN_IN_BLOCKS):
-                    # create outer walls.
-                    for dy in xrange(-2, 3):
-                        blockList.append((Block.STONE, (x, y_hight_in_block + dy, z)))
-        return blockList
+        w = World.WIDTH_FROM_ORIGIN_IN_BLOCKS
+        origin = (-w, -3, -w)
+        volume = np.zeros((2 * w + 1, 6, 2 * w + 1), dtype=np.uint8)
+        World.fill_base_layer(volume, origin)
+        return World._volume_blocks(volume, origin)
 
     # generate_hills() function is responsible for creating a specified number of hills of different type of blocks in the game.
     @staticmethod
-    def generate_hills(world_size_in_blocks=WIDTH_FROM_ORIGIN_IN_BLOCKS, num_hills=int(WIDTH_FROM_ORIGIN_IN_BLOCKS * 1.5)) -> list[list[tuple[Block, Position]]]:
+    def generate_hills(world_size_in_blocks=WIDTH_FROM_ORIGIN_IN_BLOCKS, num_hills=NUM_HILLS) -> list[list[tuple[Block, Position]]]:
         """!
         @brief this function generates a group of randomly positioned hills strewn around the world
         @param world_size_in_blocks : The world size (default: world_size_in_blocks)
@@ -103,27 +112,28 @@ class World:
         @return a list of pairs of blocks and positions that represent a hill
         @see [Issue#86](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/86)
         """
-        base = -1  # base of the hill
-        taperRate = 1  # how quickly to taper off the hills
+        height, side_length, block = World.random_hill_shape()
+        origin = (hill_center_x_coordinate_in_model - side_length, -1, hill_center_z_coordinate_in_model - side_length)
+        volume = np.zeros((2 * side_length + 1, height, 2 * side_length + 1), dtype=np.uint8)
+        World.fill_hill(volume, origin, hill_center_x_coordinate_in_model, hill_center_z_coordinate_in_model, height,
+                        side_length, block)
+        return World._volume_blocks(volume, origin)
+
+    @staticmethod
+    def random_hill_shape() -> tuple[int, int, Block]:
+        """!
+        @brief Randomly picks the shape and block type of a hill.
+        @return a tuple of the height of the hill, half its side length at the base, and its block type
+        """
         height = random.randint(1, 6)  # height of the hill
-        sideLength = random.randint(4, 8)  # 2 * s is the side length of the hill
+        side_length = random.randint(4, 8)  # 2 * s is the side length of the hill
         block = random.choice([Block.GRASS, Block.SAND, Block.BRICK])
-        hill = []
-        for y in xrange(base, base + height):
-            for x in xrange(hill_center_x_coordinate_in_model - sideLength, hill_center_x_coordinate_in_model + sideLength + 1):
-                for z in xrange(hill_center_z_coordinate_in_model - sideLength, hill_center_z_coordinate_in_model + sideLength + 1):
-                    if (x - hill_center_x_coordinate_in_model) ** 2 + (z - hill_center_z_coordinate_in_model) ** 2 > (sideLength + 1) ** 2:
-                        continue
-                    if (x - 0) ** 2 + (z - 0) ** 2 < 5 ** 2:
-                        continue
-                    hill.append((block, (x, y, z)))
-            sideLength -= taperRate  # decrement side length so hills taper off
-        return hill
+        return height, side_length, block
 
     # generate_trees() function is responsible for creating a specified 
     # number of trees in the game.
     @staticmethod
-    def generate_trees(model, num_trees=int((WIDTH_FROM_ORIGIN_IN_BLOCKS * 3.125))) -> list[list[tuple[Block, Position]]]:
+    def generate_trees(model, num_trees=NUM_TREES) -> list[list[tuple[Block, Position]]]:
         """!
         @brief Generate trees' (trunks and leaves) positions.
         @details single_tree is a list contains 2 lists of coordinates: list of trunks, and list of leaves.
@@ -137,20 +147,15 @@ class World:
         """
         # The function first defines a list of possible locations for 
         # trees to grow.
-        # First, it lists all the grass blocks in the ground level.
-        suggested_places_for_trees = []
+        # First, it copies the blocks of the world up to 9 blocks above the highest possible ground level out of the
+        # chunks, then it finds the grass blocks at the ground level that do not have any block in the 9 positions
+        # above them, so grass under a cloud can still grow a tree.
+        # The item in the list is a tuple of (x, y, z) coordinate of the grass blocks located at the ground level.
         trees = []
-        grass_list = [coords for coords , block in model.world.items() if block == Block.GRASS and coords[1]<=0]
-        min_grass_level = min(ground[1] for ground in grass_list)
-        ground_grass_list = [ground for ground in grass_list if ground[1] == min_grass_level]
-
-        # Then, Among this list, it finds all the grass blocks that do not have any blocks above them. add those items to a different list.
-        # The item in the list is a tuple of (x, y, z) coordinate of the grass blocks located at the ground level, with nothing above them.
-        for coords in ground_grass_list:
-            x,y,z = coords
-            does_not_grass_have_block_above_it = all([(x, y+j, z) not in model.world for j in range(1,10)])
-            if does_not_grass_have_block_above_it:
-                suggested_places_for_trees.append(coords)
+        xs, _, zs = zip(*model.world.iter_column_tops())
+        origin = (min(xs), World.LOWEST_BLOCK_Y_IN_BLOCKS, min(zs))
+        volume = model.world.read_volume(origin, (max(xs) - origin[0] + 1, 10 - origin[1], max(zs) - origin[2] + 1))
+        suggested_places_for_trees = World.find_places_for_trees(volume, origin)
 
         # The function then randomly selects a location from this list and removes it so that no two trees are created at the same location. 
         # It then calls generate_single_tree() to create a tree at this location.
@@ -181,25 +186,15 @@ class World:
         """
         # The tree consists of a trunk and leaves. The trunk is a block that leaves are built on it, (default number of trunks = 4).
         # The leaves are leaves blocks on top of the trunk.
-        tree = []
-
-        # Create trunks
-        for stem in range(trunk_height):
-            position = (x, y + stem, z)
-            tree.append((Block.TREE_TRUNK, position))
-
-        # Create leaves
-        for dx in range(-2,3):
-            for dy in range(0,3):
-                for dz in range(-2,3):
-                    position = (x + dx, y + trunk_height + dy, z + dz)
-                    tree.append((Block.TREE_LEAVES, position))
-        return tree
+        origin = (x - 2, y, z - 2)
+        volume = np.zeros((5, trunk_height + 3, 5), dtype=np.uint8)
+        World.fill_tree(volume, origin, x, y, z, trunk_height)
+        return World._volume_blocks(volume, origin)
 
     # generate_clouds() function is responsible for creating a specified 
     # number of clouds in different layers in the game.
     @staticmethod
-    def generate_clouds(world_size_in_blocks:int=WIDTH_FROM_ORIGIN_IN_BLOCKS, num_of_clouds=int((WIDTH_FROM_ORIGIN_IN_BLOCKS * 3.75))) -> list[list[tuple[Block, Position]]]:
+    def generate_clouds(world_size_in_blocks:int=WIDTH_FROM_ORIGIN_IN_BLOCKS, num_of_clouds=NUM_CLOUDS) -> list[list[tuple[Block, Position]]]:
         """!
         @brief Generate sky cloud positions.
         @param world_size_in_blocks Half the world's size.
@@ -224,10 +219,10 @@ class World:
             cloud_center_z = random.randint(-game_margin, game_margin)
             
             # while the y coordinate is randomly chosen between range of predefined values.
-            cloud_center_y = random.choice([18,20,22,24,26])
+            cloud_center_y = random.choice(World.CLOUD_HEIGHTS_IN_BLOCKS)
             
             # 2*s is the side length of the cloud from the center. It is randomly chosen to provide different size of clouds.
-            s = random.randint(3, 6)
+            s = random.randint(3, World.MAX_CLOUD_SIZE_IN_BLOCKS)
 
             # A single_cloud is a tuple of (cloud_color,position)
             single_cloud = World.generate_single_cloud(cloud_center_x_coordinate_in_model, cloud_center_y, cloud_center_z, s)
@@ -250,14 +245,345 @@ class World:
         @see [Issue#84](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/84)
         @see [Issue#86](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/86)
         """
-        single_cloud = []
-        
-        # Iterate over the x and z coordinates around the cloud's center (s)
+        s = blocks_from_center_of_clouds_to_end_in_one_direction
         cloud_color = random.choice([Block.LIGHT_CLOUD, Block.DARK_CLOUD])
-        for x in xrange(cloud_center_x_coordinate_in_model - blocks_from_center_of_clouds_to_end_in_one_direction, cloud_center_x_coordinate_in_model + blocks_from_center_of_clouds_to_end_in_one_direction + 1):
-                for z in xrange(cloud_center_z_coordinate_in_model - blocks_from_center_of_clouds_to_end_in_one_direction, cloud_center_z_coordinate_in_model + blocks_from_center_of_clouds_to_end_in_one_direction + 1):
-                    if (x - cloud_center_x_coordinate_in_model) ** 2 + (z - cloud_center_z_coordinate_in_model) ** 2 > (blocks_from_center_of_clouds_to_end_in_one_direction + 1) ** 2:
-                        continue
-                    position = (x, cloud_center_y_coordinate_in_model, z)
-                    single_cloud.append((cloud_color, position))
-        return single_cloud
+        origin = (cloud_center_x_coordinate_in_model - s, cloud_center_y_coordinate_in_model,
+                  cloud_center_z_coordinate_in_model - s)
+        volume = np.zeros((2 * s + 1, 1, 2 * s + 1), dtype=np.uint8)
+        World.fill_cloud(volume, origin, cloud_center_x_coordinate_in_model, cloud_center_y_coordinate_in_model,
+                         cloud_center_z_coordinate_in_model, s, cloud_color)
+        return World._volume_blocks(volume, origin)
+
+    # The functions below write the blocks straight into a numpy array of block ids (a "volume"). The functions above
+    # build their lists of (block, position) pairs from them. A volume is indexed by [x, y, z] and comes with the
+    # position of its [0, 0, 0] element, its origin.
+
+    @staticmethod
+    def _volume_blocks(volume: np.ndarray, origin: Position) -> list[tuple[Block, Position]]:
+        """!
+        @brief Lists the blocks of `volume`, layer by layer from the bottom up.
+        @param volume The volume of block ids.
+        @param origin The position of the volume's [0, 0, 0] element.
+        @return a list of pairs of blocks and their positions
+        """
+        ys, xs, zs = np.nonzero(volume.transpose(1, 0, 2))
+        ids = volume[xs, ys, zs].tolist()
+        positions = zip((xs + origin[0]).tolist(), (ys + origin[1]).tolist(), (zs + origin[2]).tolist())
+        return [(Block.from_id(block_id), position) for block_id, position in zip(ids, positions)]
+
+    @staticmethod
+    def _clip_box(volume: np.ndarray, origin: Position, low: Position, high: Position):
+        """!
+        @brief Clips the box of positions [low, high) to the volume.
+        @param volume The volume of block ids.
+        @param origin The position of the volume's [0, 0, 0] element.
+        @param low The lowest (x, y, z) corner of the box, inclusive.
+        @param high The highest (x, y, z) corner of the box, exclusive.
+        @return a tuple of slices selecting the clipped box in the volume, and the lowest corner of the clipped box,
+            or (None, None) if the box is entirely outside of the volume
+        """
+        slices = []
+        clipped_low = []
+        for axis in xrange(3):
+            start = max(low[axis], origin[axis])
+            stop = min(high[axis], origin[axis] + volume.shape[axis])
+            if start >= stop:
+                return None, None
+            slices.append(slice(start - origin[axis], stop - origin[axis]))
+            clipped_low.append(start)
+        return tuple(slices), tuple(clipped_low)
+
+    @staticmethod
+    def fill_base_layer(volume: np.ndarray, origin: Position, bounded=True) -> None:
+        """!
+        @brief Write the base layer of the world and its outer walls into `volume`.
+        @param volume The volume of block ids.
+        @param origin The position of the volume's [0, 0, 0] element.
+        @param bounded Whether the world ends with walls at WIDTH_FROM_ORIGIN_IN_BLOCKS. An unbounded world has a base
+            layer everywhere and no walls.
+        @see World.generate_base_layer
+        """
+        if not bounded:
+            volume[:, -3 - origin[1], :] = Block.STONE.id
+            volume[:, -2 - origin[1], :] = Block.GRASS.id
+            return
+        w = World.WIDTH_FROM_ORIGIN_IN_BLOCKS
+        for block, y in ((Block.GRASS, -2), (Block.STONE, -3)):
+            slices, _ = World._clip_box(volume, origin, (-w, y, -w), (w + 1, y + 1, w + 1))
+            if slices:
+                volume[slices] = block.id
+        # The outer walls replace the grass along the edges of the world.
+        for low, high in (((-w, -2, -w), (-w + 1, 3, w + 1)), ((w, -2, -w), (w + 1, 3, w + 1)),
+                          ((-w, -2, -w), (w + 1, 3, -w + 1)), ((-w, -2, w), (w + 1, 3, w + 1))):
+            slices, _ = World._clip_box(volume, origin, low, high)
+            if slices:
+                volume[slices] = Block.STONE.id
+
+    @staticmethod
+    def fill_hill(volume: np.ndarray, origin: Position, hill_center_x_coordinate_in_model: int,
+                  hill_center_z_coordinate_in_model: int, height: int, side_length: int, block: Block) -> None:
+        """!
+        @brief Write a single hill into `volume`, all layers at once.
+        @details Every layer of the hill is a disk clipped to a square, one block narrower than the layer below it.
+            The disks of all layers are computed with a single broadcast distance mask.
+        @param volume The volume of block ids.
+        @param origin The position of the volume's [0, 0, 0] element.
+        @param hill_center_x_coordinate_in_model Represents the x coordinate center of the hill
+        @param hill_center_z_coordinate_in_model Represents the z coordinate center of the hill
+        @param height The number of layers of the hill.
+        @param side_length Half the side length of the bottom layer of the hill.
+        @param block The block type of the hill.
+        @see World.generate_hill
+        """
+        base = -1  # base of the hill
+        cx, cz = hill_center_x_coordinate_in_model, hill_center_z_coordinate_in_model
+        slices, low = World._clip_box(volume, origin, (cx - side_length, base, cz - side_length),
+                                      (cx + side_length + 1, base + height, cz + side_length + 1))
+        if slices is None:
+            return
+        x0, y0, z0 = low
+        xs = np.arange(x0, x0 + slices[0].stop - slices[0].start)[:, None, None]
+        ys = np.arange(y0, y0 + slices[1].stop - slices[1].start)[None, :, None]
+        zs = np.arange(z0, z0 + slices[2].stop - slices[2].start)[None, None, :]
+        layer_side_length = side_length - (ys - base)  # hills taper off by one block per layer
+        dx, dz = xs - cx, zs - cz
+        mask = (np.abs(dx) <= layer_side_length) & (np.abs(dz) <= layer_side_length)
+        mask &= dx ** 2 + dz ** 2 <= (layer_side_length + 1) ** 2
+        mask &= xs ** 2 + zs ** 2 >= 5 ** 2  # keep the spawn point clear
+        volume[slices][mask] = block.id
+
+    @staticmethod
+    def fill_cloud(volume: np.ndarray, origin: Position, cloud_center_x_coordinate_in_model: int,
+                   cloud_center_y_coordinate_in_model: int, cloud_center_z_coordinate_in_model: int,
+                   blocks_from_center_of_clouds_to_end_in_one_direction: int, cloud_color: Block) -> None:
+        """!
+        @brief Write a single cloud into `volume`.
+        @param volume The volume of block ids.
+        @param origin The position of the volume's [0, 0, 0] element.
+        @param cloud_center_x_coordinate_in_model Represents the x-coordinate center of the cloud.
+        @param cloud_center_y_coordinate_in_model Represents the y-coordinate (height) center of the cloud.
+        @param cloud_center_z_coordinate_in_model Represents the z-coordinate center of the cloud.
+        @param blocks_from_center_of_clouds_to_end_in_one_direction number of blocks drawn from the center.
+        @param cloud_color The block type of the cloud.
+        @see World.generate_single_cloud
+        """
+        cx, cy, cz = cloud_center_x_coordinate_in_model, cloud_center_y_coordinate_in_model, \
+            cloud_center_z_coordinate_in_model
+        s = blocks_from_center_of_clouds_to_end_in_one_direction
+        slices, low = World._clip_box(volume, origin, (cx - s, cy, cz - s), (cx + s + 1, cy + 1, cz + s + 1))
+        if slices is None:
+            return
+        x0, _, z0 = low
+        dx = np.arange(x0, x0 + slices[0].stop - slices[0].start)[:, None, None] - cx
+        dz = np.arange(z0, z0 + slices[2].stop - slices[2].start)[None, None, :] - cz
+        volume[slices][dx ** 2 + dz ** 2 <= (s + 1) ** 2] = cloud_color.id
+
+    @staticmethod
+    def fill_tree(volume: np.ndarray, origin: Position, x: int, y: int, z: int, trunk_height=4) -> None:
+        """!
+        @brief Write a single tree into `volume`.
+        @param volume The volume of block ids.
+        @param origin The position of the volume's [0, 0, 0] element.
+        @param x : x-coordinate of the position of the tree to be built at.
+        @param y : y-coordinate of the position of the tree to be built at.
+        @param z : z-coordinate of the position of the tree to be built at.
+        @param trunk_height Number of trunks (stems) in the tree (default=4).
+        @see World.generate_single_tree
+        """
+        slices, _ = World._clip_box(volume, origin, (x, y, z), (x + 1, y + trunk_height, z + 1))
+        if slices:
+            volume[slices] = Block.TREE_TRUNK.id
+        slices, _ = World._clip_box(volume, origin, (x - 2, y + trunk_height, z - 2), (x + 3, y + trunk_height + 3, z + 3))
+        if slices:
+            volume[slices] = Block.TREE_LEAVES.id
+
+    @staticmethod
+    def find_places_for_trees(volume: np.ndarray, origin: Position) -> list[Position]:
+        """!
+        @brief Find the ground level grass blocks of `volume` that do not have any blocks above them.
+        @param volume The volume of block ids.
+        @param origin The position of the volume's [0, 0, 0] element.
+        @return a list of the (x, y, z) positions of the grass blocks
+        @see World.generate_trees
+        """
+        ox, oy, oz = origin
+        grass_layers = np.nonzero((volume == Block.GRASS.id).any(axis=(0, 2)))[0]
+        grass_layers = grass_layers[grass_layers + oy <= 0]
+        if not len(grass_layers):
+            return []
+        ground = grass_layers[0]
+        clear_above = ~volume[:, ground + 1:ground + 10, :].any(axis=1)
+        xs, zs = np.nonzero((volume[:, ground, :] == Block.GRASS.id) & clear_above)
+        return list(zip((xs + ox).tolist(), [int(ground + oy)] * len(xs), (zs + oz).tolist()))
+
+    @staticmethod
+    def _sector_terrain(seed: int, sector: Position, bounded=True) -> tuple[Position, np.ndarray]:
+        """!
+        @brief Generate the base layer and the hills of a single sector.
+        @param seed The world seed.
+        @param sector The (x, 0, z) sector to generate.
+        @param bounded Whether the world ends with walls at WIDTH_FROM_ORIGIN_IN_BLOCKS.
+        @return a tuple of the origin of the sector's volume and the volume
+        """
+        sector_x, _, sector_z = sector
+        origin = (sector_x * SECTOR_SIZE_IN_BLOCKS, World.LOWEST_BLOCK_Y_IN_BLOCKS,
+                  sector_z * SECTOR_SIZE_IN_BLOCKS)
+        volume = np.zeros((SECTOR_SIZE_IN_BLOCKS, World.HIGHEST_BLOCK_Y_IN_BLOCKS - origin[1] + 1,
+                           SECTOR_SIZE_IN_BLOCKS), dtype=np.uint8)
+        World.fill_base_layer(volume, origin, bounded)
+        # Features never reach further than one sector away from the sector they are planned in. They are always
+        # written in the same order, so blocks shared by two sectors get the same type on both sides.
+        for neighbor in _neighbor_sectors(sector):
+            for hill in _plan_hills(seed, neighbor, bounded):
+                World.fill_hill(volume, origin, *hill)
+        return origin, volume
+
+    @staticmethod
+    def generate_sector(seed: int, sector: Position, bounded=True) -> tuple[Position, np.ndarray]:
+        """!
+        @brief Generate all the blocks of a single sector.
+        @details The blocks only depend on `seed` and `sector`: each sector plans its own hills, clouds and trees with
+            a random generator derived from both, and every sector writes the features of its neighbors that reach
+            into it. Sectors can therefore be generated in any order, in any process.
+        @param seed The world seed.
+        @param sector The (x, 0, z) sector to generate.
+        @param bounded Whether the world ends with walls at WIDTH_FROM_ORIGIN_IN_BLOCKS. Sectors of an unbounded world
+            can be generated anywhere, with the same density of hills, clouds and trees as inside the walls.
+        @return a tuple of the origin of the sector's volume and the volume
+        """
+        origin, volume = World._sector_terrain(seed, sector, bounded)
+        for neighbor in _neighbor_sectors(sector):
+            for cloud in _plan_clouds(seed, neighbor, bounded):
+                World.fill_cloud(volume, origin, *cloud)
+        for neighbor in _neighbor_sectors(sector):
+            for x, y, z in _plan_trees(seed, neighbor, bounded):
+                World.fill_tree(volume, origin, x, y, z, trunk_height=5)
+        return origin, volume
+
+    @staticmethod
+    def sectors_in_world() -> list[Position]:
+        """!
+        @brief Returns all the sectors containing generated blocks, clouds hanging over the walls included.
+        @return a list of (x, 0, z) sectors
+        """
+        w = World.WIDTH_FROM_ORIGIN_IN_BLOCKS + World.MAX_CLOUD_SIZE_IN_BLOCKS
+        sector_range = xrange(-w // SECTOR_SIZE_IN_BLOCKS, w // SECTOR_SIZE_IN_BLOCKS + 1)
+        return [(sector_x, 0, sector_z) for sector_x in sector_range for sector_z in sector_range]
+
+    @staticmethod
+    def generate_sectors(seed: int, sectors: list[Position], max_workers=None):
+        """!
+        @brief Generate `sectors` in a pool of worker processes.
+        @details The result does not depend on the number of workers. With a single worker, the sectors are generated
+            in the calling process.
+        @param seed The world seed.
+        @param sectors The (x, 0, z) sectors to generate.
+        @param max_workers The number of worker processes (default: the number of CPUs).
+        @return an iterator of pairs of volume origins and volumes, in the order of `sectors`
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers <= 1 or len(sectors) <= 1:
+            for sector in sectors:
+                yield World.generate_sector(seed, sector)
+            return
+        # Give every worker a few batches of neighboring sectors, so it can reuse the feature plans it caches.
+        chunksize = max(1, len(sectors) // (4 * max_workers))
+        # Spawn the workers rather than forking the game, which has a GL context and threads by now.
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            yield from executor.map(functools.partial(World.generate_sector, seed), sectors, chunksize=chunksize)
+
+
+def _neighbor_sectors(sector: Position) -> list[Position]:
+    """!
+    @brief Returns `sector` and the 8 sectors around it, in a fixed order.
+    @param sector The (x, 0, z) sector.
+    @return a list of (x, 0, z) sectors
+    """
+    sector_x, _, sector_z = sector
+    return [(sector_x + dx, 0, sector_z + dz) for dx in (-1, 0, 1) for dz in (-1, 0, 1)]
+
+
+def _sector_random_generator(seed: int, sector: Position, feature: int) -> np.random.Generator:
+    """!
+    @brief Returns the random generator used to plan one kind of feature in a sector.
+    @param seed The world seed.
+    @param sector The (x, 0, z) sector.
+    @param feature A number identifying the kind of feature, so that each kind gets its own random sequence.
+    @return a numpy random generator
+    """
+    sector_x, _, sector_z = sector
+    return np.random.default_rng([seed & MASK_32_BITS, feature, sector_x & MASK_32_BITS, sector_z & MASK_32_BITS])
+
+
+def _random_positions_in_sector(random_generator: np.random.Generator, sector: Position, count: int) -> list:
+    """!
+    @brief Returns `count` random (x, z) columns of `sector`.
+    """
+    xs = random_generator.integers(0, SECTOR_SIZE_IN_BLOCKS, count) + sector[0] * SECTOR_SIZE_IN_BLOCKS
+    zs = random_generator.integers(0, SECTOR_SIZE_IN_BLOCKS, count) + sector[2] * SECTOR_SIZE_IN_BLOCKS
+    return list(zip(xs.tolist(), zs.tolist()))
+
+
+@functools.lru_cache(maxsize=4096)
+def _plan_hills(seed: int, sector: Position, bounded: bool) -> tuple:
+    """!
+    @brief Plans the hills centered in `sector`, with the same density and shapes as World.generate_hills().
+    @param seed The world seed.
+    @param sector The (x, 0, z) sector.
+    @param bounded Whether hills must stay away from the walls of the world.
+    @return a tuple of World.fill_hill() arguments
+    """
+    random_generator = _sector_random_generator(seed, sector, 0)
+    game_margin = World.WIDTH_FROM_ORIGIN_IN_BLOCKS - 10
+    hills_per_block = World.NUM_HILLS / (2 * game_margin + 1) ** 2
+    hills = []
+    count = random_generator.poisson(hills_per_block * SECTOR_SIZE_IN_BLOCKS ** 2)
+    for x, z in _random_positions_in_sector(random_generator, sector, count):
+        height = int(random_generator.integers(1, 7))
+        side_length = int(random_generator.integers(4, 9))
+        block = (Block.GRASS, Block.SAND, Block.BRICK)[random_generator.integers(3)]
+        if not bounded or (abs(x) <= game_margin and abs(z) <= game_margin):
+            hills.append((x, z, height, side_length, block))
+    return tuple(hills)
+
+
+@functools.lru_cache(maxsize=4096)
+def _plan_clouds(seed: int, sector: Position, bounded: bool) -> tuple:
+    """!
+    @brief Plans the clouds centered in `sector`, with the same density and shapes as World.generate_clouds().
+    @param seed The world seed.
+    @param sector The (x, 0, z) sector.
+    @param bounded Whether clouds must be centered inside the walls of the world.
+    @return a tuple of World.fill_cloud() arguments
+    """
+    random_generator = _sector_random_generator(seed, sector, 1)
+    game_margin = World.WIDTH_FROM_ORIGIN_IN_BLOCKS
+    clouds_per_block = World.NUM_CLOUDS / (2 * game_margin + 1) ** 2
+    clouds = []
+    count = random_generator.poisson(clouds_per_block * SECTOR_SIZE_IN_BLOCKS ** 2)
+    for x, z in _random_positions_in_sector(random_generator, sector, count):
+        y = World.CLOUD_HEIGHTS_IN_BLOCKS[random_generator.integers(len(World.CLOUD_HEIGHTS_IN_BLOCKS))]
+        s = int(random_generator.integers(3, World.MAX_CLOUD_SIZE_IN_BLOCKS + 1))
+        cloud_color = (Block.LIGHT_CLOUD, Block.DARK_CLOUD)[random_generator.integers(2)]
+        if not bounded or (abs(x) <= game_margin and abs(z) <= game_margin):
+            clouds.append((x, y, z, s, cloud_color))
+    return tuple(clouds)
+
+
+@functools.lru_cache(maxsize=4096)
+def _plan_trees(seed: int, sector: Position, bounded: bool) -> tuple:
+    """!
+    @brief Plans the trees planted in `sector`, on ground level grass blocks with nothing above them.
+    @param seed The world seed.
+    @param sector The (x, 0, z) sector.
+    @param bounded Whether the world ends with walls at WIDTH_FROM_ORIGIN_IN_BLOCKS.
+    @return a tuple of (x, y, z) positions of the bottom of the tree trunks
+    """
+    random_generator = _sector_random_generator(seed, sector, 2)
+    trees_per_block = World.NUM_TREES / World.WIDTH_IN_BLOCKS ** 2
+    origin, terrain = World._sector_terrain(seed, sector, bounded)
+    suggested_places_for_trees = World.find_places_for_trees(terrain, origin)
+    count = min(random_generator.poisson(trees_per_block * SECTOR_SIZE_IN_BLOCKS ** 2), len(suggested_places_for_trees))
+    chosen = sorted(random_generator.choice(len(suggested_places_for_trees), count, replace=False).tolist())
+    return tuple((x, y + 1, z) for x, y, z in (suggested_places_for_trees[i] for i in chosen))
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from tempus_fugit_minecraft import world_storage
+from tempus_fugit_minecraft.block import Block
+from tempus_fugit_minecraft.chunked_world import ChunkedWorld
+from tempus_fugit_minecraft.world import SECTOR_SIZE_IN_BLOCKS, World
+
+# Generated worlds are cached as saved worlds, see `world_storage`, in one directory per cache key.
+CACHE_DIR_ENVIRONMENT_VARIABLE = 'TEMPUS_FUGIT_WORLD_CACHE_DIR'
+# The number of worlds kept in the cache, the least recently used ones are removed first.
+MAX_CACHED_WORLDS = 4
+# Temporary directories older than this were left by processes that died while saving a world.
+STALE_TEMPORARY_DIR_AGE_IN_SECONDS = 60 * 60
+TEMPORARY_DIR_PREFIX = '.generating-'
+
+
+def default_cache_dir() -> str:
+    """!
+    @brief Returns the directory generated worlds are cached in by default.
+    @details The directory is read from the TEMPUS_FUGIT_WORLD_CACHE_DIR environment variable, and defaults to
+        `tempus_fugit_minecraft/worlds` in the user's cache directory.
+    @return The path of the directory.
+    """
+    if os.environ.get(CACHE_DIR_ENVIRONMENT_VARIABLE):
+        return os.environ[CACHE_DIR_ENVIRONMENT_VARIABLE]
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'tempus_fugit_minecraft', 'worlds')
+
+
+def generator_parameters(seed: int) -> dict:
+    """!
+    @brief Returns everything the world generated from `seed` depends on.
+    @details The source of the generator is part of the parameters, so changing the generator never loads a world
+        generated by an older version of it. So are the table of block ids, which the cached chunks are made of, and
+        the version of numpy, whose random generators could give other terrain from the same seed.
+    @param seed : int The world seed.
+    @return parameters : dict
+    """
+    with open(os.path.join(os.path.dirname(__file__), 'world.py'), 'rb') as file:
+        generator_source_digest = hashlib.sha256(file.read()).hexdigest()
+    return {
+        'seed': seed,
+        'width_in_blocks': World.WIDTH_IN_BLOCKS,
+        'num_hills': World.NUM_HILLS,
+        'num_clouds': World.NUM_CLOUDS,
+        'num_trees': World.NUM_TREES,
+        'cloud_heights_in_blocks': list(World.CLOUD_HEIGHTS_IN_BLOCKS),
+        'max_cloud_size_in_blocks': World.MAX_CLOUD_SIZE_IN_BLOCKS,
+        'lowest_block_y_in_blocks': World.LOWEST_BLOCK_Y_IN_BLOCKS,
+        'highest_block_y_in_blocks': World.HIGHEST_BLOCK_Y_IN_BLOCKS,
+        'sector_size_in_blocks': SECTOR_SIZE_IN_BLOCKS,
+        'storage_format_version': world_storage.FORMAT_VERSION,
+        'generator_source': generator_source_digest,
+        'block_names': list(Block.__BLOCK_NAMES__),
+        'numpy_version': np.__version__,
+    }
+
+
+def cache_key(seed: int) -> str:
+    """!
+    @brief Returns the key of the world generated from `seed` in the cache, a digest of its generator parameters.
+    @param seed : int The world seed.
+    @return The key.
+    """
+    parameters = json.dumps(generator_parameters(seed), sort_keys=True)
+    return hashlib.sha256(parameters.encode()).hexdigest()
+
+
+def load_generated_world(world: ChunkedWorld, seed: int, cache_dir: str):
+    """!
+    @brief Replaces the blocks of `world` with the cached world generated from `seed`, if there is one.
+    @details The blocks are memory-mapped from the cache, copy-on-write, so editing the world never changes the cache.
+    @param world : ChunkedWorld The world to load the blocks into.
+    @param seed : int The world seed.
+    @param cache_dir : str The directory of the cache.
+    @return The sectors of the cached world, or None if the world is not in the cache.
+    """
+    path = os.path.join(cache_dir, cache_key(seed))
+    if not os.path.isdir(path):
+        return None
+    try:
+        level = world_storage.load_world(world, path)
+    except (OSError, ValueError):
+        world.clear()
+        return None
+    try:
+        # The modification time of the entry orders the cache by last use.
+        os.utime(path)
+    except OSError:
+        pass
+    return [tuple(sector) for sector in level['generated_sectors']]
+
+
+def store_generated_world(world: ChunkedWorld, seed: int, sectors: list, cache_dir: str) -> None:
+    """!
+    @brief Adds the world generated from `seed` to the cache.
+    @details The world is saved in a temporary directory that is renamed once it is complete, so processes that
+        generate the same world at the same time never see a partial world.
+    @param world : ChunkedWorld The freshly generated world.
+    @param seed : int The world seed.
+    @param sectors : list The sectors of the world.
+    @param cache_dir : str The directory of the cache.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, cache_key(seed))
+    temporary_path = tempfile.mkdtemp(dir=cache_dir, prefix=TEMPORARY_DIR_PREFIX)
+    world_storage.save_world(world, temporary_path, {
+        'generator_parameters': generator_parameters(seed),
+        'generated_sectors': sorted(sectors),
+    })
+    try:
+        os.rename(temporary_path, path)
+    except OSError:
+        # Another process cached the same world first.
+        shutil.rmtree(temporary_path, ignore_errors=True)
+    remove_stale_entries(cache_dir)
+
+
+def remove_stale_entries(cache_dir: str, max_cached_worlds: int = MAX_CACHED_WORLDS) -> None:
+    """!
+    @brief Removes the least recently used worlds from the cache, and the temporary directories of aborted saves.
+    @details Worlds are ordered by the modification time of their directory, which `load_generated_world` updates.
+        Temporary directories are only removed once they are old enough that no process can still be saving in them.
+    @param cache_dir : str The directory of the cache.
+    @param max_cached_worlds : int The number of worlds to keep.
+    """
+    now = time.time()
+    worlds = []
+    for entry in os.scandir(cache_dir):
+        try:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            modification_time = entry.stat(follow_symlinks=False).st_mtime
+        except OSError:
+            # Removed by another process in the meantime.
+            continue
+        if entry.name.startswith(TEMPORARY_DIR_PREFIX):
+            if now - modification_time > STALE_TEMPORARY_DIR_AGE_IN_SECONDS:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            worlds.append((modification_time, entry.path))
+    worlds.sort(reverse=True)
+    for _, path in worlds[max_cached_worlds:]:
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,238 @@
+import json
+import os
+import struct
+from typing import Iterator
+
+import numpy as np
+
+from tempus_fugit_minecraft.chunked_world import CHUNK_SIZE_IN_BLOCKS, ChunkedWorld
+from tempus_fugit_minecraft.world import Position
+
+# A saved world is a directory holding a small JSON file with the state of the game and one region file per square
+# of REGION_SIZE_IN_CHUNKS x REGION_SIZE_IN_CHUNKS columns of chunks.
+LEVEL_FILE_NAME = 'level.json'
+REGION_FILE_SUFFIX = '.region'
+REGION_SIZE_IN_CHUNKS = 8
+FORMAT_VERSION = 1
+SAVE_DIR_ENVIRONMENT_VARIABLE = 'TEMPUS_FUGIT_SAVE_DIR'
+
+# A region file starts with a header made of the magic bytes and the number of chunks in the file, followed by a
+# table giving the coordinates and the number of blocks of every chunk. The block ids of the chunks come next, as
+# fixed-size 16x16x16 `uint8` arrays in the order of the table, starting at the first page boundary after the table
+# so they can be memory-mapped and used as chunk arrays without being parsed or copied.
+REGION_MAGIC = b'TFREGION'
+REGION_HEADER = struct.Struct('<8sII')
+CHUNK_TABLE_DTYPE = np.dtype([('x', '<i4'), ('y', '<i4'), ('z', '<i4'), ('block_count', '<u4')])
+CHUNK_SIZE_IN_BYTES = CHUNK_SIZE_IN_BLOCKS ** 3
+PAGE_SIZE_IN_BYTES = 4096
+
+
+def default_save_dir() -> str:
+    """!
+    @brief Returns the directory the game saves its world in by default.
+    @details The directory is read from the TEMPUS_FUGIT_SAVE_DIR environment variable, and defaults to
+        `tempus_fugit_minecraft/save` in the user's data directory.
+    @return The path of the directory.
+    """
+    if os.environ.get(SAVE_DIR_ENVIRONMENT_VARIABLE):
+        return os.environ[SAVE_DIR_ENVIRONMENT_VARIABLE]
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(data_home, 'tempus_fugit_minecraft', 'save')
+
+
+def region_of(chunk: Position) -> tuple[int, int]:
+    """!
+    @brief Returns the (x, z) coordinates of the region containing `chunk`.
+    @param chunk : tuple of len 3 The coordinates of the chunk.
+    @return region : tuple of len 2
+    """
+    cx, _, cz = chunk
+    return cx // REGION_SIZE_IN_CHUNKS, cz // REGION_SIZE_IN_CHUNKS
+
+
+def region_file_name(region: tuple[int, int]) -> str:
+    """!
+    @brief Returns the name of the file of `region` inside a saved world.
+    @param region : tuple of len 2 The (x, z) coordinates of the region.
+    @return The file name.
+    """
+    return f'r.{region[0]}.{region[1]}{REGION_FILE_SUFFIX}'
+
+
+def _data_offset(chunk_count: int) -> int:
+    """!
+    @brief Returns the offset of the first chunk array of a region file, the end of the table rounded up to a page.
+    @param chunk_count : int The number of chunks in the region file.
+    @return The offset in bytes.
+    """
+    table_end = REGION_HEADER.size + chunk_count * CHUNK_TABLE_DTYPE.itemsize
+    return -(-table_end // PAGE_SIZE_IN_BYTES) * PAGE_SIZE_IN_BYTES
+
+
+def _replace_file(path: str, write) -> None:
+    """!
+    @brief Writes a file next to `path` and renames it to `path` once it is complete.
+    @details The file that was at `path` is never modified, so worlds loaded from it and still mapped in memory keep
+        reading their original content, and a crash during a save leaves the previous save intact.
+    @param path : str The path of the file to write.
+    @param write Callable writing the content of the file to the file object it is given.
+    """
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        write(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+def write_region(path: str, chunks: list[tuple[Position, np.ndarray, int]]) -> None:
+    """!
+    @brief Writes a region file.
+    @param path : str The path of the region file.
+    @param chunks A list of (chunk coordinates, chunk array, number of blocks of the chunk) triples.
+    """
+    table = np.zeros(len(chunks), dtype=CHUNK_TABLE_DTYPE)
+    for i, ((cx, cy, cz), _, block_count) in enumerate(chunks):
+        table[i] = (cx, cy, cz, block_count)
+
+    def write(file):
+        file.write(REGION_HEADER.pack(REGION_MAGIC, FORMAT_VERSION, len(chunks)))
+        file.write(table.tobytes())
+        file.write(bytes(_data_offset(len(chunks)) - file.tell()))
+        for _, array, _ in chunks:
+            file.write(np.ascontiguousarray(array, dtype=np.uint8).tobytes())
+
+    _replace_file(path, write)
+
+
+def read_region(path: str) -> Iterator[tuple[Position, np.ndarray, int]]:
+    """!
+    @brief Maps a region file in memory and returns its chunks.
+    @details The chunk arrays are copy-on-write views of the mapped file: the blocks are read from the disk when they
+        are first accessed, and changing them never changes the file.
+    @param path : str The path of the region file.
+    @return An iterator of (chunk coordinates, chunk array, number of blocks of the chunk) triples.
+    """
+    if os.path.getsize(path) < REGION_HEADER.size:
+        raise ValueError(f"{path} is not a region file")
+    data = np.memmap(path, dtype=np.uint8, mode='c')
+    magic, version, chunk_count = REGION_HEADER.unpack(data[:REGION_HEADER.size].tobytes())
+    if magic != REGION_MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} region file")
+    table_end = REGION_HEADER.size + chunk_count * CHUNK_TABLE_DTYPE.itemsize
+    table = np.frombuffer(data[REGION_HEADER.size:table_end].tobytes(), dtype=CHUNK_TABLE_DTYPE)
+    offset = _data_offset(chunk_count)
+    arrays = data[offset:offset + chunk_count * CHUNK_SIZE_IN_BYTES].reshape(
+        (chunk_count, CHUNK_SIZE_IN_BLOCKS, CHUNK_SIZE_IN_BLOCKS, CHUNK_SIZE_IN_BLOCKS))
+    for (x, y, z, block_count), array in zip(table.tolist(), arrays):
+        yield (x, y, z), array, block_count
+
+
+def collect_regions(world: ChunkedWorld, regions=None, copy=False) -> dict:
+    """!
+    @brief Groups the chunks of `world` by region.
+    @param world : ChunkedWorld The world to read the chunks from.
+    @param regions An iterable of the (x, z) coordinates of the regions to collect, or None to collect all the regions
+        of the world. Regions without any chunk are given an empty list.
+    @param copy : bool Whether to copy the chunk arrays, so they can be written while the world keeps changing.
+    @return A mapping from region coordinates to lists of (chunk coordinates, chunk array, number of blocks of the
+        chunk) triples, sorted by chunk coordinates.
+    """
+    collected = {region: [] for region in regions} if regions is not None else {}
+    for chunk, array in world.chunks.items():
+        region = region_of(chunk)
+        if regions is None:
+            collected.setdefault(region, [])
+        elif region not in collected:
+            continue
+        collected[region].append((chunk, array.copy() if copy else array, world.block_count(chunk)))
+    for chunks in collected.values():
+        chunks.sort(key=lambda item: item[0])
+    return collected
+
+
+def write_regions(path: str, regions: dict) -> None:
+    """!
+    @brief Writes region files, and removes the files of the regions that no longer have any chunk.
+    @param path : str The directory of the saved world.
+    @param regions A mapping from region coordinates to lists of chunks, see `collect_regions()`.
+    """
+    for region, chunks in regions.items():
+        region_path = os.path.join(path, region_file_name(region))
+        if chunks:
+            write_region(region_path, chunks)
+        elif os.path.exists(region_path):
+            os.remove(region_path)
+
+
+def remove_other_regions(path: str, regions) -> None:
+    """!
+    @brief Removes the region files of a saved world whose regions are not in `regions`.
+    @param path : str The directory of the saved world.
+    @param regions An iterable of the (x, z) coordinates of the regions to keep.
+    """
+    names = {region_file_name(region) for region in regions}
+    for name in os.listdir(path):
+        if name.endswith(REGION_FILE_SUFFIX) and name not in names:
+            os.remove(os.path.join(path, name))
+
+
+def write_level(path: str, level: dict) -> None:
+    """!
+    @brief Writes the state of the game of a saved world.
+    @param path : str The directory of the saved world.
+    @param level : dict The state of the game, which must be serializable to JSON.
+    """
+    level = dict(level, version=FORMAT_VERSION)
+    _replace_file(os.path.join(path, LEVEL_FILE_NAME), lambda file: file.write(json.dumps(level).encode()))
+
+
+def read_level(path: str) -> dict:
+    """!
+    @brief Reads the state of the game of a saved world.
+    @param path : str The directory of the saved world.
+    @return The state of the game saved with the world.
+    """
+    with open(os.path.join(path, LEVEL_FILE_NAME), 'rb') as file:
+        level = json.loads(file.read())
+    if level.get('version') != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} saved world")
+    return level
+
+
+def save_world(world: ChunkedWorld, path: str, level: dict) -> None:
+    """!
+    @brief Saves the blocks of `world` and the state of the game in the directory `path`.
+    @param world : ChunkedWorld The blocks to save.
+    @param path : str The directory of the saved world, created if it does not exist.
+    @param level : dict The state of the game, which must be serializable to JSON.
+    """
+    os.makedirs(path, exist_ok=True)
+    regions = collect_regions(world)
+    write_regions(path, regions)
+    remove_other_regions(path, regions)
+    write_level(path, level)
+
+
+def is_saved_world(path: str) -> bool:
+    """!
+    @brief Returns whether the directory `path` holds a saved world.
+    @param path : str The directory.
+    @return boolean
+    """
+    return os.path.isfile(os.path.join(path, LEVEL_FILE_NAME))
+
+
+def load_world(world: ChunkedWorld, path: str) -> dict:
+    """!
+    @brief Replaces the blocks of `world` with the blocks saved in the directory `path`.
+    @param world : ChunkedWorld The world to load the blocks into.
+    @param path : str The directory of the saved world.
+    @return The state of the game saved with the world.
+    """
+    level = read_level(path)
+    world.clear()
+    for name in sorted(os.listdir(path)):
+        if name.endswith(REGION_FILE_SUFFIX):
+            world.insert_chunks(read_region(os.path.join(path, name)))
+    return level
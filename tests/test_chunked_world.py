@@ -0,0 +1,158 @@
+import numpy as np
+import pytest
+
+from tempus_fugit_minecraft.block import Block
+from tempus_fugit_minecraft.utilities import FACES
+from tempus_fugit_minecraft.chunked_world import ALL_NEIGHBORS, ChunkedWorld, chunk_of, neighbor_masks
+
+
+@pytest.fixture()
+def world():
+    yield ChunkedWorld()
+
+
+class TestChunkedWorld:
+    def test_set_and_get_block(self, world):
+        world[(1, 2, 3)] = Block.BRICK
+        assert world[(1, 2, 3)] is Block.BRICK
+        assert world.get((1, 2, 3)) is Block.BRICK
+        assert (1, 2, 3) in world
+        assert len(world) == 1
+
+    def test_missing_block(self, world):
+        assert (0, 0, 0) not in world
+        assert world.get((0, 0, 0)) is None
+        with pytest.raises(KeyError):
+            world[(0, 0, 0)]
+
+    def test_negative_positions_are_stored_in_their_own_chunk(self, world):
+        world[(-1, -1, -1)] = Block.SAND
+        world[(0, 0, 0)] = Block.GRASS
+        assert chunk_of((-1, -1, -1)) == (-1, -1, -1)
+        assert set(world.chunks) == {(-1, -1, -1), (0, 0, 0)}
+        assert world[(-1, -1, -1)] is Block.SAND
+
+    def test_replacing_a_block_does_not_change_the_length(self, world):
+        world[(5, 5, 5)] = Block.GRASS
+        world[(5, 5, 5)] = Block.STONE
+        assert len(world) == 1
+        assert world[(5, 5, 5)] is Block.STONE
+
+    def test_removing_the_last_block_drops_the_chunk(self, world):
+        world[(20, 0, 0)] = Block.GRASS
+        del world[(20, 0, 0)]
+        assert len(world) == 0
+        assert world.chunks == {}
+        with pytest.raises(KeyError):
+            del world[(20, 0, 0)]
+
+    def test_items_and_iteration_match_a_dict(self, world):
+        blocks = {(0, 0, 0): Block.GRASS, (17, -3, 40): Block.STONE, (-30, 25, 2): Block.LIGHT_CLOUD}
+        for position, block in blocks.items():
+            world[position] = block
+        assert dict(world.items()) == blocks
+        assert set(world) == set(blocks)
+
+    def test_clear(self, world):
+        world[(0, 0, 0)] = Block.GRASS
+        world.clear()
+        assert len(world) == 0
+        assert (0, 0, 0) not in world
+
+    def test_is_exposed_inside_a_chunk(self, world):
+        for x in range(3):
+            for y in range(3):
+                for z in range(3):
+                    world[(x + 4, y + 4, z + 4)] = Block.STONE
+        assert not world.is_exposed((5, 5, 5))
+        assert world.is_exposed((4, 5, 5))
+
+    def test_is_exposed_across_chunk_borders(self, world):
+        for x in range(-1, 2):
+            for y in range(-1, 2):
+                for z in range(-1, 2):
+                    world[(x, y, z)] = Block.STONE
+        assert not world.is_exposed((0, 0, 0))
+        del world[(-1, 0, 0)]
+        assert world.is_exposed((0, 0, 0))
+
+    def test_chunks_use_one_byte_per_block(self, world):
+        world[(0, 0, 0)] = Block.GRASS
+        assert world.nbytes == 16 * 16 * 16
+
+    def test_heightmap_follows_added_and_removed_blocks(self, world):
+        world[(3, -2, 4)] = Block.GRASS
+        world[(3, 20, 4)] = Block.LIGHT_CLOUD
+        assert world.top_block_y(3, 4) == 20
+        assert world.top_block_y(3, 4, solid=True) == -2
+        world[(3, 5, 4)] = Block.BRICK
+        assert world.top_block_y(3, 4, solid=True) == 5
+        del world[(3, 20, 4)]
+        assert world.top_block_y(3, 4) == 5
+        world[(3, 5, 4)] = Block.TREE_LEAVES
+        assert world.top_block_y(3, 4, solid=True) == -2
+        del world[(3, -2, 4)]
+        assert world.top_block_y(3, 4, solid=True) is None
+        assert world.top_block_y(0, 0) is None
+
+    def test_heightmap_of_inserted_volumes(self, world):
+        volume = np.zeros((2, 40, 2), dtype=np.uint8)
+        volume[:, 0, :] = Block.STONE.id
+        volume[1, 30, 1] = Block.DARK_CLOUD.id
+        world.insert_volume((-1, -3, -1), volume)
+        assert world.top_block_y(-1, -1) == -3
+        assert world.top_block_y(0, 0) == 27
+        assert world.top_block_y(0, 0, solid=True) == -3
+        assert sorted(world.iter_column_tops()) == [(-1, -3, -1), (-1, -3, 0), (0, -3, -1), (0, 27, 0)]
+        world.discard_chunk((0, 1, 0))
+        assert world.top_block_y(0, 0) == -3
+
+    def test_exposed_positions_in_chunk_match_is_exposed(self, world):
+        for x in range(-2, 18):
+            for y in range(-2, 3):
+                for z in range(-1, 17):
+                    if (x * 7 + y * 3 + z) % 5:
+                        world[(x, y, z)] = Block.STONE
+        exposed = set(world.exposed_positions_in_chunk((0, 0, 0)))
+        assert exposed == {position for position in world.positions_in_chunk((0, 0, 0))
+                           if world.is_exposed(position)}
+        assert world.exposed_positions_in_chunk((5, 5, 5)) == []
+
+    def test_neighbor_mask_follows_added_and_removed_blocks(self, world):
+        world[(0, 0, 0)] = Block.STONE
+        assert world.neighbor_mask((0, 0, 0)) == 0
+        for face, (dx, dy, dz) in enumerate(FACES):
+            world[(dx, dy, dz)] = Block.STONE
+            assert world.neighbor_mask((0, 0, 0)) == (2 << face) - 1
+        assert world.neighbor_mask((0, 0, 0)) == ALL_NEIGHBORS and world.exposed_faces((0, 0, 0)) == 0
+        del world[FACES[0]]
+        assert world.exposed_faces((0, 0, 0)) == 1 and world.is_exposed((0, 0, 0))
+        assert world.neighbor_mask((5, 0, 0)) == 0
+
+    def test_neighbor_masks_stay_equal_to_recomputed_ones(self, world):
+        rng = np.random.default_rng(3)
+        volume = rng.integers(0, 3, size=(20, 20, 20), dtype=np.uint8)
+        world.insert_volume((-2, -2, -2), volume)
+        for chunk in list(world.chunks):
+            world.neighbor_mask_array(chunk)
+        for x, y, z in rng.integers(-3, 19, size=(300, 3)).tolist():
+            if (x, y, z) in world:
+                del world[(x, y, z)]
+            else:
+                world[(x, y, z)] = Block.BRICK
+        world.discard_chunk((-1, -1, -1))
+        world.insert_volume((14, 0, 0), np.ones((4, 4, 4), dtype=np.uint8))
+        for chunk in world.chunks:
+            assert np.array_equal(world.neighbor_mask_array(chunk), neighbor_masks(world.padded_chunk(chunk)))
+
+    def test_write_volume_removes_blocks_and_drops_empty_chunks(self, world):
+        world[(3, 3, 3)] = Block.STONE
+        world[(20, 0, 0)] = Block.GRASS
+        volume = np.zeros((20, 4, 4), dtype=np.uint8)
+        volume[:2, 0, 0] = Block.BRICK.id
+        assert world.write_volume((2, 0, 0), volume, volume == 0) == [(0, 0, 0), (1, 0, 0)]
+        assert dict(world.items()) == {}
+        assert world.chunks == {} and world.top_block_y(3, 3) is None
+        world.write_volume((2, 0, 0), volume, volume != 0)
+        assert world.read_volume((1, 0, 0), (4, 1, 1)).reshape(-1).tolist() == [0, Block.BRICK.id, Block.BRICK.id, 0]
+        assert len(world) == 2 and world.top_block_y(3, 0) == 0
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pytest
+
+from tempus_fugit_minecraft.block import Block
+from tempus_fugit_minecraft.chunked_world import ChunkedWorld
+from tempus_fugit_minecraft.edit_journal import EditJournal, journal_file_name, journal_generations, read_edits
+from tempus_fugit_minecraft.world_storage import load_world, read_level, region_file_name, save_world
+
+
+@pytest.fixture()
+def world():
+    world = ChunkedWorld()
+    world[(0, 0, 0)] = Block.GRASS
+    yield world
+
+
+class TestEditJournal:
+    def test_edits_are_written_in_order(self, tmp_path):
+        journal = EditJournal(tmp_path)
+        journal.record_set((1, 2, 3), Block.BRICK.id)
+        journal.record_remove((1, 2, 3))
+        journal.record_set((-4, 5, -6), Block.SAND.id)
+        journal.close()
+        assert list(read_edits(tmp_path, 0)) == [((1, 2, 3), Block.BRICK.id), ((1, 2, 3), 0),
+                                                  ((-4, 5, -6), Block.SAND.id)]
+
+    def test_record_volume_writes_one_record_per_written_position(self, tmp_path):
+        journal = EditJournal(tmp_path)
+        volume = np.zeros((2, 1, 2), dtype=np.uint8)
+        volume[1, 0, :] = Block.BRICK.id
+        where = np.ones(volume.shape, dtype=bool)
+        where[0, 0, 1] = False
+        journal.record_volume((15, -1, 0), volume, where)
+        assert journal.dirty_chunks == {(0, -1, 0), (1, -1, 0)}
+        journal.close()
+        assert list(read_edits(tmp_path, 0)) == [((15, -1, 0), 0), ((16, -1, 0), Block.BRICK.id),
+                                                  ((16, -1, 1), Block.BRICK.id)]
+
+    def test_edits_are_written_after_a_batch_window(self, tmp_path):
+        journal = EditJournal(tmp_path, batch_interval_in_seconds=0.01)
+        journal.record_set((1, 2, 3), Block.BRICK.id)
+        for _ in range(500):
+            if os.path.getsize(os.path.join(tmp_path, journal_file_name(0))):
+                break
+            journal._thread.join(0.01)
+        assert list(read_edits(tmp_path, 0)) == [((1, 2, 3), Block.BRICK.id)]
+        journal.close()
+
+    def test_a_record_cut_short_by_a_crash_is_ignored(self, tmp_path):
+        journal = EditJournal(tmp_path)
+        journal.record_set((1, 2, 3), Block.BRICK.id)
+        journal.close()
+        with open(os.path.join(tmp_path, journal_file_name(0)), 'ab') as file:
+            file.write(b'\x01\x00')
+        assert list(read_edits(tmp_path, 0)) == [((1, 2, 3), Block.BRICK.id)]
+
+    def test_snapshot_writes_the_changed_regions_and_starts_a_new_journal(self, world, tmp_path):
+        save_world(world, tmp_path, {'journal_generation': 0})
+        journal = EditJournal(tmp_path, snapshot_interval_in_seconds=0)
+        assert not journal.snapshot_due()
+        world[(200, 0, 0)] = Block.BRICK
+        journal.record_set((200, 0, 0), Block.BRICK.id)
+        assert journal.snapshot_due()
+        journal.snapshot(world, {'seed': 1})
+        world[(201, 0, 0)] = Block.SAND
+        journal.record_set((201, 0, 0), Block.SAND.id)
+        journal.wait_for_snapshot()
+        journal.close()
+        assert journal_generations(tmp_path) == [1]
+        assert read_level(tmp_path)['journal_generation'] == 1
+        snapshot = ChunkedWorld()
+        load_world(snapshot, tmp_path)
+        assert snapshot[(200, 0, 0)] is Block.BRICK and (201, 0, 0) not in snapshot
+        assert list(read_edits(tmp_path, 1)) == [((201, 0, 0), Block.SAND.id)]
+
+    def test_snapshot_of_everything_replaces_the_save(self, world, tmp_path):
+        world[(200, 0, 0)] = Block.BRICK
+        save_world(world, tmp_path, {'journal_generation': 0})
+        del world[(200, 0, 0)]
+        world[(-200, 0, 0)] = Block.SAND
+        journal = EditJournal(tmp_path, 1)
+        journal.snapshot(world, {'seed': 1}, everything=True)
+        journal.close()
+        assert journal_generations(tmp_path) == [2]
+        assert read_level(tmp_path)['journal_generation'] == 2
+        assert not os.path.exists(os.path.join(tmp_path, region_file_name((1, 0))))
+        snapshot = ChunkedWorld()
+        load_world(snapshot, tmp_path)
+        assert dict(snapshot.items()) == dict(world.items())
@@ -0,0 +1,28 @@
+import pytest
+
+from tempus_fugit_minecraft.frame_budget import FrameBudget
+
+
+class TestFrameBudget:
+    def test_the_budget_is_what_the_rest_of_the_frame_leaves_of_the_target(self):
+        budget = FrameBudget(target=0.020, min_budget=0.002, max_budget=0.015)
+        assert budget.next_budget() == 0.015
+        budget.record('draw', 0.010)
+        budget.record('update', 0.002)
+        assert budget.next_budget() == pytest.approx(0.008)
+        budget.record('draw', 0.030)
+        assert budget.averages['draw'] == pytest.approx(0.012)
+        assert budget.next_budget() == pytest.approx(0.006)
+        budget.record('draw', 1.0)
+        assert budget.next_budget() == 0.002
+
+    def test_stats_report_how_the_queue_used_its_budget(self):
+        budget = FrameBudget(target=0.020, min_budget=0.002, max_budget=0.015)
+        budget.record('draw', 0.010)
+        budget.next_budget()
+        budget.record_queue(0.012, 3)
+        budget.record_queue(0.005, 1)
+        stats = budget.stats()
+        assert stats['draw'] == 0.010 and stats['budget'] == pytest.approx(0.010)
+        assert (stats['queue_time'], stats['queue_calls'], stats['overruns'], stats['frames']) == (0.005, 1, 1, 2)
+        assert stats['average_queue_time'] == pytest.approx(0.1 * 0.9 * 0.012 + 0.1 * 0.005)
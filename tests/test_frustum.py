@@ -0,0 +1,35 @@
+import numpy as np
+
+from tempus_fugit_minecraft import frustum
+
+
+def planes_for(position, rotation_in_degrees, aspect_ratio=4 / 3):
+    projection = frustum.perspective_matrix(frustum.FIELD_OF_VIEW_IN_DEGREES, aspect_ratio,
+                                            frustum.NEAR_PLANE_DISTANCE, frustum.FAR_PLANE_DISTANCE)
+    return frustum.frustum_planes(projection @ frustum.view_matrix(position, rotation_in_degrees))
+
+
+def visible(planes, *centers):
+    centers = np.array(centers, dtype=np.float64)
+    return frustum.boxes_in_frustum(planes, centers - 0.5, centers + 0.5).tolist()
+
+
+class TestFrustum:
+    def test_boxes_in_front_are_visible_and_boxes_behind_are_not(self):
+        planes = planes_for((0, 0, 0), (0, 0))
+        assert visible(planes, (0, 0, -10), (0, 0, 10), (-30, 0, -10), (0, 0, -100)) == [True, False, False, False]
+
+    def test_turning_around_the_y_axis_turns_the_frustum(self):
+        planes = planes_for((5, 2, 5), (90, 0))
+        assert visible(planes, (15, 2, 5), (-5, 2, 5)) == [True, False]
+
+    def test_looking_up_hides_the_ground_in_front(self):
+        planes = planes_for((0, 2, 0), (0, 90))
+        assert visible(planes, (0, 20, 0), (0, -2, -10)) == [True, False]
+
+    def test_a_box_around_the_frustum_is_visible(self):
+        planes = planes_for((0, 0, 0), (0, 0))
+        assert frustum.boxes_in_frustum(planes, np.array([[-100.0, -100, -100]]), np.array([[100.0, 100, 100]]))[0]
+
+    def test_rotation_matrix_turns_like_gl_rotate(self):
+        assert np.allclose(frustum.rotation_matrix(90, (0, 1, 0)) @ [1, 0, 0, 1], [0, 0, -1, 1])
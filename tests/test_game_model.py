@@ -1,10 +1,16 @@
+import random
+import time
+
+import numpy as np
 import pyglet
 import pytest
 from unittest.mock import Mock
 from unittest.mock import patch
+from tempus_fugit_minecraft import frustum, world_storage
 from tempus_fugit_minecraft.game_model import GameModel
 from tempus_fugit_minecraft.player import Player
 from tempus_fugit_minecraft.block import Block
+from tempus_fugit_minecraft.utilities import FACES
 from tempus_fugit_minecraft.world import World
 
 
@@ -250,9 +256,391 @@ class TestGameModel:
         game_model.update(1)
         assert game_model.sector is not None
 
+    def test_find_spawn_position_stands_on_the_top_solid_block(self, game_model: GameModel):
+        game_model.world[(2, -2, 3)] = Block.GRASS
+        game_model.world[(2, 20, 3)] = Block.LIGHT_CLOUD
+        assert game_model.find_spawn_position(2, 3) == (2, 0, 3)
+        assert game_model.find_spawn_position(0, 0) is None
+
+    def test_removing_a_block_rebuilds_the_neighbor_sectors(self, game_model: GameModel):
+        game_model.world[(-1, 0, 0)] = Block.STONE
+        game_model.world[(0, 0, 0)] = Block.STONE
+        game_model.show_sector((-1, 0, 0))
+        game_model.show_sector((0, 0, 0))
+        game_model.process_entire_queue()
+        assert game_model._shown[(-1, 0, 0)][0].index_count == 5 * 6
+        game_model.remove_block((0, 0, 0))
+        assert game_model._shown[(-1, 0, 0)][0].index_count == 6 * 6
+        assert (0, 0, 0) not in game_model._shown
+        game_model.hide_sector((-1, 0, 0))
+        game_model.process_entire_queue()
+
+    def test_greedy_meshing_merges_the_faces_of_a_flat_layer(self):
+        model = GameModel(lazy_generation=True, greedy_meshing=True)
+        for x in range(16):
+            for z in range(16):
+                model.world[(x, 0, z)] = Block.GRASS
+        model.show_sector((0, 0, 0))
+        model.process_entire_queue()
+        vertex_lists = model._shown[(0, 0, 0)]
+        assert sorted(vertex_list.index_count for vertex_list in vertex_lists) == [6, 6, 4 * 6]
+        assert len(model._tile_groups) == 3
+
+    def test_far_sectors_get_simplified_meshes(self, game_model: GameModel):
+        game_model.view_distance_in_sectors = 2
+        game_model.lod_distance_in_sectors = 1
+        for x in range(32, 48):
+            for z in range(16):
+                game_model.world[(x, 0, z)] = Block.SAND
+        game_model.change_sectors(None, (0, 0, 0))
+        game_model.process_entire_queue()
+        assert game_model._shown[(2, 0, 0)][0].index_count == (2 * 8 * 8 + 4 * 8) * 6
+        game_model.change_sectors((0, 0, 0), (1, 0, 0))
+        game_model.process_entire_queue()
+        assert game_model._shown[(2, 0, 0)][0].index_count == (2 * 16 * 16 + 4 * 16) * 6
+        game_model.change_sectors((1, 0, 0), None)
+        game_model.process_entire_queue()
+        game_model.view_distance_in_sectors = 4
+        game_model.lod_distance_in_sectors = None
+
+    def test_set_view_distance_shows_and_hides_sectors(self):
+        model = GameModel(lazy_generation=True, vertical_sectors=True, mesh_workers=0, view_distance_in_sectors=1,
+                          vertical_view_distance_in_sectors=0)
+        model.lazy_generation = False
+        for position in [(0, 0, 0), (0, 40, 0), (40, 0, 0)]:
+            model.world[position] = Block.STONE
+        model.change_sectors(None, (0, 0, 0))
+        model.process_entire_queue()
+        assert set(model._shown) == {(0, 0, 0)}
+        model.set_view_distance(1, 2)
+        model.process_entire_queue()
+        assert set(model._shown) == {(0, 0, 0), (0, 2, 0)}
+        model.set_view_distance(2, 0)
+        model.process_entire_queue()
+        assert set(model._shown) == {(0, 0, 0), (2, 0, 0)}
+        model.change_sectors((0, 0, 0), (1, 0, 0))
+        model.process_entire_queue()
+        assert set(model._shown) == {(0, 0, 0), (2, 0, 0)}
+
+    def test_process_queue_stops_at_the_frame_budget(self, game_model: GameModel):
+        calls = []
+        for sector in range(5):
+            game_model._enqueue((sector, 0, 0), lambda: calls.append(time.sleep(0.005)))
+        game_model.frame_budget.averages.clear()
+        game_model.frame_budget.record('draw', game_model.frame_budget.target - 0.008)
+        game_model.process_queue()
+        stats = game_model.frame_stats()
+        assert stats['budget'] == pytest.approx(0.008) and stats['queue_calls'] == len(calls) == 2
+        game_model.process_entire_queue()
+        game_model.frame_budget.averages.clear()
+
+    def test_meshes_built_in_the_background_are_uploaded_by_process_queue(self, game_model: GameModel):
+        game_model.world[(0, 0, 0)] = Block.STONE
+        game_model.show_sector((0, 0, 0))
+        game_model._dequeue()
+        future = game_model._mesh_futures[(0, 0, 0)]
+        future.result()
+        assert (0, 0, 0) not in game_model._shown
+        game_model.process_queue()
+        assert game_model._shown[(0, 0, 0)][0].index_count == 6 * 6
+        assert not game_model._mesh_futures
+        game_model.hide_sector((0, 0, 0))
+        game_model.process_entire_queue()
+
+    def test_meshes_built_in_the_background_do_not_replace_newer_meshes(self, game_model: GameModel):
+        game_model.world[(0, 0, 0)] = Block.STONE
+        game_model.show_sector((0, 0, 0))
+        game_model._dequeue()
+        future = game_model._mesh_futures[(0, 0, 0)]
+        game_model.add_block((1, 0, 0), Block.STONE)
+        future.result()
+        game_model.process_entire_queue()
+        assert game_model._shown[(0, 0, 0)][0].index_count == 10 * 6
+        game_model.hide_sector((0, 0, 0))
+        game_model.process_entire_queue()
+
+    def test_vertex_lists_in_frustum_skip_the_sectors_behind(self, game_model: GameModel):
+        game_model.world[(0, 0, -20)] = Block.STONE
+        game_model.world[(0, 0, 20)] = Block.STONE
+        game_model.show_sector((0, 0, -2))
+        game_model.show_sector((0, 0, 1))
+        game_model.process_entire_queue()
+        projection = frustum.perspective_matrix(frustum.FIELD_OF_VIEW_IN_DEGREES, 4 / 3, frustum.NEAR_PLANE_DISTANCE,
+                                                frustum.FAR_PLANE_DISTANCE)
+        planes = frustum.frustum_planes(projection @ frustum.view_matrix((0, 0, 0), (0, 0)))
+        assert game_model.vertex_lists_in_frustum(planes) == game_model._shown[(0, 0, -2)]
+        game_model.hide_sector((0, 0, -2))
+        game_model.hide_sector((0, 0, 1))
+        game_model.process_entire_queue()
+
+    def test_column_sectors_do_no_connectivity_work(self):
+        model = GameModel(lazy_generation=True, mesh_workers=0, view_distance_in_sectors=2)
+        model.world.insert_volume((-16, 0, -16), np.full((48, 32, 48), Block.STONE.id, dtype=np.uint8))
+        model.lazy_generation = False
+        model.change_sectors(None, (0, 0, 0))
+        model.process_entire_queue()
+        vertex_lists = model.vertex_lists_in_frustum(np.array([(0, 0, 0, 1)] * 6))
+        assert len(vertex_lists) == sum(len(lists) for lists in model._shown.values()) > 0
+        assert model.visible_sectors() == model._sectors_in_range((0, 0, 0))
+        assert not model.queue and not model._connectivity and not model._pending_connectivity
+
+    def test_vertex_lists_of_sectors_closed_off_from_the_player_are_skipped(self):
+        model = GameModel(lazy_generation=True, vertical_sectors=True, mesh_workers=0, view_distance_in_sectors=2)
+        volume = np.full((48, 48, 48), Block.STONE.id, dtype=np.uint8)
+        volume[20:28, 20:28, 20:28] = 0
+        model.world.insert_volume((-16, -16, -16), volume)
+        model.world[(40, 0, 0)] = Block.SAND
+        model.lazy_generation = False
+        model.change_sectors(None, (0, 0, 0))
+        model.process_entire_queue()
+        everywhere = np.array([(0, 0, 0, 1)] * 6)
+        assert (2, 0, 0) in model.visible_sectors()
+        model.process_entire_queue()
+        neighbors = {(dx, dy, dz) for dx, dy, dz in FACES}
+        assert model.visible_sectors() == {(0, 0, 0)} | neighbors
+        vertex_lists = model.vertex_lists_in_frustum(everywhere)
+        assert vertex_lists == [vertex_list for sector in model._shown if sector in model.visible_sectors()
+                                for vertex_list in model._shown[sector]]
+        assert model._shown[(2, 0, 0)][0] not in vertex_lists
+        model.occlusion_culling = False
+        assert model._shown[(2, 0, 0)][0] in model.vertex_lists_in_frustum(everywhere)
+
+    def test_queue_serves_the_sectors_in_front_of_the_player_first(self, game_model: GameModel):
+        game_model.player.position_in_blocks_from_origin = (8, 0, 8)
+        game_model.player.rotation_in_degrees = (90, 0)
+        game_model._refocus_queue()
+        for sector in [(-2, 0, 0), (3, 0, 0), (0, 0, 1), (1, 0, 0)]:
+            game_model._request_mesh(sector, False)
+        assert game_model.queue.sectors() == [(1, 0, 0), (0, 0, 1), (3, 0, 0), (-2, 0, 0)]
+        game_model.player.position_in_blocks_from_origin = (56, 0, 8)
+        game_model.player.rotation_in_degrees = (-90, 0)
+        game_model._refocus_queue()
+        assert game_model.queue.sectors() == [(3, 0, 0), (1, 0, 0), (0, 0, 1), (-2, 0, 0)]
+        game_model.process_entire_queue()
+        game_model.player.position_in_blocks_from_origin = (0, 0, 0)
+        game_model.player.rotation_in_degrees = (0, 0)
+
+    def test_going_back_and_forth_across_a_sector_border_costs_nothing(self, game_model: GameModel):
+        game_model.world[(80, 0, 0)] = Block.STONE
+        game_model.change_sectors(None, (1, 0, 0))
+        game_model.process_entire_queue()
+        vertex_lists = game_model._shown[(5, 0, 0)]
+        with patch.object(game_model, 'show_sector') as show_sector, \
+                patch.object(game_model, 'hide_sector') as hide_sector:
+            for _ in range(3):
+                game_model.change_sectors((1, 0, 0), (0, 0, 0))
+                assert game_model.queue_length() == 18
+                game_model.change_sectors((0, 0, 0), (1, 0, 0))
+                assert game_model.queue_length() == 0
+            game_model.process_entire_queue()
+        assert not show_sector.called and not hide_sector.called
+        assert game_model._shown[(5, 0, 0)] == vertex_lists
+        game_model.change_sectors((1, 0, 0), None)
+        game_model.process_entire_queue()
+        assert not game_model._shown
+
+    def test_show_and_hide_sector(self, game_model: GameModel):
+        for x in range(3):
+            for y in range(3):
+                for z in range(3):
+                    game_model.world[(x, y, z)] = Block.STONE
+        game_model.show_sector((0, 0, 0))
+        game_model.process_entire_queue()
+        assert len(game_model.shown) == 26
+        assert list(game_model._shown) == [(0, 0, 0)]
+        assert game_model._shown[(0, 0, 0)][0].index_count == 6 * 9 * 6
+        assert game_model._shown[(0, 0, 0)][0].get_size() <= 6 * 4 * 4
+        game_model.remove_block((0, 0, 0))
+        assert game_model._shown[(0, 0, 0)][0].index_count == 6 * 9 * 6
+        game_model.hide_sector((0, 0, 0))
+        game_model.process_entire_queue()
+        assert not game_model.shown and not game_model._shown
+
+    def test_showing_a_sector_again_reuses_its_vertex_lists(self, game_model: GameModel):
+        game_model.world[(0, 0, 0)] = Block.STONE
+        game_model.show_sector((0, 0, 0))
+        game_model.process_entire_queue()
+        vertex_lists = game_model._shown[(0, 0, 0)]
+        allocations = game_model._vertex_pool.allocations
+        game_model.hide_sector((0, 0, 0))
+        game_model.process_entire_queue()
+        game_model.show_sector((0, 0, 0))
+        game_model.process_entire_queue()
+        assert game_model._shown[(0, 0, 0)] == vertex_lists
+        assert game_model._vertex_pool.allocations == allocations
+        game_model.hide_sector((0, 0, 0))
+        game_model.process_entire_queue()
+
+    def test_save_and_load(self, game_model: GameModel, tmp_path):
+        game_model.world[(0, -2, 0)] = Block.GRASS
+        game_model.add_block((0, -1, 0), Block.BRICK)
+        game_model.player.position_in_blocks_from_origin = (0.5, 10, 0.5)
+        game_model.save(tmp_path)
+        game_model.remove_block((0, -1, 0))
+        game_model.player = Player()
+        game_model.load(tmp_path)
+        assert game_model.world[(0, -1, 0)] is Block.BRICK
+        assert (0, 0, 0) in game_model.edited_sectors and (0, -1, 0) in game_model.edited_chunks
+        assert game_model.player.position_in_blocks_from_origin == (0.5, 10, 0.5)
+        assert not game_model.shown and game_model.sector is None
+
+    def test_autosave_journal_is_replayed_on_load(self, game_model: GameModel, tmp_path):
+        game_model.world[(0, -2, 0)] = Block.GRASS
+        game_model.start_autosave(tmp_path)
+        game_model.add_block((0, -1, 0), Block.BRICK)
+        game_model.remove_block((0, -2, 0))
+        game_model.stop_autosave()
+        game_model.world.clear()
+        game_model.load(tmp_path)
+        assert game_model.world[(0, -1, 0)] is Block.BRICK
+        assert (0, -2, 0) not in game_model.world
+        assert (0, -1, 0) in game_model.edited_chunks
+
+    def test_autosave_writes_the_first_snapshot_in_the_background(self, game_model: GameModel, tmp_path, monkeypatch):
+        game_model.world[(0, -2, 0)] = Block.GRASS
+        monkeypatch.setattr(world_storage, 'save_world', None)
+        game_model.start_autosave(tmp_path)
+        game_model.add_block((0, -1, 0), Block.BRICK)
+        game_model.journal.wait_for_snapshot()
+        game_model.stop_autosave()
+        world = dict(game_model.world.items())
+        game_model.world.clear()
+        game_model.load(tmp_path)
+        assert dict(game_model.world.items()) == world
+
+    def test_region_edits_match_block_edits(self):
+        models = [GameModel(lazy_generation=True, mesh_workers=0) for _ in range(2)]
+        for model in models:
+            model.lazy_generation = False
+            for x in range(12, 20):
+                model.world[(x, 0, 3)] = Block.GRASS
+            model.change_sectors(None, (0, 0, 0))
+            model.process_entire_queue()
+        region_model, block_model = models
+        region_model.fill(((17, 3, 1), (14, 0, 5)), Block.STONE)
+        region_model.replace(((13, 0, 3), (18, 0, 3)), Block.STONE, Block.BRICK)
+        region_model.clear(((15, 1, 2), (16, 2, 4)))
+        for x in range(14, 18):
+            for y in range(4):
+                for z in range(1, 6):
+                    block = Block.BRICK if y == 0 and z == 3 else Block.STONE
+                    if 15 <= x <= 16 and 1 <= y <= 2 and 2 <= z <= 4:
+                        if (x, y, z) in block_model.world:
+                            block_model.remove_block((x, y, z))
+                    else:
+                        block_model.add_block((x, y, z), block)
+        assert dict(region_model.world.items()) == dict(block_model.world.items())
+        assert region_model.shown == block_model.shown
+        for sector in [(0, 0, 0), (1, 0, 0)]:
+            assert [vertex_list.index_count for vertex_list in region_model._shown[sector]] == \
+                   [vertex_list.index_count for vertex_list in block_model._shown[sector]]
+        assert region_model.edited_sectors == {(0, 0, 0), (1, 0, 0)}
+
+    def test_region_edits_are_replayed_on_load(self, game_model: GameModel, tmp_path):
+        game_model.start_autosave(tmp_path)
+        game_model.fill(((0, -3, 0), (2, -1, 2)), Block.SAND, immediate=False)
+        game_model.clear(((1, -2, 1), (1, -1, 1)), immediate=False)
+        game_model.stop_autosave()
+        world = dict(game_model.world.items())
+        game_model.world.clear()
+        game_model.load(tmp_path)
+        assert dict(game_model.world.items()) == world and len(world) == 25
+        game_model.process_entire_queue()
+
+    def test_close_stops_the_mesh_threads(self):
+        model = GameModel(lazy_generation=True)
+        executor = model._mesh_executor
+        model.close()
+        assert model._mesh_executor is None and executor._shutdown
+        model.world[(0, 0, 0)] = Block.STONE
+        model.show_sector((0, 0, 0))
+        model.process_entire_queue()
+        assert model._shown[(0, 0, 0)][0].index_count == 6 * 6
+
     def test_handle_adjust_vision(self, game_model):
         """!
         @see [issue#68](https://github.com/WSUCEG-7140/Tempus_Fugit_Minecraft/issues/68)
         """
         game_model.handle_adjust_vision(1, 1)
         assert game_model.player.rotation_in_degrees == (0.15, 0.15)
+
+
+@pytest.fixture()
+def lazy_game_model():
+    """!
+    @brief Creates a model instance generating an unbounded world around the player
+    """
+    pyglet.options['audio'] = ('silent')
+    yield GameModel(lazy_generation=True)
+
+
+class TestLazyGameModel:
+    """!
+    @brief A test class for the game model generating sectors on demand
+    """
+    def test_nothing_is_generated_at_startup(self, lazy_game_model: GameModel):
+        assert len(lazy_game_model.world) == 0
+        assert not lazy_game_model.generated_sectors
+
+    def test_sectors_in_range_are_generated_like_the_unbounded_world(self, lazy_game_model: GameModel):
+        lazy_game_model.change_sectors(None, (0, 0, 0))
+        assert (4, 0, 0) in lazy_game_model.generated_sectors
+        assert (5, 0, 0) not in lazy_game_model.generated_sectors
+        origin, volume = World.generate_sector(lazy_game_model.seed, (4, 0, 0), bounded=False)
+        x, y, z = (int(c) for c in next(iter(np.argwhere(volume))))
+        position = (x + origin[0], y + origin[1], z + origin[2])
+        assert lazy_game_model.world.block_id(position) == volume[x, y, z]
+
+    def test_sectors_out_of_range_are_unloaded_unless_edited(self, lazy_game_model: GameModel):
+        lazy_game_model.change_sectors(None, (0, 0, 0))
+        lazy_game_model.add_block((-64, 5, 0), Block.BRICK, immediate=False)
+        lazy_game_model.change_sectors((0, 0, 0), (20, 0, 0))
+        assert (0, 0, 0) not in lazy_game_model.generated_sectors
+        assert (0, 0, 0) not in lazy_game_model.sectors
+        assert lazy_game_model.world.get((-64, 5, 0)) is Block.BRICK
+        assert lazy_game_model.world.chunks_in_column((-4, 0)) == [(-4, 0, 0)]
+        assert (-4, 0, 0) not in lazy_game_model.generated_sectors
+        assert (20, 0, 0) in lazy_game_model.generated_sectors
+
+    def test_unloaded_sectors_are_generated_again_identically(self, lazy_game_model: GameModel):
+        lazy_game_model.change_sectors(None, (0, 0, 0))
+        before = lazy_game_model.world.chunks[(1, -1, 1)].copy()
+        lazy_game_model.change_sectors((0, 0, 0), (20, 0, 0))
+        assert (1, -1, 1) not in lazy_game_model.world.chunks
+        lazy_game_model.change_sectors((20, 0, 0), (0, 0, 0))
+        assert (lazy_game_model.world.chunks[(1, -1, 1)] == before).all()
+
+    def test_edited_sectors_are_generated_again_around_the_edited_chunks(self, lazy_game_model: GameModel):
+        lazy_game_model.change_sectors(None, (0, 0, 0))
+        before = {chunk: lazy_game_model.world.chunks[chunk].copy()
+                  for chunk in lazy_game_model.world.chunks_in_column((1, 1))}
+        lazy_game_model.remove_block((16, -2, 16), immediate=False)
+        lazy_game_model.change_sectors((0, 0, 0), (20, 0, 0))
+        assert lazy_game_model.world.chunks_in_column((1, 1)) == [(1, -1, 1)]
+        lazy_game_model.change_sectors((20, 0, 0), (0, 0, 0))
+        assert lazy_game_model.world.chunks_in_column((1, 1)) == sorted(before)
+        assert (16, -2, 16) not in lazy_game_model.world
+        for chunk, array in before.items():
+            assert (lazy_game_model.world.chunks[chunk] != array).sum() == (chunk == (1, -1, 1))
+
+    @pytest.mark.parametrize('vertical_sectors', [False, True])
+    def test_walking_keeps_the_shown_blocks_and_meshes_up_to_date(self, vertical_sectors):
+        model = GameModel(lazy_generation=True, vertical_sectors=vertical_sectors, mesh_workers=0,
+                          view_distance_in_sectors=2)
+        random_generator = random.Random(4)
+        before, after = None, (0, 0, 0)
+        for _ in range(100):
+            model.change_sectors(before, after)
+            if random_generator.random() < 0.3:
+                model.process_queue()
+            x, y, z = after
+            dx, dz = random_generator.choice(((1, 0), (-1, 0), (0, 1), (0, -1)))
+            before, after = after, (x + dx, y, z + dz)
+        model.process_entire_queue()
+        for sector in model._sectors_in_range(model._center_sector):
+            assert model.shown_in_sector.get(sector, set()) == set(model.sectors.exposed_positions(sector))
+            build, arguments = model._mesh_task(sector, model.world.chunks)
+            index_counts = {tile: len(indices) for tile, (_, _, indices) in build(*arguments).items()}
+            assert sum(vertex_list.index_count for vertex_list in model._shown.get(sector, ())) == \
+                   sum(index_counts.values())
+        assert all(position in model.world for position in model.shown)
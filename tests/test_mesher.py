@@ -0,0 +1,131 @@
+import numpy as np
+
+from tempus_fugit_minecraft import mesher
+from tempus_fugit_minecraft.block import Block
+from tempus_fugit_minecraft.chunked_world import ChunkedWorld
+from tempus_fugit_minecraft.utilities import cube_vertices, cube_vertices_array
+
+
+def quads_of(mesh):
+    """!
+    @brief Returns the corners of the quads of an indexed mesh, from the pairs of triangles of the quads.
+    """
+    vertices, tex_coords, indices = mesh
+    quads = indices.reshape(-1, 6)[:, [0, 1, 2, 5]]
+    return vertices.reshape(-1, 3)[quads], tex_coords.reshape(-1, 2)[quads]
+
+
+class TestMesher:
+    def test_cube_arrays_match_the_cubes_of_single_blocks(self):
+        positions = np.array([(0, 0, 0), (1, -2, 3), (-40, 7, 12)])
+        vertices = cube_vertices_array(positions, 0.5)
+        assert vertices.shape == (3, 72) and vertices.dtype == np.float32
+        for position, row in zip(positions.tolist(), vertices):
+            assert np.allclose(row, cube_vertices(*position, 0.5))
+        tex_coords = mesher.cube_tex_coords_array([Block.GRASS.id, Block.STONE.id])
+        assert tex_coords.shape == (2, 48) and tex_coords.dtype == np.float32
+        assert np.allclose(tex_coords, [Block.GRASS.texture_coordinates, Block.STONE.texture_coordinates])
+
+    def test_build_mesh_of_a_lone_block_holds_its_cube(self):
+        world = ChunkedWorld()
+        world[(1, 2, 3)] = Block.GRASS
+        meshes = mesher.build_mesh(world.chunks, [(1, 2, 3)])
+        assert sorted(meshes) == sorted({int(tile) for tile in mesher.FACE_TILES[Block.GRASS.id]})
+        corners = np.concatenate([quads_of(mesh)[0] for mesh in meshes.values()]).reshape(-1, 12)
+        assert sorted(map(tuple, corners.tolist())) == sorted(map(tuple, np.reshape(cube_vertices(1, 2, 3, 0.5),
+                                                                                    (6, 12)).tolist()))
+        for vertices, tex_coords, indices in meshes.values():
+            assert vertices.dtype == tex_coords.dtype == np.float32 and indices.dtype == np.uint32
+
+    def test_build_mesh_keeps_the_orientation_of_the_textures(self):
+        world = ChunkedWorld()
+        world[(5, -3, 7)] = Block.SAND
+        corners, tex_coords = quads_of(mesher.build_mesh(world.chunks, [(5, -3, 7)])[int(mesher.FACE_TILES[2, 0])])
+        for quad in tex_coords - tex_coords[:, :1]:
+            assert np.allclose(quad, [(0, 0), (1, 0), (1, 1), (0, 1)])
+        assert np.allclose(tex_coords, np.rint(tex_coords))
+
+    def test_build_mesh_shares_the_corners_of_adjacent_faces(self):
+        world = ChunkedWorld()
+        for x in range(16):
+            for z in range(16):
+                world[(x, 0, z)] = Block.SAND
+        vertices, _, indices = mesher.build_mesh(world.chunks, world)[int(mesher.FACE_TILES[2, 0])]
+        assert len(indices) == (2 * 16 * 16 + 4 * 16) * 6
+        assert len(vertices) // 3 <= 2 * 17 * 17 + 4 * 2 * 17
+
+    def test_build_mesh_leaves_out_the_faces_between_blocks(self):
+        world = ChunkedWorld()
+        world[(15, 0, 0)] = Block.GRASS
+        world[(16, 0, 0)] = Block.SAND
+        meshes = mesher.build_mesh(world.chunks, [(15, 0, 0)])
+        corners = np.concatenate([quads_of(mesh)[0] for mesh in meshes.values()])
+        assert len(corners) == 5
+        assert corners[:, :, 0].max() == 15.5
+
+    def test_build_mesh_of_a_buried_block_is_empty(self):
+        world = ChunkedWorld()
+        for x in range(3):
+            for y in range(3):
+                for z in range(3):
+                    world[(x, y, z)] = Block.STONE
+        assert mesher.build_mesh(world.chunks, [(1, 1, 1)]) == {}
+        _, _, indices = mesher.build_mesh(world.chunks, world)[int(mesher.FACE_TILES[Block.STONE.id, 0])]
+        assert len(indices) == 6 * 9 * 6
+
+    def test_build_mesh_of_nothing(self):
+        assert mesher.build_mesh({}, []) == {}
+
+    def test_build_greedy_mesh_merges_a_flat_layer_into_one_quad_per_side(self):
+        world = ChunkedWorld()
+        for x in range(16):
+            for z in range(16):
+                world[(x, 0, z)] = Block.GRASS
+        meshes = mesher.build_greedy_mesh(world.chunks, world)
+        top_tile, bottom_tile, side_tile = (int(mesher.FACE_TILES[Block.GRASS.id, face]) for face in (0, 1, 2))
+        assert sorted(meshes) == sorted((top_tile, bottom_tile, side_tile))
+        corners, tex_coords = quads_of(meshes[top_tile])
+        assert np.allclose(corners, [[(-0.5, 0.5, -0.5), (-0.5, 0.5, 15.5), (15.5, 0.5, 15.5), (15.5, 0.5, -0.5)]])
+        assert np.allclose(tex_coords - tex_coords[:, :1], [[(0, 0), (16, 0), (16, 16), (0, 16)]])
+        assert len(quads_of(meshes[side_tile])[0]) == 4
+
+    def test_build_greedy_mesh_keeps_different_textures_apart(self):
+        world = ChunkedWorld()
+        world[(0, 0, 0)] = Block.GRASS
+        world[(0, 0, 1)] = Block.SAND
+        world[(0, 0, 2)] = Block.GRASS
+        meshes = mesher.build_greedy_mesh(world.chunks, world)
+        sand_tile = int(mesher.FACE_TILES[Block.SAND.id, 0])
+        assert len(quads_of(meshes[sand_tile])[0]) == 4
+        assert sum(len(mesh[2]) for mesh in meshes.values()) // 6 == 4 + 4 + 3 * 2
+
+    def test_snapshot_copies_the_chunks_of_the_blocks_and_their_neighbors(self):
+        world = ChunkedWorld()
+        world[(0, 0, 0)] = Block.GRASS
+        world[(-1, 0, 0)] = Block.SAND
+        world[(40, 0, 0)] = Block.SAND
+        copy = mesher.snapshot(world, [(0, 0, 0)])
+        assert sorted(copy) == [(-1, 0, 0), (0, 0, 0)]
+        world[(-1, 0, 0)] = Block.BRICK
+        assert copy[(-1, 0, 0)][15, 0, 0] == Block.SAND.id
+        meshes = mesher.build_sector_meshes(copy, [(0, 0, 0)])
+        assert sum(len(mesh[2]) for mesh in meshes.values()) == 5 * 6
+
+    def test_downsample_keeps_the_most_common_block_of_each_cell(self):
+        ids = np.zeros((4, 4, 4), dtype=np.uint8)
+        ids[0, 0, 0] = Block.SAND.id
+        ids[2:, 2:, 2:] = Block.STONE.id
+        ids[3, 3, 3] = Block.GRASS.id
+        assert mesher._downsample(ids).tolist() == [[[Block.SAND.id, 0], [0, 0]], [[0, 0], [0, Block.STONE.id]]]
+
+    def test_build_lod_mesh_meshes_cells_of_two_blocks(self):
+        world = ChunkedWorld()
+        for x in range(16):
+            for z in range(16):
+                world[(x, 0, z)] = Block.SAND
+        meshes = mesher.build_lod_mesh(world.chunks, [(0, 0, 0)])
+        corners, tex_coords = quads_of(meshes[int(mesher.FACE_TILES[Block.SAND.id, 0])])
+        assert len(corners) == 2 * 8 * 8 + 4 * 8
+        assert corners[:, :, 1].min() == -0.5 and corners[:, :, 1].max() == 1.5
+        assert np.allclose(tex_coords - tex_coords[:, :1], [(0, 0), (2, 0), (2, 2), (0, 2)])
+        assert mesher.build_lod_mesh(world.chunks, [(0, 1, 0)]) == {}
@@ -0,0 +1,63 @@
+import numpy as np
+
+from tempus_fugit_minecraft import occlusion
+from tempus_fugit_minecraft.utilities import FACES
+
+TOP, BOTTOM, LEFT, RIGHT, FRONT, BACK = range(len(FACES))
+
+
+def connected(connectivity, face, other_face):
+    return bool(connectivity[face] >> other_face & 1)
+
+
+class TestOcclusion:
+    def test_opposite_faces(self):
+        assert occlusion.OPPOSITE_FACES == (BOTTOM, TOP, RIGHT, LEFT, BACK, FRONT)
+
+    def test_face_connectivity_of_empty_and_full_boxes(self):
+        assert occlusion.face_connectivity(np.ones((16, 16, 16), dtype=bool)) == occlusion.OPEN_CONNECTIVITY
+        assert occlusion.face_connectivity(np.zeros((16, 16, 16), dtype=bool)) == (0,) * 6
+
+    def test_face_connectivity_through_a_tunnel(self):
+        open_cells = np.zeros((16, 16, 16), dtype=bool)
+        open_cells[:, 7, 7] = True
+        open_cells[7, 7:, 7] = True
+        connectivity = occlusion.face_connectivity(open_cells)
+        assert connected(connectivity, LEFT, RIGHT) and connected(connectivity, RIGHT, TOP)
+        assert not connected(connectivity, LEFT, FRONT) and not connected(connectivity, TOP, BOTTOM)
+        assert connectivity[FRONT] == connectivity[BACK] == connectivity[BOTTOM] == 0
+
+    def test_face_connectivity_of_a_wall(self):
+        open_cells = np.ones((16, 16, 16), dtype=bool)
+        open_cells[8] = False
+        connectivity = occlusion.face_connectivity(open_cells)
+        assert not connected(connectivity, LEFT, RIGHT)
+        assert connected(connectivity, LEFT, TOP) and connected(connectivity, RIGHT, TOP)
+        assert connected(connectivity, TOP, BOTTOM)
+
+    def test_visible_sectors_stop_at_closed_sectors(self):
+        solid = {(2, 0, 0), (-1, 0, 0), (0, 0, 1), (0, 0, -1), (1, 0, 1), (1, 0, -1)}
+
+        def connectivity(sector):
+            return (0,) * 6 if sector in solid else occlusion.OPEN_CONNECTIVITY
+
+        def in_range(sector):
+            return max(map(abs, sector)) <= 3
+
+        visible = occlusion.visible_sectors((0, 0, 0), connectivity, in_range, range(2, 6))
+        assert visible == {(0, 0, 0), (1, 0, 0)} | solid
+
+    def test_visible_sectors_do_not_turn_back(self):
+        passages = {(1, 0, 0): (LEFT, RIGHT), (2, 0, 0): (LEFT, FRONT), (2, 0, 1): (BACK, LEFT)}
+
+        def connectivity(sector):
+            if sector not in passages:
+                return (0,) * 6
+            entry, exit = passages[sector]
+            return tuple(1 << exit if face == entry else 0 for face in range(6))
+
+        def in_range(sector):
+            return max(map(abs, sector)) <= 3
+
+        visible = occlusion.visible_sectors((0, 0, 0), connectivity, in_range, range(2, 6))
+        assert visible == {(0, 0, 0), (1, 0, 0), (-1, 0, 0), (0, 0, 1), (0, 0, -1), (2, 0, 0), (2, 0, 1)}
@@ -0,0 +1,64 @@
+import pytest
+
+from tempus_fugit_minecraft.block import Block
+from tempus_fugit_minecraft.chunked_world import ChunkedWorld
+from tempus_fugit_minecraft.sector_index import SectorIndex, offsets_in_range, range_changes
+
+
+@pytest.fixture()
+def world():
+    world = ChunkedWorld()
+    world[(1, -2, 1)] = Block.GRASS
+    world[(1, 20, 1)] = Block.LIGHT_CLOUD
+    world[(17, 0, -1)] = Block.STONE
+    yield world
+
+
+class TestSectorIndex:
+    def test_column_sectors(self, world):
+        sectors = SectorIndex(world)
+        assert sectors.sector_of((1.4, 20, 1)) == (0, 0, 0)
+        assert sorted(sectors[(0, 0, 0)]) == [(1, -2, 1), (1, 20, 1)]
+        assert sorted(sectors) == [(0, 0, 0), (1, 0, -1)]
+        assert (5, 0, 5) not in sectors
+        assert sectors.get((5, 0, 5), []) == []
+
+    def test_vertical_sectors(self, world):
+        sectors = SectorIndex(world, vertical=True)
+        assert sectors.sector_of((1, -2, 1)) == (0, -1, 0)
+        assert sectors[(0, -1, 0)] == [(1, -2, 1)]
+        assert sectors[(0, 1, 0)] == [(1, 20, 1)]
+        assert len(sectors) == 3
+
+    def test_index_follows_the_world(self, world):
+        sectors = SectorIndex(world)
+        del world[(17, 0, -1)]
+        world[(40, 3, 40)] = Block.BRICK
+        assert (1, 0, -1) not in sectors
+        assert sectors[(2, 0, 2)] == [(40, 3, 40)]
+
+    def test_exposed_positions(self, world):
+        for x in range(3):
+            for y in range(3):
+                for z in range(3):
+                    world[(x + 4, y + 4, z + 4)] = Block.STONE
+        exposed = SectorIndex(world).exposed_positions((0, 0, 0))
+        assert (5, 5, 5) not in exposed
+        assert (1, 20, 1) in exposed
+        assert len(exposed) == 2 + 26
+
+    def test_offsets_in_range(self):
+        assert offsets_in_range(4) == {(dx, 0, dz) for dx in range(-4, 5) for dz in range(-4, 5)
+                                       if dx ** 2 + dz ** 2 <= 25}
+        assert offsets_in_range(2, 2) == {(dx, dy, dz) for dx in range(-2, 3) for dy in range(-2, 3)
+                                          for dz in range(-2, 3) if dx ** 2 + dy ** 2 + dz ** 2 <= 9}
+        flat = offsets_in_range(4, 1)
+        assert max(dy for _, dy, _ in flat) == 1 and (4, 0, 2) in flat and (4, 1, 2) not in flat
+
+    def test_range_changes_match_the_sectors_in_range(self):
+        for offset in [(1, 0, 0), (0, 0, -1), (1, 1, 0), (3, 0, 2), (20, 0, 0)]:
+            show, hide = range_changes(offset, 3, 2)
+            after = offsets_in_range(3, 2)
+            before = {(x - offset[0], y - offset[1], z - offset[2]) for x, y, z in after}
+            assert set(show) == after - before and set(hide) == before - after
+        assert range_changes((0, 0, 0), 3) == ((), ())
@@ -0,0 +1,49 @@
+from tempus_fugit_minecraft.sector_queue import SectorQueue
+
+
+class TestSectorQueue:
+    def test_pop_returns_the_call_of_the_most_urgent_sector(self):
+        calls = []
+        queue = SectorQueue(lambda sector: abs(sector[0]))
+        for x in (3, -1, 2, 0, 1):
+            queue.push((x, 0, 0), calls.append, x)
+        assert len(queue) == 5
+        assert queue.sectors() == [(0, 0, 0), (-1, 0, 0), (1, 0, 0), (2, 0, 0), (3, 0, 0)]
+        while queue:
+            func, args = queue.pop()
+            func(*args)
+        assert calls == [0, -1, 1, 2, 3]
+
+    def test_reprioritize_uses_the_new_priorities(self):
+        center = [0]
+        queue = SectorQueue(lambda sector: abs(sector[0] - center[0]))
+        for x in range(5):
+            queue.push((x, 0, 0), print)
+        center[0] = 4
+        assert queue.sectors()[0] == (0, 0, 0)
+        queue.reprioritize()
+        assert queue.sectors() == [(4, 0, 0), (3, 0, 0), (2, 0, 0), (1, 0, 0), (0, 0, 0)]
+        queue.clear()
+        assert not queue
+
+    def test_a_call_replaces_the_queued_call_with_the_same_key(self):
+        calls = []
+        queue = SectorQueue(lambda sector: sector[0])
+        queue.push((1, 0, 0), calls.append, 'first', key='a')
+        queue.push((0, 0, 0), calls.append, 'other')
+        queue.push((2, 0, 0), calls.append, 'last', key='a')
+        assert len(queue) == 2
+        assert queue.get('a') == (calls.append, ('last',))
+        while queue:
+            func, args = queue.pop()
+            func(*args)
+        assert calls == ['other', 'last']
+        assert queue.get('a') is None
+
+    def test_cancel(self):
+        queue = SectorQueue(lambda sector: 0)
+        queue.push((0, 0, 0), print, key='a')
+        assert queue.cancel('a') and not queue.cancel('a')
+        assert len(queue) == 0 and queue.sectors() == []
+        queue.reprioritize()
+        assert not queue._heap
@@ -0,0 +1,74 @@
+import numpy as np
+from pyglet.gl import GL_NO_ERROR, GL_TRIANGLES, glGetError
+from pyglet.graphics import Batch, Group
+
+from tempus_fugit_minecraft import mesher, vertex_pool
+from tempus_fugit_minecraft.vertex_pool import VertexListPool
+
+
+def new_pool():
+    return VertexListPool(Batch(), GL_TRIANGLES, 'v3f/static', 't2f/static')
+
+
+class CountingGroup(Group):
+    def __init__(self):
+        super().__init__()
+        self.states_set = 0
+
+    def set_state(self):
+        self.states_set += 1
+
+
+class TestVertexPool:
+    def test_size_class(self):
+        assert [vertex_pool.size_class(count) for count in (1, 4, 5, 8, 9, 15, 17, 56, 57, 1000)] == \
+               [4, 4, 5, 8, 10, 16, 20, 56, 64, 1024]
+        for count in range(1, 5000):
+            assert count <= vertex_pool.size_class(count) < max(count * 1.25, 5)
+
+    def test_allocate_rounds_up_the_vertices_and_keeps_the_indices_of_the_mesh(self):
+        pool = new_pool()
+        vertex_list = pool.allocate(Group(), 9, 12)
+        assert vertex_list.get_size() == 10 and vertex_list.index_count == 12
+        mesher.copy_mesh(vertex_list, np.ones(27, dtype=np.float32), np.ones(18, dtype=np.float32),
+                         np.arange(12, dtype=np.uint32) % 9)
+        assert list(vertex_list.indices) == [vertex_list.start + i % 9 for i in range(12)]
+        assert vertex_pool._index_array(vertex_list, 12, 4).tolist() == [vertex_list.start] * 4
+        assert pool.used_capacity == 10 and pool.allocations == 1
+
+    def test_freed_vertex_lists_are_reused_by_meshes_of_the_same_size_class(self):
+        pool = new_pool()
+        group = Group()
+        vertex_list = pool.allocate(group, 17, 30)
+        pool.free(vertex_list)
+        assert vertex_list.index_count == 32
+        assert list(vertex_list.indices) == [vertex_list.start] * 32
+        assert pool.allocate(Group(), 17, 30) is not vertex_list
+        assert pool.allocate(group, 21, 30) is not vertex_list
+        assert pool.allocate(group, 18, 29) is vertex_list
+        assert vertex_list.index_count == 29
+        assert (pool.allocations, pool.reuses) == (3, 1)
+
+    def test_release_idle_deletes_the_oldest_free_vertex_lists_beyond_the_pooled_fraction(self):
+        pool = new_pool()
+        group = Group()
+        vertex_lists = [pool.allocate(group, 112, 112) for _ in range(6)]
+        for vertex_list in vertex_lists[:4]:
+            pool.free(vertex_list)
+        assert pool.release_idle(limit=1) == 1
+        assert pool.release_idle() == 2
+        assert pool.release_idle() == 0
+        assert (pool.used_capacity, pool.free_capacity, pool.releases) == (224, 112, 3)
+        assert pool.allocate(group, 112, 112) is vertex_lists[3]
+        pool.free(vertex_lists[4])
+        pool.clear()
+        assert pool.free_capacity == 0 and pool.releases == 4
+
+    def test_draw_sets_the_state_of_each_group_once(self):
+        pool = new_pool()
+        groups = [CountingGroup(), CountingGroup(), CountingGroup()]
+        vertex_lists = [pool.allocate(group, 3, 3) for group in groups[:2] for _ in range(3)]
+        glGetError()
+        pool.draw(vertex_lists[1:])
+        assert glGetError() == GL_NO_ERROR
+        assert [group.states_set for group in groups] == [1, 1, 0]
@@ -1,6 +1,10 @@
+import numpy as np
 import pyglet
 import pytest
+from pyglet.gl import GL_MODELVIEW_MATRIX, GL_NO_ERROR, GL_PROJECTION_MATRIX, GLfloat, glGetError, glGetFloatv
 from unittest.mock import Mock
+from tempus_fugit_minecraft import frustum
+from tempus_fugit_minecraft.block import Block
 from tempus_fugit_minecraft.window import Window
 from tempus_fugit_minecraft.player import Player
 
@@ -122,3 +126,32 @@ class TestWindow:
         window.on_key_press(pyglet.window.key.W, Mock())
         window.on_key_press(pyglet.window.key.W, Mock())
         assert window.is_double_click()
+
+    def test_frustum_planes_match_the_3d_view(self, window):
+        window.game_model.player.position_in_blocks_from_origin = (3, 4, -5)
+        window.game_model.player.rotation_in_degrees = (30, -20)
+        window.set_3d()
+        matrices = []
+        for name in (GL_PROJECTION_MATRIX, GL_MODELVIEW_MATRIX):
+            matrix = (GLfloat * 16)()
+            glGetFloatv(name, matrix)
+            matrices.append(np.array(matrix).reshape(4, 4).T)
+        assert np.allclose(window.frustum_planes(), frustum.frustum_planes(matrices[0] @ matrices[1]), atol=1e-4)
+        window.game_model.player = Player()
+
+    def test_on_draw_draws_the_shown_sectors(self, window):
+        window.game_model.change_sectors(None, (0, 0, 0))
+        window.game_model.process_entire_queue()
+        glGetError()
+        window.on_draw()
+        assert glGetError() == GL_NO_ERROR
+        assert 'draw' in window.game_model.frame_budget.averages
+
+    def test_the_world_is_saved_as_it_is_edited_and_loaded_again(self, tmp_path):
+        saving_window = Window(save_dir=str(tmp_path))
+        assert saving_window.game_model.journal is not None
+        saving_window.game_model.add_block((0, 30, 0), Block.BRICK, immediate=False)
+        saving_window.on_close()
+        loading_window = Window(save_dir=str(tmp_path))
+        assert loading_window.game_model.world.get((0, 30, 0)) is Block.BRICK
+        loading_window.on_close()
@@ -1,5 +1,6 @@
 import random
 
+import numpy as np
 import pytest
 
 from tempus_fugit_minecraft.block import Block
@@ -187,6 +188,15 @@ class TestWorld:
             _, (x, y, z) = single_tree[0]
             assert game_model.world[(x, y - 1, z)] in [Block.GRASS,Block.SAND]
 
+    def test_generate_trees_grows_trees_under_clouds_but_not_under_blocks_nearby(self, game_model):
+        for x in range(3):
+            game_model.add_block((x, -1, 0), Block.GRASS, immediate=False)
+        game_model.add_block((0, 20, 0), Block.LIGHT_CLOUD, immediate=False)
+        game_model.add_block((1, 8, 0), Block.BRICK, immediate=False)
+
+        trees = World.generate_trees(game_model, 10)
+        assert sorted(tree[0][1] for tree in trees) == [(0, 0, 0), (2, 0, 0)]
+
     def test_generate_hill_blocks_are_either_grass_sand_brick(self):
         hill = World.generate_hill(0, 0)
         block_types = set([ block for block, _ in hill ])
@@ -236,7 +246,7 @@ class TestWorld:
     def test_generate_base_layer(self):
         base_layer = World.generate_base_layer()
         grass = [position for block, position in base_layer if block == Block.GRASS]
-        assert len(grass) == (1 + 2 * World.WIDTH_FROM_ORIGIN_IN_BLOCKS) ** 2
+        assert len(grass) == (2 * World.WIDTH_FROM_ORIGIN_IN_BLOCKS - 1) ** 2  # the outer walls replace the grass
         stone = [position for block, position in base_layer if block == Block.STONE]
         assert len(stone) > (1 + 2 * World.WIDTH_FROM_ORIGIN_IN_BLOCKS) ** 2
         for (_, y, _) in grass:
@@ -244,6 +254,96 @@ class TestWorld:
         for (_, y, _) in stone:
             assert -3 <= y <= 3
 
+    def test_fill_base_layer_matches_generate_base_layer(self):
+        w = World.WIDTH_FROM_ORIGIN_IN_BLOCKS
+        origin = (-w, -3, -w)
+        volume = np.zeros((2 * w + 1, 6, 2 * w + 1), dtype=np.uint8)
+        World.fill_base_layer(volume, origin)
+        assert self.__volume_to_dict(volume, origin) == dict((position, block) for block, position in World.generate_base_layer())
+
+    def test_fill_hill_matches_generate_hill(self):
+        random.seed(7)
+        hill = World.generate_hill(20, -30)
+        random.seed(7)
+        origin = (0, -1, -50)
+        volume = np.zeros((40, 8, 40), dtype=np.uint8)
+        World.fill_hill(volume, origin, 20, -30, *World.random_hill_shape())
+        assert self.__volume_to_dict(volume, origin) == dict((position, block) for block, position in hill)
+
+    def test_fill_hill_keeps_the_spawn_point_clear(self):
+        origin = (-10, -1, -10)
+        volume = np.zeros((21, 8, 21), dtype=np.uint8)
+        World.fill_hill(volume, origin, 0, 0, 6, 8, Block.BRICK)
+        assert not volume[10, :, 10].any()
+        assert volume.any()
+
+    def test_fill_cloud_matches_generate_single_cloud(self):
+        random.seed(3)
+        cloud = World.generate_single_cloud(4, 20, 3, 5)
+        origin = (-10, 20, -10)
+        volume = np.zeros((30, 1, 30), dtype=np.uint8)
+        World.fill_cloud(volume, origin, 4, 20, 3, 5, cloud[0][0])
+        assert self.__volume_to_dict(volume, origin) == dict((position, block) for block, position in cloud)
+
+    def test_fill_tree_is_clipped_to_the_volume(self):
+        origin = (0, 0, 0)
+        volume = np.zeros((3, 10, 3), dtype=np.uint8)
+        World.fill_tree(volume, origin, 0, 0, 0, trunk_height=5)
+        assert (volume[0, :5, 0] == Block.TREE_TRUNK.id).all()
+        assert (volume[:, 5:8, :] == Block.TREE_LEAVES.id).all()
+
+    def test_find_places_for_trees_skips_covered_grass(self):
+        origin = (0, -2, 0)
+        volume = np.zeros((3, 12, 1), dtype=np.uint8)
+        volume[:, 0, :] = Block.GRASS.id
+        volume[1, 5, 0] = Block.BRICK.id
+        assert World.find_places_for_trees(volume, origin) == [(0, -2, 0), (2, -2, 0)]
+
+    def test_generate_sector_is_deterministic(self):
+        origin, volume = World.generate_sector(World.DEFAULT_SEED, (2, 0, -3))
+        same_origin, same_volume = World.generate_sector(World.DEFAULT_SEED, (2, 0, -3))
+        _, other_volume = World.generate_sector(World.DEFAULT_SEED + 1, (2, 0, -3))
+        assert origin == same_origin == (32, World.LOWEST_BLOCK_Y_IN_BLOCKS, -48)
+        assert (volume == same_volume).all()
+        assert (volume != other_volume).any()
+
+    def test_generate_sectors_does_not_depend_on_the_number_of_workers(self):
+        sectors = [(x, 0, z) for x in range(-2, 2) for z in range(-2, 2)]
+        single = list(World.generate_sectors(World.DEFAULT_SEED, sectors, max_workers=1))
+        parallel = list(World.generate_sectors(World.DEFAULT_SEED, sectors, max_workers=2))
+        assert [origin for origin, _ in single] == [origin for origin, _ in parallel]
+        assert all((a == b).all() for (_, a), (_, b) in zip(single, parallel))
+
+    def test_sectors_in_world_cover_the_clouds_over_the_walls(self):
+        sectors = World.sectors_in_world()
+        edge = World.WIDTH_FROM_ORIGIN_IN_BLOCKS + World.MAX_CLOUD_SIZE_IN_BLOCKS
+        assert (-edge // 16, 0, -edge // 16) in sectors
+        assert (edge // 16, 0, edge // 16) in sectors
+
+    def test_generate_sector_trees_are_planted_on_grass(self):
+        for sector in [(x, 0, z) for x in range(-3, 3) for z in range(-3, 3)]:
+            origin, volume = World.generate_sector(World.DEFAULT_SEED, sector)
+            for x, y, z in np.argwhere(volume == Block.TREE_TRUNK.id):
+                if y + origin[1] == -1:
+                    assert volume[x, y - 1, z] == Block.GRASS.id
+
+    def test_unbounded_sectors_have_a_base_layer_and_no_walls(self):
+        far_sector = (100, 0, -100)
+        origin, volume = World.generate_sector(World.DEFAULT_SEED, far_sector, bounded=False)
+        assert (volume[:, -2 - origin[1], :] == Block.GRASS.id).all()
+        assert (volume[:, -3 - origin[1], :] == Block.STONE.id).all()
+        _, bounded_volume = World.generate_sector(World.DEFAULT_SEED, far_sector)
+        assert not bounded_volume.any()
+        edge_sector = (World.WIDTH_FROM_ORIGIN_IN_BLOCKS // 16, 0, 0)
+        _, edge_volume = World.generate_sector(World.DEFAULT_SEED, edge_sector, bounded=False)
+        wall_x = World.WIDTH_FROM_ORIGIN_IN_BLOCKS - edge_sector[0] * 16
+        assert Block.STONE.id not in edge_volume[wall_x, -1 - World.LOWEST_BLOCK_Y_IN_BLOCKS, :]
+
+    @staticmethod
+    def __volume_to_dict(volume, origin):
+        return dict(((int(x) + origin[0], int(y) + origin[1], int(z) + origin[2]), Block.from_id(volume[x, y, z]))
+                    for x, y, z in np.argwhere(volume))
+
     # issue86
     def __generate_test_terrain(self, game_model:GameModel):
         for x in range(-World.WIDTH_FROM_ORIGIN_IN_BLOCKS, World.WIDTH_FROM_ORIGIN_IN_BLOCKS):
@@ -0,0 +1,72 @@
+import os
+
+import pyglet
+import pytest
+
+from tempus_fugit_minecraft import world_cache
+from tempus_fugit_minecraft.block import Block
+from tempus_fugit_minecraft.chunked_world import ChunkedWorld
+from tempus_fugit_minecraft.game_model import GameModel
+from tempus_fugit_minecraft.world import World
+
+
+class TestWorldCache:
+    def test_cache_key_depends_on_the_seed_and_the_world_size(self, monkeypatch):
+        key = world_cache.cache_key(World.DEFAULT_SEED)
+        assert key == world_cache.cache_key(World.DEFAULT_SEED)
+        assert key != world_cache.cache_key(World.DEFAULT_SEED + 1)
+        monkeypatch.setattr(World, 'WIDTH_IN_BLOCKS', World.WIDTH_IN_BLOCKS * 2)
+        assert key != world_cache.cache_key(World.DEFAULT_SEED)
+
+    def test_cache_key_depends_on_the_block_ids_and_numpy(self, monkeypatch):
+        key = world_cache.cache_key(World.DEFAULT_SEED)
+        monkeypatch.setattr(Block, '__BLOCK_NAMES__', Block.__BLOCK_NAMES__[:1] + Block.__BLOCK_NAMES__[:0:-1])
+        assert key != world_cache.cache_key(World.DEFAULT_SEED)
+        monkeypatch.undo()
+        monkeypatch.setattr(world_cache.np, '__version__', '0.0.0')
+        assert key != world_cache.cache_key(World.DEFAULT_SEED)
+
+    def test_store_and_load(self, tmp_path):
+        world = ChunkedWorld()
+        world[(3, -2, 7)] = Block.GRASS
+        world_cache.store_generated_world(world, 1, [(0, 0, 0)], tmp_path)
+        loaded = ChunkedWorld()
+        assert world_cache.load_generated_world(loaded, 1, tmp_path) == [(0, 0, 0)]
+        assert dict(loaded.items()) == dict(world.items())
+        assert world_cache.load_generated_world(ChunkedWorld(), 2, tmp_path) is None
+
+    def test_least_recently_used_worlds_are_evicted(self, tmp_path):
+        world = ChunkedWorld()
+        world[(0, 0, 0)] = Block.GRASS
+        for seed in range(world_cache.MAX_CACHED_WORLDS):
+            world_cache.store_generated_world(world, seed, [(0, 0, 0)], tmp_path)
+            os.utime(tmp_path / world_cache.cache_key(seed), (seed, seed))
+        assert world_cache.load_generated_world(ChunkedWorld(), 0, tmp_path) is not None
+        world_cache.store_generated_world(world, world_cache.MAX_CACHED_WORLDS, [(0, 0, 0)], tmp_path)
+        assert sorted(os.listdir(tmp_path)) == sorted(
+            world_cache.cache_key(seed) for seed in [0] + list(range(2, world_cache.MAX_CACHED_WORLDS + 1)))
+
+    def test_stale_temporary_dirs_are_removed(self, tmp_path):
+        stale = tmp_path / (world_cache.TEMPORARY_DIR_PREFIX + 'stale')
+        fresh = tmp_path / (world_cache.TEMPORARY_DIR_PREFIX + 'fresh')
+        stale.mkdir()
+        fresh.mkdir()
+        os.utime(stale, (0, 0))
+        world_cache.store_generated_world(ChunkedWorld(), 1, [(0, 0, 0)], tmp_path)
+        assert sorted(os.listdir(tmp_path)) == sorted([fresh.name, world_cache.cache_key(1)])
+
+    def test_default_cache_dir_can_be_set_from_the_environment(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(world_cache.CACHE_DIR_ENVIRONMENT_VARIABLE, str(tmp_path))
+        assert world_cache.default_cache_dir() == str(tmp_path)
+
+    def test_game_model_loads_the_cached_world(self, tmp_path):
+        pyglet.options['audio'] = ('silent')
+        generated = GameModel(seed=11, world_cache_dir=tmp_path)
+        assert os.listdir(tmp_path) == [world_cache.cache_key(11)]
+        cached = GameModel(seed=11, world_cache_dir=tmp_path)
+        assert cached.generated_sectors == generated.generated_sectors
+        assert cached.world.nbytes == generated.world.nbytes
+        assert all((cached.world.chunks[chunk] == array).all() for chunk, array in generated.world.chunks.items())
+        cached.remove_block(next(iter(cached.world)))
+        again = GameModel(seed=11, world_cache_dir=tmp_path)
+        assert len(again.world) == len(generated.world)
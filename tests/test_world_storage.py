@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+from tempus_fugit_minecraft.block import Block
+from tempus_fugit_minecraft.chunked_world import ChunkedWorld
+from tempus_fugit_minecraft.world_storage import load_world, read_region, region_file_name, region_of, save_world
+
+
+@pytest.fixture()
+def world():
+    world = ChunkedWorld()
+    world[(0, 0, 0)] = Block.GRASS
+    world[(-1, -3, 200)] = Block.STONE
+    world[(15, 26, 15)] = Block.DARK_CLOUD
+    yield world
+
+
+class TestWorldStorage:
+    def test_save_and_load(self, world, tmp_path):
+        save_world(world, tmp_path, {'seed': 3})
+        loaded = ChunkedWorld()
+        level = load_world(loaded, tmp_path)
+        assert level['seed'] == 3
+        assert dict(loaded.items()) == dict(world.items())
+        assert len(loaded) == 3
+        assert loaded.top_block_y(15, 15) == 26
+
+    def test_one_file_per_region(self, world, tmp_path):
+        save_world(world, tmp_path, {})
+        regions = {region_of((0, 0, 0)), region_of((-1, -1, 12))}
+        assert sorted(name for name in os.listdir(tmp_path) if name.endswith('.region')) == \
+            sorted(region_file_name(region) for region in regions)
+
+    def test_loaded_chunks_are_views_of_the_region_file(self, world, tmp_path):
+        save_world(world, tmp_path, {})
+        chunks = {chunk: (array, block_count)
+                  for chunk, array, block_count in read_region(os.path.join(tmp_path, region_file_name((0, 0))))}
+        assert sorted(chunks) == [(0, 0, 0), (0, 1, 0)]
+        array, block_count = chunks[(0, 0, 0)]
+        assert block_count == 1
+        assert isinstance(array, np.memmap) and not array.flags.owndata
+
+    def test_editing_a_loaded_world_does_not_change_the_save(self, world, tmp_path):
+        save_world(world, tmp_path, {})
+        loaded = ChunkedWorld()
+        load_world(loaded, tmp_path)
+        loaded[(1, 0, 0)] = Block.BRICK
+        del loaded[(0, 0, 0)]
+        again = ChunkedWorld()
+        load_world(again, tmp_path)
+        assert dict(again.items()) == dict(world.items())
+
+    def test_saving_over_a_loaded_world(self, world, tmp_path):
+        save_world(world, tmp_path, {})
+        loaded = ChunkedWorld()
+        load_world(loaded, tmp_path)
+        del loaded[(-1, -3, 200)]
+        save_world(loaded, tmp_path, {})
+        assert loaded[(0, 0, 0)] is Block.GRASS
+        assert len(os.listdir(tmp_path)) == 2
+        again = ChunkedWorld()
+        load_world(again, tmp_path)
+        assert dict(again.items()) == dict(loaded.items())
+
+    def test_load_rejects_other_files(self, world, tmp_path):
+        save_world(world, tmp_path, {})
+        with open(os.path.join(tmp_path, region_file_name((0, 0))), 'wb') as file:
+            file.write(b'not a region file')
+        with pytest.raises(ValueError):
+            load_world(ChunkedWorld(), tmp_path)